@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the latency of an endpoint that calls three backends (simulated with sleeps of --delay seconds),
+a sync endpoint calls them one after another and an async endpoint awaits them concurrently
+in the event loop of the worker. The requests are sent by --clients threads with the flask test client.
+
+usage: python benchmarks/bench_async_endpoints.py --requests 50 --clients 8 --delay 0.02
+"""
+from concurrent.futures import ThreadPoolExecutor
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+from hunabku.HunabkuBase import HunabkuPluginBase, endpoint, set_verbose
+import argparse
+import asyncio
+import statistics
+import time
+
+DELAY = 0.02
+
+
+class FanOut(HunabkuPluginBase):
+    def __init__(self, hunabku):
+        super().__init__(hunabku)
+
+    @endpoint('/bench/sync', methods=['GET'])
+    def sync_fanout(self):
+        values = []
+        for backend in range(3):
+            time.sleep(DELAY)
+            values.append(backend)
+        return self.json_response({'values': values})
+
+    @endpoint('/bench/async', methods=['GET'])
+    async def async_fanout(self):
+        async def call(backend):
+            await asyncio.sleep(DELAY)
+            return backend
+        values = await asyncio.gather(*[call(backend) for backend in range(3)])
+        return self.json_response({'values': values})
+
+
+def measure(app, path, requests, clients):
+    def request(_):
+        client = app.test_client()
+        start = time.perf_counter()
+        client.get(path)
+        return time.perf_counter() - start
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        latencies = list(executor.map(request, range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=DELAY)
+    args = parser.parse_args()
+    DELAY = args.delay
+    set_verbose(False)
+    server = Hunabku(ConfigGenerator.config)
+    FanOut(server).register_endpoints()
+    print(f"{'endpoint':>9} {'p50 (ms)':>10} {'p95 (ms)':>10} {'req/s':>8}")
+    for name in ("sync", "async"):
+        latencies, seconds = measure(server.app, f"/bench/{name}", args.requests, args.clients)
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{name:>9} {statistics.median(latencies) * 1000:>10.1f} {p95 * 1000:>10.1f} "
+              f"{args.requests / seconds:>8.1f}")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the CPU cost and the bytes saved by the compression of the responses (hunabku.Compression),
+for every available encoding and level, the payloads are json and ndjson documents like the ones returned
+by MongoDB and sent by the plugins.
+
+usage: python benchmarks/bench_compression.py --documents 10000 --repeat 3
+"""
+from datetime import datetime, timedelta
+from hunabku.Compression import Compressor
+from hunabku.Config import ConfigGenerator
+from hunabku.Serializer import Serializer
+import argparse
+import time
+
+
+def payloads(documents):
+    start = datetime(2020, 1, 1)
+    data = [{"_id": f"{i:024x}", "title": f"document {i}", "year": 2000 + i % 24, "score": i / 7,
+             "authors": [{"name": f"author {j}", "id": j} for j in range(5)],
+             "updated": start + timedelta(minutes=i)} for i in range(documents)]
+    serializer = Serializer()
+    return {"json": serializer.dumpb(data), "ndjson": b"".join(serializer.dumpb(item) + b"\n" for item in data)}
+
+
+def measure(compressor, data, encoding, options, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(compressor.compress(data, encoding, options))
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    compressor = Compressor(ConfigGenerator.config)
+    levels = {"gzip": ("level", (1, 6, 9)), "br": ("brotli_quality", (1, 4, 11)), "zstd": ("zstd_level", (1, 3, 9))}
+    print(f"{'payload':>8} {'encoding':>8} {'level':>5} {'ms':>8} {'MB/s':>8} {'ratio':>6} {'saved KB':>9}")
+    for name, data in payloads(args.documents).items():
+        for encoding in compressor.encodings:
+            option, values = levels[encoding]
+            for value in values:
+                options = dict(compressor.get_options(), **{option: value})
+                seconds, size = measure(compressor, data, encoding, options, args.repeat)
+                print(f"{name:>8} {encoding:>8} {value:>5} {seconds * 1000:>8.1f} {len(data) / seconds / 1e6:>8.1f} "
+                      f"{len(data) / size:>6.1f} {(len(data) - size) / 1024:>9.0f}")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the config lookups done by the plugins at request time, the mutable Config
+against the read only snapshot returned by Config.freeze (FrozenConfig).
+
+usage: python benchmarks/bench_config.py --lookups 1000000 --repeat 5
+"""
+from hunabku.Config import ConfigGenerator
+import argparse
+import time
+
+
+def measure(function, lookups, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(lookups):
+            function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    config = ConfigGenerator.config
+    frozen = config.freeze()
+    cases = [("attribute a.b", lambda c: lambda: c.apikeys.header),
+             ("attribute a.b.c", lambda c: lambda: c.ratelimit.rate),
+             ("get missing", lambda c: lambda: c.get("ratelimit_missing")),
+             ("keys", lambda c: lambda: c.keys())]
+    print(f"{'lookup':>16} {'Config (ns)':>12} {'FrozenConfig (ns)':>18} {'speedup':>8}")
+    for name, case in cases:
+        before = measure(case(config), args.lookups, args.repeat)
+        after = measure(case(frozen), args.lookups, args.repeat)
+        print(f"{name:>16} {before / args.lookups * 1e9:>12.1f} {after / args.lookups * 1e9:>18.1f} "
+              f"{before / after:>8.2f}")
+    lookup = measure(lambda: frozen.lookup("apikeys.header"), args.lookups, args.repeat)
+    print(f"{'lookup(path)':>16} {'':>12} {lookup / args.lookups * 1e9:>18.1f}")
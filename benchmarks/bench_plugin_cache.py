@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Benchmark of Hunabku.load_plugins with a cold plugin cache (removed before the start)
+and with a warm plugin cache, every start runs in a new python process.
+
+usage: python benchmarks/bench_plugin_cache.py --repeat 5
+"""
+import argparse
+import subprocess
+import sys
+
+LOAD = """
+import time
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+from hunabku.HunabkuBase import set_verbose
+set_verbose(False)
+server = Hunabku(ConfigGenerator.config)
+if {cold}:
+    server.plugin_cache.clear()
+start = time.perf_counter()
+server.load_plugins(verbose=False)
+print(time.perf_counter() - start, len(server.plugins))
+"""
+
+
+def start(cold):
+    process = subprocess.run([sys.executable, "-c", LOAD.format(cold=cold)],
+                             stdout=subprocess.PIPE, check=True)
+    seconds, plugins = process.stdout.decode().split()[-2:]
+    return float(seconds), int(plugins)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'start':>6} {'min (ms)':>10} {'mean (ms)':>10} {'plugins':>8}")
+    for name, cold in [("cold", True), ("warm", False)]:
+        times = []
+        for _ in range(args.repeat):
+            seconds, plugins = start(cold)
+            times.append(seconds)
+        print(f"{name:>6} {min(times) * 1000:>10.2f} {sum(times) / len(times) * 1000:>10.2f} {plugins:>8}")
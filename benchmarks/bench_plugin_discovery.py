@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the plugin discovery time, entry-points lookup vs scan of sys.path.
+
+usage: python benchmarks/bench_plugin_discovery.py --repeat 20
+"""
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+import argparse
+import importlib
+import time
+
+
+def run(server, mode, repeat):
+    server.config.plugins.discovery = mode
+    times = []
+    for _ in range(repeat):
+        importlib.invalidate_caches()
+        start = time.perf_counter()
+        names = server.discover_plugins()
+        times.append(time.perf_counter() - start)
+    return min(times), sum(times) / len(times), names
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    server = Hunabku(ConfigGenerator.config)
+    print(f"{'discovery':>14} {'min (ms)':>10} {'mean (ms)':>10}  plugins")
+    for mode in ["entry_points", "scan"]:
+        best, mean, names = run(server, mode, args.repeat)
+        print(f"{mode:>14} {best * 1000:>10.2f} {mean * 1000:>10.2f}  {', '.join(names)}")
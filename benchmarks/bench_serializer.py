@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the json serialization of a response, the standard json module (with a default encoder)
+against the backends of hunabku.Serializer, the payload is a list of documents like the ones
+returned by MongoDB (strings, numbers, nested lists and datetimes).
+
+usage: python benchmarks/bench_serializer.py --documents 10000 --repeat 5
+"""
+from datetime import datetime, timedelta
+from hunabku.Serializer import Serializer
+import argparse
+import json
+import time
+
+
+def payload(documents):
+    start = datetime(2020, 1, 1)
+    return [{"_id": f"{i:024x}", "title": f"document {i}", "year": 2000 + i % 24, "score": i / 7,
+             "authors": [{"name": f"author {j}", "id": j} for j in range(5)],
+             "updated": start + timedelta(minutes=i)} for i in range(documents)]
+
+
+def measure(function, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(function(data))
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    data = payload(args.documents)
+    functions = [("json.dumps", lambda obj: json.dumps(obj, default=str).encode())]
+    for backend in ("json", "auto"):
+        serializer = Serializer(backend)
+        functions.append((f"Serializer({serializer.name}).dumpb", serializer.dumpb))
+    print(f"{'serializer':>28} {'best (ms)':>10} {'MB/s':>8}")
+    for name, function in functions:
+        seconds, size = measure(function, data, args.repeat)
+        print(f"{name:>28} {seconds * 1000:>10.1f} {size / seconds / 1e6:>8.1f}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark of requests/sec vs number of prefork workers on the template Hello endpoint.
+
+usage: python benchmarks/bench_serve_workers.py --workers 1 2 4 --duration 5 --clients 8
+"""
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+from hunabku.HunabkuBase import set_verbose
+from hunabku.Server import Server
+from hunabku import templates
+from multiprocessing import Pool
+import argparse
+import http.client
+import importlib.util
+import inspect
+import logging
+import os
+import pathlib
+import signal
+import sys
+import time
+
+HELLO = os.path.join(str(pathlib.Path(templates.__file__).parent.absolute()),
+                     "plugin", "HunabKu_template", "hunabku_template", "endpoints", "Hello.py")
+
+
+def load_hello(server):
+    """
+    Registers the endpoints of the template Hello plugin in the server app.
+    """
+    spec = importlib.util.spec_from_file_location("Hello", HELLO)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    for cname, plugin_class in inspect.getmembers(module, inspect.isclass):
+        if cname == "Hello":
+            plugin_class(server).register_endpoints()
+
+
+def client(args):
+    port, apikey, duration = args
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    count = 0
+    end = time.time() + duration
+    while time.time() < end:
+        conn.request("GET", f"/hello?apikey={apikey}")
+        res = conn.getresponse()
+        res.read()
+        if res.will_close:
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+        count += 1
+    conn.close()
+    return count
+
+
+def run(workers, duration, clients, keepalive):
+    set_verbose(False)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    config = ConfigGenerator.config
+    hunabku = Hunabku(config)
+    load_hello(hunabku)
+    server = Server(hunabku.app, "127.0.0.1", 0, workers=workers, keepalive=keepalive)
+    server.bind()
+    pid = os.fork()
+    if pid == 0:
+        server.serve_prefork()
+        os._exit(0)
+    time.sleep(0.5)
+    with Pool(clients) as pool:
+        counts = pool.map(client, [(server.port, config.apikey, duration)] * clients)
+    os.kill(pid, signal.SIGTERM)
+    os.waitpid(pid, 0)
+    server.socket.close()
+    return sum(counts) / duration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--keepalive", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'workers':>8} {'req/s':>10}")
+    for workers in args.workers:
+        print(f"{workers:>8} {run(workers, args.duration, args.clients, args.keepalive):>10.1f}")
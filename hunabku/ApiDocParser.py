@@ -0,0 +1,205 @@
+import inspect
+import re
+
+
+class ApiDocParser:
+    """
+    Parser for the apidoc (https://apidocjs.com) blocks in the docstrings of the endpoints.
+    It validates the syntax of the tags in process (without the apidoc binary) and it returns
+    the same structure of the api_data.json file generated by apidoc.
+
+    Supported tags: @api, @apiName, @apiGroup, @apiVersion, @apiDescription, @apiParam, @apiQuery,
+    @apiBody, @apiHeader, @apiSuccess, @apiError and the examples (@apiExample, @apiSuccessExample ...).
+    Other apidoc tags are accepted but ignored.
+
+    example:
+    parser = ApiDocParser()
+    blocks, errors = parser.parse(docstring, filename)
+    """
+    api = re.compile(r"^\{\s*([a-zA-Z]+)\s*\}\s+(\S+)(?:\s+(.*))?$")
+    field = re.compile(
+        r"^(?:\(\s*(?P<group>[^)]+?)\s*\)\s*)?"
+        r"(?:\{\s*(?P<type>[^{}\s]+?)\s*(?:\{\s*(?P<size>[^{}]+?)\s*\})?\s*(?:=\s*(?P<allowed>[^{}]+?))?\s*\}\s*)?"
+        r"(?P<optional>\[)?\s*(?P<field>[a-zA-Z0-9$:./\\_-]+(?:\[\])?)"
+        r"(?:\s*=\s*(?:\"(?P<dq>[^\"]*)\"|'(?P<sq>[^']*)'|(?P<default>[^\s\]]+)))?\s*(?(optional)\])"
+        r"(?:\s+(?P<description>.*))?$", re.S)
+    example = re.compile(r"^(?:\{\s*(?P<type>[^}]+?)\s*\}\s*)?(?P<title>[^\n]*)\n?(?P<content>.*)$", re.S)
+    fields_tags = {
+        "apiParam": ("parameter", "Parameter"),
+        "apiQuery": ("query", "Query"),
+        "apiBody": ("body", "Body"),
+        "apiHeader": ("header", "Header"),
+        "apiSuccess": ("success", "Success 200"),
+        "apiError": ("error", "Error 4xx"),
+    }
+    examples_tags = {
+        "apiExample": ("examples", None),
+        "apiParamExample": ("parameter", "examples"),
+        "apiHeaderExample": ("header", "examples"),
+        "apiSuccessExample": ("success", "examples"),
+        "apiErrorExample": ("error", "examples"),
+    }
+
+    def __init__(self, version: str = "0.0.0"):
+        """
+        Parameters:
+        ____________
+        version:str
+            default version for the blocks without @apiVersion
+        """
+        self.version = version
+
+    def tags(self, docstring: str) -> list:
+        """
+        Returns the list of (tag, content) in the docstring, the lines without tag
+        are appended to the content of the last tag.
+        """
+        tags = []
+        for line in inspect.cleandoc(docstring).splitlines():
+            stripped = line.strip()
+            if stripped.startswith("@"):
+                tag, _, content = stripped[1:].partition(" ")
+                tags.append([tag, content.strip()])
+            elif len(tags) > 0:
+                tags[-1][1] += "\n" + line.rstrip()
+        return [(tag, content.strip()) for tag, content in tags]
+
+    def paragraph(self, text: str) -> str:
+        text = text.strip()
+        if text == "":
+            return ""
+        return "".join(f"<p>{p.strip()}</p>" for p in re.split(r"\n\s*\n", text))
+
+    def parse_field(self, tag: str, content: str):
+        """
+        Returns the dictionary for a field tag (@apiParam, @apiSuccess ...) or None if the syntax is wrong.
+        """
+        match = self.field.match(content)
+        if match is None:
+            return None
+        values = match.groupdict()
+        block, group = self.fields_tags[tag]
+        field_type = values["type"]
+        field = {
+            "group": values["group"] or group,
+            "type": field_type or "",
+            "optional": values["optional"] is not None,
+            "field": values["field"],
+            "isArray": field_type is not None and field_type.endswith("[]"),
+            "description": self.paragraph(values["description"] or ""),
+        }
+        default = next((values[key] for key in ("dq", "sq", "default") if values[key] is not None), None)
+        if default is not None:
+            field["defaultValue"] = default
+        if values["size"] is not None:
+            field["size"] = values["size"]
+        if values["allowed"] is not None:
+            field["allowedValues"] = [value.strip() for value in values["allowed"].split(",")]
+        return field
+
+    def parse(self, docstring: str, filename: str = ""):
+        """
+        Parses the apidoc blocks in a docstring, every @api tag starts a new block.
+
+        Returns:
+        ___________
+        tuple: (list of blocks with the structure of api_data.json, list of error messages)
+        """
+        blocks = []
+        errors = []
+        if docstring is None or "@api" not in docstring:
+            return blocks, errors
+        block = None
+        for tag, content in self.tags(docstring):
+            if tag == "api":
+                match = self.api.match(content)
+                if match is None:
+                    errors.append(f"{filename}: @api {content} should be '@api {{method}} path [title]'")
+                    block = None
+                    continue
+                method, url, title = match.groups()
+                block = {"type": method.lower(), "url": url, "title": (title or "").strip(),
+                         "version": self.version, "filename": filename}
+                blocks.append(block)
+                continue
+            if not tag.startswith("api"):
+                continue
+            if block is None:
+                errors.append(f"{filename}: @{tag} found before @api")
+                continue
+            if tag in ("apiName", "apiGroup", "apiVersion"):
+                if content == "" or len(content.split()) != 1:
+                    errors.append(f"{filename}: @{tag} requires one word, found '{content}'")
+                    continue
+                block[tag[3:].lower()] = content
+            elif tag == "apiDescription":
+                block["description"] = self.paragraph(content)
+            elif tag in self.fields_tags:
+                field = self.parse_field(tag, content)
+                if field is None:
+                    errors.append(f"{filename}: @{tag} {content} should be '@{tag} [(group)] [{{type}}] field [description]'")
+                    continue
+                name, _ = self.fields_tags[tag]
+                block.setdefault(name, {}).setdefault("fields", {}).setdefault(field["group"], []).append(field)
+            elif tag in self.examples_tags:
+                match = self.example.match(content)
+                name, key = self.examples_tags[tag]
+                example = {"title": match.group("title").strip(), "content": match.group("content"),
+                           "type": match.group("type") or "json"}
+                if key is None:
+                    block.setdefault(name, []).append(example)
+                else:
+                    block.setdefault(name, {}).setdefault(key, []).append(example)
+        for block in blocks:
+            block.setdefault("name", block["title"].replace(" ", "_") or block["url"])
+            block.setdefault("group", "default")
+            block["groupTitle"] = block["group"]
+        return blocks, errors
+
+    def add_fields(self, blocks: list, fields: list):
+        """
+        Adds the parameters declared in @endpoint(..., params=...) to the blocks,
+        the parameters documented in the docstring with @apiParam or @apiQuery are kept.
+        """
+        if not fields:
+            return blocks
+        for block in blocks:
+            groups = block.setdefault("parameter", {}).setdefault("fields", {})
+            documented = {field["field"] for group in groups.values() for field in group}
+            documented |= {field["field"] for group in block.get("query", {}).get("fields", {}).values() for field in group}
+            for field in fields:
+                if field["field"] not in documented:
+                    groups.setdefault(field["group"], []).append(dict(field, description=self.paragraph(field["description"])))
+        return blocks
+
+    def parse_endpoints(self, endpoints: dict, files: list = None):
+        """
+        Parses the docstrings of the endpoints registered with @endpoint.
+
+        Parameters:
+        ____________
+        endpoints:dict
+            dictionary package name -> list of registers (see HunabkuPluginBase.get_global_endpoints)
+        files:list
+            only the endpoints declared in these files are parsed, all by default
+
+        Returns:
+        ___________
+        tuple: (list of blocks with the structure of api_data.json, list of error messages)
+        """
+        data = []
+        errors = []
+        found = set()
+        for package_name, registers in endpoints.items():
+            for register in registers:
+                key = (register['file'], register['class_name'], register['func_name'])
+                if key in found or (files is not None and register['file'] not in files):
+                    continue
+                found.add(key)
+                blocks, block_errors = self.parse(
+                    register.get('doc'), f"{register['file']} {register['class_name']}.{register['func_name']}")
+                self.add_fields(blocks, register.get('params'))
+                data += blocks
+                errors += block_errors
+        data.sort(key=lambda block: (block["group"], block["name"], block["version"]))
+        return data, errors
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+
+class ApiKeyStore:
+    """
+    Store of apikeys with scopes and revocation.
+    The keys are saved as sha256 hashes, a key is found by the hash of the key (dictionary lookup),
+    the secret itself is never compared nor saved.
+
+    The keys can be loaded from a json file, the file is reloaded when it changes
+    (the modification time is checked every reload_interval seconds), example:
+    {"keys": [{"name": "client1", "key": "secret", "scopes": ["*"]},
+              {"name": "client2", "hash": "<sha256 of the key>", "scopes": ["scienti"], "revoked": true}]}
+    """
+
+    def __init__(self, apikey: str = None, filename: str = None, reload_interval: float = 5, logger=None):
+        """
+        Parameters:
+        ____________
+        apikey:str
+            apikey with all the scopes (config.apikey)
+        filename:str
+            json file with the apikeys
+        reload_interval:float
+            seconds between checks of the file modification time
+        """
+        self.apikey = apikey
+        self.filename = filename
+        self.reload_interval = reload_interval
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.keys = {}
+        self.mtime = None
+        self.checked = 0
+        self.lock = threading.Lock()
+        self.reload()
+
+    @staticmethod
+    def hash(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _record(self, key_hash, scopes=("*",), name=None, revoked=False):
+        return {"hash": key_hash, "name": name, "scopes": frozenset(scopes), "revoked": revoked}
+
+    def add(self, key: str = None, scopes=("*",), name: str = None, key_hash: str = None, revoked: bool = False):
+        """
+        Adds a key (or the sha256 of the key) with its scopes.
+        """
+        key_hash = key_hash if key_hash is not None else self.hash(key)
+        with self.lock:
+            self.keys[key_hash] = self._record(key_hash, scopes, name, revoked)
+
+    def revoke(self, key: str = None, key_hash: str = None):
+        """
+        Revokes a key, the requests with the key are not authorized anymore.
+        """
+        key_hash = key_hash if key_hash is not None else self.hash(key)
+        with self.lock:
+            if key_hash in self.keys:
+                self.keys[key_hash] = dict(self.keys[key_hash], revoked=True)
+
+    def reload(self):
+        """
+        Loads the keys from the file (if any) and the config apikey, the keys added with add are discarded.
+        """
+        keys = {}
+        if self.apikey:
+            key_hash = self.hash(self.apikey)
+            keys[key_hash] = self._record(key_hash, name="config")
+        if self.filename:
+            try:
+                mtime = os.stat(self.filename).st_mtime_ns
+                with open(self.filename) as json_file:
+                    data = json.load(json_file)
+                for item in data.get("keys", []):
+                    key_hash = item["hash"] if "hash" in item else self.hash(item["key"])
+                    keys[key_hash] = self._record(key_hash, item.get("scopes", ["*"]), item.get("name"),
+                                                  item.get("revoked", False))
+                self.mtime = mtime
+            except (OSError, ValueError, KeyError, AttributeError) as e:
+                self.logger.error(f'------ERROR: loading apikeys file {self.filename}: {e}')
+                if self.mtime is not None:
+                    # keeping the keys loaded before
+                    return
+        with self.lock:
+            self.keys = keys
+
+    def maybe_reload(self):
+        """
+        Reloads the keys if the file changed, the file is checked at most every reload_interval seconds.
+        """
+        if not self.filename:
+            return
+        now = time.monotonic()
+        if now - self.checked < self.reload_interval:
+            return
+        self.checked = now
+        try:
+            mtime = os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self.mtime:
+            self.reload()
+
+    def lookup(self, key: str):
+        """
+        Returns the record of the key or None if the key is not in the store.
+        """
+        if not key:
+            return None
+        self.maybe_reload()
+        key_hash = self.hash(key)
+        return self.keys.get(key_hash)
+
+    def validate(self, key: str, scope: str = None) -> bool:
+        """
+        Returns True if the key is in the store, it is not revoked and it has the scope (if given).
+        """
+        record = self.lookup(key)
+        if record is None or record["revoked"]:
+            return False
+        if scope is None or "*" in record["scopes"]:
+            return True
+        return scope in record["scopes"]
@@ -0,0 +1,148 @@
+from flask import current_app, request
+from hunabku.HunabkuBase import HunabkuPluginBase
+import zlib
+
+
+class Compressor:
+    """
+    Compression of the responses of the server (after_request of the flask app), the encoding is
+    negotiated with the header Accept-Encoding of the client: br (brotli) and zstd if the packages
+    brotli and zstandard are installed, gzip otherwise.
+
+    The responses smaller than min_size bytes, the responses already encoded and the types that are
+    not text (images, files) are sent as they are. The streamed responses (self.stream_response)
+    are compressed chunk by chunk, every chunk is flushed so the client gets the data as it is produced.
+
+    The plugins can change the options for their endpoints in their config, ex:
+    config.compression += Param(level=9, doc="gzip level for the large responses of this plugin")
+    """
+    options = ("enabled", "min_size", "level", "brotli_quality", "zstd_level")
+    mimetypes = ("application/json", "application/x-ndjson", "application/javascript", "application/xml",
+                 "image/svg+xml", "text/")
+
+    def __init__(self, config):
+        """
+        Parameters:
+        ____________
+        config:Config
+            server config, the options are in config.compression
+        """
+        self.config = config
+        self.encoders = {"gzip": self.gzip}
+        try:
+            import brotli
+            self.brotli = brotli
+            self.encoders["br"] = self.br
+        except ImportError:
+            pass
+        try:
+            import zstandard
+            self.zstandard = zstandard
+            self.encoders["zstd"] = self.zstd
+        except ImportError:
+            pass
+        # preference of the server for the clients that accept several encodings with the same quality
+        self.encodings = [encoding for encoding in ("br", "zstd", "gzip") if encoding in self.encoders]
+        self.plugin_options = {}
+
+    def gzip(self, options):
+        encoder = zlib.compressobj(options["level"], zlib.DEFLATED, 31)
+        return encoder.compress, lambda: encoder.flush(zlib.Z_SYNC_FLUSH), encoder.flush
+
+    def br(self, options):
+        encoder = self.brotli.Compressor(quality=options["brotli_quality"])
+        return encoder.process, encoder.flush, encoder.finish
+
+    def zstd(self, options):
+        encoder = self.zstandard.ZstdCompressor(level=options["zstd_level"]).compressobj()
+        return (encoder.compress, lambda: encoder.flush(self.zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+                encoder.flush)
+
+    def compress(self, data: bytes, encoding: str, options: dict) -> bytes:
+        """
+        Returns the data compressed with the encoding (gzip, br or zstd).
+        """
+        compress, flush, finish = self.encoders[encoding](options)
+        return compress(data) + finish()
+
+    def stream(self, chunks, encoding: str, options: dict):
+        """
+        Compresses the chunks one by one, the iterable is closed if the client disconnects.
+        """
+        compress, flush, finish = self.encoders[encoding](options)
+        try:
+            for chunk in chunks:
+                data = compress(chunk.encode() if isinstance(chunk, str) else chunk) + flush()
+                if data:
+                    yield data
+            yield finish()
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def get_options(self, plugin=None) -> dict:
+        """
+        Returns the options of the server with the changes of the config of the plugin,
+        the result is saved until clear is called.
+        """
+        key = id(plugin) if plugin is not None else None
+        if key in self.plugin_options:
+            return self.plugin_options[key]
+        options = {option: self.config.compression.get(option) for option in self.options}
+        plugin_config = plugin.config.get("compression") if plugin is not None else None
+        if plugin_config is not None:
+            for option in self.options:
+                if plugin_config.get(option) is not None:
+                    options[option] = plugin_config.get(option)
+        self.plugin_options[key] = options
+        return options
+
+    def clear(self):
+        """
+        Removes the options saved for the plugins, call it if the config changes.
+        """
+        self.plugin_options = {}
+
+    def compressible(self, response) -> bool:
+        # the static files are compressed once (see hunabku.StaticFiles)
+        if request.endpoint == "static":
+            return False
+        mimetype = response.mimetype or ""
+        return response.status_code == 200 and "Content-Encoding" not in response.headers \
+            and not response.direct_passthrough and "no-transform" not in response.headers.get("Cache-Control", "") \
+            and any(mimetype.startswith(prefix) for prefix in self.mimetypes)
+
+    def after_request(self, response):
+        """
+        Compresses the response if the client accepts one of the encodings.
+        """
+        options = self.get_options(self.view_plugin(request.endpoint))
+        if not options["enabled"] or not self.compressible(response):
+            return response
+        streamed = response.is_streamed
+        if not streamed and response.content_length is not None and response.content_length < options["min_size"]:
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+        if streamed:
+            response.response = self.stream(response.response, encoding, options)
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(self.compress(response.get_data(), encoding, options))
+        response.headers["Content-Encoding"] = encoding
+        # the body changed, the etag is weak (it matches If-None-Match with the etag of the view)
+        etag, weak = response.get_etag()
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    @staticmethod
+    def view_plugin(endpoint: str):
+        """
+        Returns the plugin instance of the endpoint or None if it is not an endpoint of a plugin.
+        """
+        plugin = getattr(current_app.view_functions.get(endpoint), "__self__", None)
+        return plugin if isinstance(plugin, HunabkuPluginBase) else None
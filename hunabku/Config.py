@@ -1,7 +1,10 @@
 
+import importlib.machinery
+import importlib.util
 import sys
 import os
 import logging
+import types
 
 
 class Config:
@@ -57,14 +60,12 @@ class Config:
         if value is not None:
             return value
         else:
+            # the missing sections are created, the config files rely on it: config.a.b = x creates config.a
             self.__dict__[key] = Config()
             return self.__dict__[key]
 
     def keys(self):
-        _keys = list(self.__dict__.keys())
-        _keys.remove("__docs__")
-        _keys.remove("__fromparam__")
-        return _keys
+        return [key for key in self.__dict__ if key != "__docs__" and key != "__fromparam__"]
 
     def __getitem__(self, key: str):
         return self.__dict__[key]
@@ -78,13 +79,13 @@ class Config:
     def _update(self, preconfig, config):
         for key in config.keys():
             if isinstance(config[key], Config):
-                if key not in preconfig.keys():
+                if key not in preconfig.__dict__:
                     preconfig[key] = config[key]
                 preconfig[key] = self._update(preconfig[key], config[key])
             else:
                 preconfig[key] = config[key]
                 if key in config.__docs__:
-                    preconfig.__docs__ = config.__docs__[key]
+                    preconfig.__docs__[key] = config.__docs__[key]
         return preconfig
 
     def update(self, config):
@@ -147,6 +148,135 @@ class Config:
     def dict(self):
         return self._dict(self)
 
+    def freeze(self):
+        """
+        Returns a read only snapshot of the config (see FrozenConfig),
+        the changes in this config after the call are not in the snapshot.
+        """
+        values = {}
+        flat = {}
+        for key in self.keys():
+            value = self[key]
+            if isinstance(value, Config):
+                value = value.freeze()
+                for path, subvalue in value._flat.items():
+                    flat[f"{key}.{path}"] = subvalue
+            elif isinstance(value, list):
+                value = tuple(value)
+            elif isinstance(value, set):
+                value = frozenset(value)
+            values[key] = value
+            flat[key] = value
+        return FrozenConfig(values, dict(self.__docs__), flat)
+
+
+class FrozenConfig:
+    """
+    Read only snapshot of a Config created with Config.freeze(), used by the plugins at request time.
+    The values are in the __dict__ of the instance (config.a.b is an attribute lookup without calls
+    to __getattr__) and the dotted paths are flattened for config.lookup("a.b"). A missing key returns
+    an empty FrozenConfig (shared, nothing is created) as the Config class does, but the snapshot
+    can not be changed (TypeError).
+
+    The __slots__ do not remove the __dict__ (the values are there for the fast attribute lookup),
+    they keep the docs and the flattened paths out of it, so they are never confused with config keys
+    (keys(), iteration and config.a.b only see the values).
+    """
+    __slots__ = ("__dict__", "_docs", "_flat")
+
+    def __init__(self, values: dict = None, docs: dict = None, flat: dict = None):
+        values = values if values is not None else {}
+        self.__dict__.update(values)
+        object.__setattr__(self, "_docs", types.MappingProxyType(docs if docs is not None else {}))
+        object.__setattr__(self, "_flat", flat if flat is not None else dict(values))
+
+    def __getattr__(self, key: str):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        return EMPTY_CONFIG
+
+    def __setattr__(self, key, value):
+        raise TypeError("FrozenConfig is read only, change the Config and call freeze again")
+
+    def __delattr__(self, key):
+        raise TypeError("FrozenConfig is read only, change the Config and call freeze again")
+
+    def __setitem__(self, key, value):
+        raise TypeError("FrozenConfig is read only, change the Config and call freeze again")
+
+    def __getitem__(self, key: str):
+        return self.__dict__[key]
+
+    def __contains__(self, key: str):
+        return key in self.__dict__
+
+    def __iter__(self):
+        return iter(self.__dict__)
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenConfig):
+            return self.__dict__ == other.__dict__
+        return NotImplemented
+
+    def __hash__(self):
+        return id(self)
+
+    def __repr__(self):
+        return f"FrozenConfig({self.__dict__})"
+
+    def keys(self):
+        return list(self.__dict__)
+
+    def get(self, key: str, default=None) -> any:
+        return self.__dict__.get(key, default)
+
+    def lookup(self, path: str, default=None) -> any:
+        """
+        Returns the value for a dotted path ex: config.lookup("apikeys.header")
+        """
+        return self._flat.get(path, default)
+
+    def update(self, config):
+        raise TypeError("FrozenConfig is read only, change the Config and call freeze again")
+
+    def diff(self, other) -> list:
+        """
+        Returns the sorted dotted paths of the values that are different (changed, added or removed) in other.
+        """
+        changes = []
+        for path in self._flat.keys() | other._flat.keys():
+            old = self._flat.get(path, _MISSING)
+            new = other._flat.get(path, _MISSING)
+            # the values inside the subtrees are compared one by one
+            subtrees = (old is _MISSING or isinstance(old, FrozenConfig)) and \
+                (new is _MISSING or isinstance(new, FrozenConfig))
+            if not subtrees and old != new:
+                changes.append(path)
+        return sorted(changes)
+
+    def thaw(self) -> Config:
+        """
+        Returns a new Config (mutable) with the values and docs of the snapshot.
+        """
+        config = Config()
+        for key, value in self.__dict__.items():
+            if isinstance(value, FrozenConfig):
+                value = value.thaw()
+            elif isinstance(value, tuple):
+                value = list(value)
+            elif isinstance(value, frozenset):
+                value = set(value)
+            config[key] = value
+        config.__docs__.update(self._docs)
+        return config
+
+    def dict(self):
+        return self.thaw().dict()
+
+
+EMPTY_CONFIG = FrozenConfig()
+_MISSING = object()
+
 
 class Param:
     def __new__(cls, **kwargs):
@@ -205,11 +335,169 @@ class ConfigGenerator:
                     doc="Apikey for authentication."
                     )
 
+    config.db += Param(url="mongodb://localhost:27017/",
+                       doc="MongoDB url of the client shared by the plugins (self.db).")
+    config.db += Param(name="",
+                       doc="Default database for self.db.database.")
+    config.db += Param(max_pool_size=100,
+                       doc="Max number of MongoDB connections per worker process.")
+    config.db += Param(min_pool_size=0,
+                       doc="Number of MongoDB connections kept open per worker process.")
+    config.db += Param(max_idle_time=0,
+                       doc="Seconds before an idle connection is closed, 0 keeps them open.")
+    config.db += Param(wait_queue_timeout=0,
+                       doc="Seconds to wait for a free connection when the pool is full, 0 waits forever.")
+    config.db += Param(connect_timeout=20,
+                       doc="Seconds to wait to open a connection.")
+
+    config.apikeys += Param(file="",
+                            doc="json file with apikeys, scopes and revoked keys, the file is reloaded when it changes\n"
+                                "ex: {\"keys\": [{\"name\": \"client\", \"key\": \"secret\", \"scopes\": [\"*\"]}]}\n"
+                                "the key can be saved as sha256 with \"hash\" instead of \"key\".")
+    config.apikeys += Param(header="X-API-Key",
+                            doc="HTTP header with the apikey, it is checked before the apikey parameter.")
+    config.apikeys += Param(reload_interval=5,
+                            doc="Seconds between checks of changes in the apikeys file.")
+
+    config.ratelimit += Param(enabled=False,
+                              doc="Limits the requests per apikey (or client ip without a valid apikey) and endpoint,\n"
+                                  "the options can be changed for every plugin class in the plugin config.")
+    config.ratelimit += Param(rate=60,
+                              doc="Number of requests allowed in ratelimit.period seconds.")
+    config.ratelimit += Param(period=60,
+                              doc="Period in seconds for ratelimit.rate.")
+    config.ratelimit += Param(burst=0,
+                              doc="Number of requests allowed at once, 0 uses ratelimit.rate (memory backend only).")
+    config.ratelimit += Param(backend="memory",
+                              doc="Backend for the counters: memory (every worker process has its own counters),\n"
+                                  "mongodb (shared by all the workers) or module:Class with a RateLimitBackend.")
+    config.ratelimit += Param(mongodb_url="",
+                              doc="MongoDB url for the mongodb backend, empty uses the shared client of config.db.")
+    config.ratelimit += Param(mongodb_db="hunabku",
+                              doc="MongoDB database for the mongodb backend.")
+
+    config.cache += Param(enabled=True,
+                          doc="Enables the cache of the endpoints declared with @endpoint(..., cache=ttl).")
+    config.cache += Param(backend="memory",
+                          doc="Backend for the cached responses: memory (LRU in every worker process),\n"
+                              "mongodb (shared by all the workers) or module:Class with a ResponseCacheBackend.")
+    config.cache += Param(max_entries=1024,
+                          doc="Max number of responses in the memory backend.")
+    config.cache += Param(mongodb_url="",
+                          doc="MongoDB url for the mongodb backend, empty uses the shared client of config.db.")
+    config.cache += Param(mongodb_db="hunabku",
+                          doc="MongoDB database for the mongodb backend.")
+
+    config.compression += Param(enabled=True,
+                                doc="Compresses the responses (gzip, br or zstd negotiated with Accept-Encoding),\n"
+                                    "br and zstd require brotli and zstandard (pip install hunabku[compression]).")
+    config.compression += Param(min_size=1024,
+                                doc="Responses smaller than min_size bytes are not compressed.")
+    config.compression += Param(level=6,
+                                doc="gzip level (1 fast to 9 small),\n"
+                                    "the plugins can change the levels in their config.compression")
+    config.compression += Param(brotli_quality=4,
+                                doc="brotli quality (0 fast to 11 small)")
+    config.compression += Param(zstd_level=3,
+                                doc="zstd level (1 fast to 22 small)")
+
+    config.metrics += Param(enabled=True,
+                            doc="Records the latency, status and size of the responses of the endpoints,\n"
+                                "they are published in /metrics (Prometheus text format, apikey with metrics.scope required).")
+    config.metrics += Param(scope="metrics",
+                            doc="Scope of the apikeys allowed to read /metrics (ex: the key of the Prometheus scraper).")
+    config.metrics += Param(buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+                            doc="Upper bounds in seconds of the latency histogram buckets.")
+    config.metrics += Param(dir="",
+                            doc="Directory shared by the workers to save their metrics (prefork mode),\n"
+                                "empty keeps the metrics only in the memory of every worker.")
+    config.metrics += Param(flush_interval=5,
+                            doc="Seconds between the saves of the metrics of a worker in metrics.dir.")
+
+    config.profiling += Param(enabled=False,
+                              doc="Profiles the requests of the endpoints with a sampling profiler,\n"
+                                  "the profiles are listed in /profiles (apikey with profiling.scope required).")
+    config.profiling += Param(scope="admin",
+                              doc="Scope of the apikeys allowed to read /profiles (the stacks show the code and data).")
+    config.profiling += Param(threshold=1.0,
+                              doc="The requests slower than threshold seconds are saved, 0 to disable.")
+    config.profiling += Param(sample_rate=0.0,
+                              doc="Fraction of the requests of profiling.routes that are saved (0 to 1).")
+    config.profiling += Param(routes=[],
+                              doc="Paths of the endpoints (as in @endpoint) for the random sample, empty for all.")
+    config.profiling += Param(dir="hunabku_profiles",
+                              doc="Directory for the profiles (folded stacks for flamegraph.pl or speedscope).")
+    config.profiling += Param(max_files=100,
+                              doc="Max number of profiles, the oldest are removed.")
+    config.profiling += Param(max_bytes=50 * 1024 * 1024,
+                              doc="Max size in bytes of the profiles, the oldest are removed.")
+    config.profiling += Param(interval=0.005,
+                              doc="Seconds between the samples of the stacks.")
+
+    config.jobs += Param(pool="thread",
+                         doc="Pool for the background jobs of the plugins: thread or process.")
+    config.jobs += Param(workers=4,
+                         doc="Number of threads or processes for the jobs (per worker process).")
+    config.jobs += Param(result_ttl=3600,
+                         doc="Seconds to keep the result of a finished job.")
+    config.jobs += Param(max_jobs=1000,
+                         doc="Max number of jobs in the memory store, the oldest are removed.")
+    config.jobs += Param(store="memory",
+                         doc="Store for the status and results: memory (every worker process has its own jobs,\n"
+                             "use it only with one worker), mongodb (shared by all the workers) or module:Class.")
+    config.jobs += Param(mongodb_url="",
+                         doc="MongoDB url for the mongodb store, empty uses the shared client of config.db.")
+    config.jobs += Param(mongodb_db="hunabku",
+                         doc="MongoDB database for the mongodb store.")
+
+    config.pagination += Param(secret="",
+                               doc="Secret to sign the pagination cursors, empty uses a random secret for every run\n"
+                                   "of the server (the cursors expire on restart, set it if several servers share clients).")
+    config.pagination += Param(default_page_size=100,
+                               doc="Number of documents per page if the client does not send page_size.")
+    config.pagination += Param(max_page_size=1000,
+                               doc="Max page_size allowed.")
+
+    config.serializer += Param(backend="auto",
+                               doc="JSON serializer for the plugins (self.json): auto (orjson if it is installed),\n"
+                                   "orjson, json or module:Class with dumps(obj, default) -> bytes and loads(data).")
+
     config += Param(plugin_prefix="hunabku",
                     doc="Hunabku search the plugins using the prefix hunabku,"
                         "but if you want to personalize your own server you can change the prefix"
                     )
 
+    config.server += Param(mode="dev",
+                           doc="Server mode: dev (flask development server with debugger and reloader),\n"
+                               "threaded (one multithreaded process) or prefork (N forked worker processes).")
+    config.server += Param(workers=os.cpu_count() or 1,
+                           doc="Number of worker processes in prefork mode.")
+    config.server += Param(backlog=128,
+                           doc="Size of the queue of pending connections in the listening socket.")
+    config.server += Param(keepalive=5,
+                           doc="Seconds to keep idle HTTP/1.1 connections open, 0 disables keep-alive.")
+    config.server += Param(async_timeout=60,
+                           doc="Max seconds for the async endpoints (async def), 0 waits forever.")
+    config.server += Param(reload_interval=0,
+                           doc="Seconds between checks of the modification time of the config file (--config),\n"
+                               "the changes are applied without restarting the workers, 0 disables the check\n"
+                               "(the config is also reloaded with the signal SIGHUP).")
+
+    config.plugins += Param(discovery="auto",
+                            doc="How the plugins are found: entry_points (group hunabku.plugins in the plugin's setup.py),\n"
+                                "scan (every module in sys.path with the prefix hunabku_) or\n"
+                                "auto (entry_points, scan is used if there are not plugins registered as entry-points).")
+
+    config.plugins += Param(cache=True,
+                            doc="Saves the plugin classes and endpoints found in every plugin module in a cache file,\n"
+                                "the modules that did not change are not introspected again in the next start.")
+    config.plugins += Param(cache_file=".hunabku_plugins_cache.json",
+                            doc="Cache file for the plugins, use hunabku_server --rebuild-plugin-cache to rebuild it.")
+
+    config.plugins += Param(load_workers=1,
+                            doc="Number of threads to import the plugin modules concurrently, 1 imports them sequentially.\n"
+                                "The endpoints are always registered in the same order after all the imports.")
+
     config.apidoc += Param(apidoc_dir='hunabku_website',
                            doc="apidocs output directoy"
                            )
@@ -219,6 +507,25 @@ class ConfigGenerator:
     config.apidoc += Param(show_port=True,
                            doc="apidocs output show port of the server"
                            )
+    config.apidoc += Param(static_cache=True,
+                           doc="Serves the apidoc site from memory, the files are fingerprinted and compressed\n"
+                               "(gzip and brotli) once after the docs are generated.")
+    config.apidoc += Param(background=True,
+                           doc="Generates the apidocs in background after the server starts,\n"
+                               "the last generated docs are served until the new ones are ready.")
+    config.apidoc += Param(build_timeout=120,
+                           doc="Seconds to wait for the apidocs build, the last docs are kept if it takes longer.")
+
+    @staticmethod
+    def load_config(filename: str) -> Config:
+        """
+        Executes the python config file and returns its instance of Config called config.
+        """
+        loader = importlib.machinery.SourceFileLoader('config', filename)
+        spec = importlib.util.spec_from_loader(loader.name, loader)
+        module = importlib.util.module_from_spec(spec)
+        loader.exec_module(module)
+        return module.config
 
     def generate_config(self, output_file, hunabku, overwrite):
         if len(hunabku.plugins) == 0:
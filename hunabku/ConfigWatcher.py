@@ -0,0 +1,62 @@
+import logging
+import os
+import threading
+
+
+class ConfigWatcher:
+    """
+    Watches the config file in a daemon thread, the modification time of the file is checked
+    every interval seconds and callback is called when it changes (see Hunabku.reload_config).
+    """
+
+    def __init__(self, filename: str, callback, interval: float = 2, logger=None):
+        """
+        Parameters:
+        ____________
+        filename:str
+            python config file
+        callback:function
+            function without arguments called when the file changes
+        interval:float
+            seconds between checks of the file modification time
+        """
+        self.filename = filename
+        self.callback = callback
+        self.interval = interval
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.mtime = self.modified()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def modified(self):
+        try:
+            return os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """
+        Calls callback if the file changed since the last check, returns True if it changed.
+        """
+        mtime = self.modified()
+        if mtime is None or mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        self.callback()
+        return True
+
+    def _watch(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f'------ERROR: reloading config file {self.filename}: {e}')
+
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._watch, name="hunabku-config-watcher", daemon=True)
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,184 @@
+import importlib
+import logging
+import os
+import threading
+
+
+class Database:
+    """
+    MongoDB client shared by all the plugins of the server (self.db in the plugins),
+    every worker process has one pool of connections with the size in config.db.
+
+    The client is created the first time that it is used in a process, if the server forks
+    (prefork mode) the workers create their own client, the client of the master is not used
+    after the fork.
+
+    example:
+    collection = self.db["colav"]["works"]
+    collection = self.db.database["works"]  # database config.db.name
+    """
+
+    def __init__(self, url: str = "mongodb://localhost:27017/", name: str = None, max_pool_size: int = 100,
+                 min_pool_size: int = 0, max_idle_time: float = 0, wait_queue_timeout: float = 0,
+                 connect_timeout: float = 20, logger=None):
+        """
+        Parameters:
+        ____________
+        url:str
+            MongoDB url
+        name:str
+            default database
+        max_pool_size:int
+            max number of connections per worker process
+        min_pool_size:int
+            number of connections kept open per worker process
+        max_idle_time:float
+            seconds before an idle connection is closed, 0 keeps them open
+        wait_queue_timeout:float
+            seconds to wait for a free connection when the pool is full, 0 waits forever
+        connect_timeout:float
+            seconds to wait to open a connection
+        """
+        self.url = url
+        self.name = name
+        self.options = {"maxPoolSize": max_pool_size, "minPoolSize": min_pool_size,
+                        "connectTimeoutMS": int(connect_timeout * 1000)}
+        if max_idle_time:
+            self.options["maxIdleTimeMS"] = int(max_idle_time * 1000)
+        if wait_queue_timeout:
+            self.options["waitQueueTimeoutMS"] = int(wait_queue_timeout * 1000)
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.lock = threading.Lock()
+        self.counters_lock = threading.Lock()
+        self.pid = None
+        self._client = None
+        self.counters = {}
+        self.ttl_indexes = set()
+
+    @classmethod
+    def from_config(cls, config, logger=None):
+        """
+        Returns the Database for the options in config.db
+        """
+        return cls(config.url, config.name, config.max_pool_size, config.min_pool_size, config.max_idle_time,
+                   config.wait_queue_timeout, config.connect_timeout, logger)
+
+    def _listener(self):
+        from pymongo import monitoring
+        counters = self.counters
+        lock = self.counters_lock
+
+        def count(name):
+            def event(listener, event):
+                with lock:
+                    counters[name] = counters.get(name, 0) + 1
+            return event
+        events = {
+            "pool_created": count("pools_created"),
+            "pool_ready": count("pools_ready"),
+            "pool_cleared": count("pools_cleared"),
+            "pool_closed": count("pools_closed"),
+            "connection_created": count("connections_created"),
+            "connection_ready": count("connections_ready"),
+            "connection_closed": count("connections_closed"),
+            "connection_check_out_started": count("checkouts_started"),
+            "connection_check_out_failed": count("checkouts_failed"),
+            "connection_checked_out": count("checked_out"),
+            "connection_checked_in": count("checked_in"),
+        }
+        return type("HunabkuPoolListener", (monitoring.ConnectionPoolListener,), events)()
+
+    @property
+    def client(self):
+        """
+        Returns the MongoClient of the current process.
+        """
+        pid = os.getpid()
+        if self._client is None or self.pid != pid:
+            with self.lock:
+                if self._client is None or self.pid != pid:
+                    from pymongo import MongoClient
+                    self.counters.clear()
+                    self.ttl_indexes = set()
+                    self._client = MongoClient(self.url, event_listeners=[self._listener()], **self.options)
+                    self.pid = pid
+                    self.logger.debug(f'------ MongoDB client created for process {pid} {self.options}')
+        return self._client
+
+    @property
+    def database(self):
+        """
+        Returns the database config.db.name (or the database in the url if the name is empty)
+        """
+        if not self.name:
+            return self.client.get_default_database()
+        return self.client[self.name]
+
+    def __getitem__(self, name: str):
+        return self.client[name]
+
+    def ttl_collection(self, db: str, collection: str):
+        """
+        Returns the collection with a TTL index in the field expire (the documents are removed
+        by MongoDB after the date in expire), the index is created once per process.
+        """
+        collection = self.client[db][collection]
+        key = (db, collection.name)
+        if key not in self.ttl_indexes:
+            collection.create_index("expire", expireAfterSeconds=0)
+            self.ttl_indexes.add(key)
+        return collection
+
+    @classmethod
+    def make_backend(cls, config, database, memory, mongodb, name: str = None):
+        """
+        Returns the backend for the name in config.backend (memory, mongodb or module:Class),
+        used by the rate limiter, the response cache and the jobs store.
+
+        Parameters:
+        ____________
+        config:Config
+            options of the backend (config.ratelimit, config.cache or config.jobs)
+        database:Database
+            shared MongoDB client, the mongodb backend uses a new client if config.mongodb_url is not empty
+        memory:callable
+            returns the memory backend
+        mongodb:class
+            mongodb backend, it is created with (database, config.mongodb_db)
+        name:str
+            name of the backend, config.backend by default
+        """
+        name = name if name is not None else config.backend
+        if name == "memory":
+            return memory()
+        if name == "mongodb":
+            if config.mongodb_url:
+                database = cls(config.mongodb_url)
+            return mongodb(database, config.mongodb_db)
+        module_name, _, class_name = name.partition(":")
+        if not class_name:
+            raise ValueError(f"unknown backend {name}, the options are memory, mongodb or module:Class")
+        return getattr(importlib.import_module(module_name), class_name)()
+
+    def stats(self) -> dict:
+        """
+        Returns the statistics of the connection pool of the current process.
+        """
+        with self.counters_lock:
+            counters = dict(self.counters)
+        stats = {"pid": os.getpid(), "connected": self._client is not None and self.pid == os.getpid(),
+                 "max_pool_size": self.options["maxPoolSize"], "min_pool_size": self.options["minPoolSize"]}
+        stats.update(counters)
+        stats["connections_open"] = counters.get("connections_created", 0) - counters.get("connections_closed", 0)
+        stats["connections_in_use"] = counters.get("checked_out", 0) - counters.get("checked_in", 0)
+        return stats
+
+    def close(self):
+        """
+        Closes the client of the current process.
+        """
+        with self.lock:
+            if self._client is not None and self.pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self.pid = None
@@ -0,0 +1,86 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+
+
+class EventLoop:
+    """
+    asyncio event loop of the worker process for the async endpoints (async def with @endpoint).
+    The loop runs in a daemon thread, the request threads submit the coroutines to the loop and wait
+    for the result, so the awaits of all the requests of the worker run concurrently in the same loop.
+
+    The loop is created the first time it is used in a process, in prefork mode every worker has its own loop.
+    The coroutines should not call blocking functions, they block the loop for all the requests of the worker.
+    """
+
+    def __init__(self, timeout: float = 60):
+        """
+        Parameters:
+        ____________
+        timeout:float
+            max seconds to wait for a coroutine, 0 waits forever
+        """
+        self.timeout = timeout if timeout else None
+        self.lock = threading.Lock()
+        self.pid = None
+        self.loop = None
+        self.thread = None
+
+    def get_loop(self):
+        """
+        Returns the event loop of the current process, it is started if it is not running.
+        """
+        pid = os.getpid()
+        if self.loop is None or self.pid != pid:
+            with self.lock:
+                if self.loop is None or self.pid != pid:
+                    loop = asyncio.new_event_loop()
+                    self.thread = threading.Thread(target=loop.run_forever, name="hunabku-event-loop", daemon=True)
+                    self.thread.start()
+                    self.loop = loop
+                    self.pid = pid
+        return self.loop
+
+    def run(self, coroutine):
+        """
+        Runs the coroutine in the loop and returns the result, the context of the caller
+        (ex: the flask request) is available in the coroutine.
+        TimeoutError is raised (and the coroutine is cancelled) if it takes more than timeout seconds.
+        """
+        loop = self.get_loop()
+        result = concurrent.futures.Future()
+        tasks = []
+
+        def done(task):
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+
+        def start():
+            # the task copies the context of this callback (the context of the request thread)
+            task = loop.create_task(coroutine)
+            task.add_done_callback(done)
+            tasks.append(task)
+        loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+        try:
+            return result.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            loop.call_soon_threadsafe(lambda: [task.cancel() for task in tasks])
+            raise TimeoutError(f"the async endpoint did not finish in {self.timeout} seconds")
+
+    def stop(self):
+        """
+        Stops the loop of the current process.
+        """
+        with self.lock:
+            if self.loop is not None and self.pid == os.getpid():
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self.thread.join()
+                self.loop.close()
+            self.loop = None
+            self.pid = None
@@ -1,5 +1,6 @@
 from flask import (
-    Flask
+    Flask,
+    request
 )
 
 import logging
@@ -7,8 +8,27 @@ import logging
 import os
 from hunabku.HunabkuBase import HunabkuPluginBase
 from hunabku.Config import ConfigGenerator, Config
+from hunabku.Server import Server
+from hunabku.PluginCache import PluginCache
+from hunabku.RouteIndex import RouteIndex
 from hunabku._version import get_version
+from hunabku.ApiDocParser import ApiDocParser
+from hunabku.OpenApi import OpenApi
+from hunabku.ApiKeys import ApiKeyStore
+from hunabku.RateLimit import RateLimiter
+from hunabku.ResponseCache import ResponseCache
+from hunabku.Compression import Compressor
+from hunabku.StaticFiles import StaticFiles
+from hunabku.Serializer import Serializer
+from hunabku.Database import Database
+from hunabku.Pagination import Paginator
+from hunabku.EventLoop import EventLoop
+from hunabku.Jobs import JobQueue
+from hunabku.Metrics import Metrics
+from hunabku.Profiler import Profiler
+from hunabku.ConfigWatcher import ConfigWatcher
 from shutil import rmtree
+import shutil
 from distutils.dir_util import copy_tree
 import subprocess
 import inspect
@@ -17,7 +37,14 @@ import time
 import pathlib
 import sys
 import importlib
+import importlib.metadata
 import json
+import hashlib
+import secrets
+import threading
+import signal
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 import pkgutil
 
@@ -34,18 +61,25 @@ class Hunabku:
     """
     config = ConfigGenerator.config
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, config_file: str = None):
         """
         Contructor to initialize configuration options.
 
         Args:
+            config_file (str): python file of the config, it is executed again in reload_config
             apikey: apikey to access the data
             ip (str): ip to start the server
             port (int): port for the server
             info_level (logging.DEBUG/INFO etc..): enable/disable debug mode with extra messages output.
         """
+        # defaults of the server options, the reloaded config files are applied on top of them
+        self.default_config = self.config.freeze()
         self.config.update(config)
+        self.config_file = config_file
+        self.reload_lock = threading.Lock()
+        self.config_watcher = None
         self.plugin_prefix = "hunabku"
+        self.plugin_entry_point_group = "hunabku.plugins"
         self.apidoc_dir = self.config.apidoc.apidoc_dir
         self.apidoc_static_dir = self.apidoc_dir + '/static'
         self.apidoc_output_dir = self.apidoc_dir + '/static/apidoc'
@@ -74,13 +108,60 @@ class Hunabku:
         self.pkg_templates_dir = str(
             pathlib.Path(__file__).parent.absolute()) + '/templates/'
         self.plugins = []
+        self.frozen_config = None
+        self.plugin_errors = []
+        self.route_index = RouteIndex()
+        self.endpoints = {}
+        self.doc_thread = None
+        self.apidoc_parser = ApiDocParser()
+        self.apidoc_errors = []
+        self.apidoc_data = []
+        self.apidoc_data_json = b'[]'
+        self.plugin_cache = PluginCache(self.config.plugins.cache_file, self.config.plugins.cache)
         self.logger = logging.getLogger(__name__)
         self.set_info_level(config["info_level"])
+        self.apikeys = ApiKeyStore(self.config.apikey, self.config.apikeys.file,
+                                   self.config.apikeys.reload_interval, self.logger)
+        self.db = Database.from_config(self.config.db, self.logger)
+        self.loop = EventLoop(self.config.server.async_timeout)
+        self.jobs = JobQueue(self.config.jobs, self.db, self.logger)
+        self.metrics = None
+        if self.config.metrics.enabled:
+            self.metrics = Metrics(self.config.metrics.buckets, self.config.metrics.dir,
+                                   self.config.metrics.flush_interval, self.logger)
+        self.profiler = None
+        if self.config.profiling.enabled:
+            profiling = self.config.profiling
+            self.profiler = Profiler(profiling.dir, profiling.threshold, profiling.sample_rate, profiling.routes,
+                                     profiling.max_files, profiling.max_bytes, profiling.interval, self.logger)
+        self.ratelimiter = RateLimiter(self.config, database=self.db)
+        self.cache = ResponseCache(self.config, database=self.db)
+        self.compressor = Compressor(self.config)
+        self.static = None
+        if self.config.apidoc.static_cache:
+            self.static = StaticFiles(self.apidoc_static_dir, logger=self.logger)
+        # the random secret is created before the fork, all the workers of the server share it
+        self.paginator = Paginator(
+            self.config.pagination.secret or secrets.token_hex(32),
+            self.config.pagination.default_page_size, self.config.pagination.max_page_size)
+        self.serializer = Serializer(self.config.serializer.backend)
         self.app = Flask(
             "Hunabku",
             static_folder=self.apidoc_static_dir,
             static_url_path='/',
             template_folder=self.apidoc_templates_dir)
+        self.app.after_request(self.compressor.after_request)
+        # the files of the apidoc site are served from memory (see update_static)
+        self.app.view_functions['static'] = self.static_endpoint
+        self.app.add_url_rule('/apidoc/api_data.json', 'hunabku.apidoc_data', self.apidoc_data_endpoint)
+        self.openapi = OpenApi("Hunabku", get_version(), self.apidoc_config_data['url'], self.config.apikeys.header)
+        self.app.add_url_rule('/openapi.json', 'hunabku.openapi', self.openapi_endpoint)
+        self.app.add_url_rule('/jobs/<job_id>', 'hunabku.jobs', self.jobs_endpoint)
+        if self.metrics is not None:
+            self.app.add_url_rule('/metrics', 'hunabku.metrics', self.metrics_endpoint)
+        if self.profiler is not None:
+            self.app.add_url_rule('/profiles', 'hunabku.profiles', self.profiles_endpoint)
+            self.app.add_url_rule('/profiles/<name>', 'hunabku.profile', self.profiles_endpoint)
 
     def apidoc_setup(self):
         """
@@ -166,109 +247,533 @@ class Hunabku:
                 filename=self.config["log_file"], level=info_level)
         self.config["info_level"] = info_level
 
+    def discover_plugins(self):
+        """
+        Returns the names of the plugin packages without importing them.
+        The plugins are found in the entry-point group hunabku.plugins (declared in the plugin's setup.py),
+        if there are not plugins registered there, all the modules in sys.path with the prefix
+        hunabku_ are scanned (old plugins without entry-point).
+        The behaviour can be changed with config.plugins.discovery (auto, entry_points or scan).
+        In auto mode the hunabku_ packages without entry-point are not loaded if other plugins
+        have entry-points, a warning is logged for every one of them.
+        """
+        mode = self.config.plugins.discovery
+        names = []
+        if mode in ("auto", "entry_points"):
+            names = [entry_point.value.split(":")[0].strip()
+                     for entry_point in self._entry_points(self.plugin_entry_point_group)]
+        if mode == "scan" or (mode == "auto" and len(names) == 0):
+            names = self._scan_plugins()
+            if mode == "auto":
+                self.logger.warning('------ Plugins discovered scanning the hunabku_ packages (no entry-points found)')
+        elif mode == "auto":
+            self.logger.warning(f'------ Plugins discovered with the entry-point group {self.plugin_entry_point_group}')
+            for name in self._scan_plugins():
+                if name not in names:
+                    self.logger.warning(
+                        f'------ WARNING: package {name} is not loaded, it has not entry-point in the group '
+                        f'{self.plugin_entry_point_group} (add it in its setup.py or set config.plugins.discovery="scan")')
+        return list(dict.fromkeys(names))
+
+    def _scan_plugins(self):
+        return [name for finder, name, ispkg in pkgutil.iter_modules() if name.startswith(self.plugin_prefix + '_')]
+
+    def _entry_points(self, group):
+        entry_points = importlib.metadata.entry_points()
+        if hasattr(entry_points, "select"):
+            return entry_points.select(group=group)
+        # python < 3.10 returns a dict
+        return entry_points.get(group, [])
+
     def load_plugins(self, verbose=True):
         """
         This method return the plugins found in the folder plugins.
+        The plugin classes found in every module are saved in the plugin cache (config.plugins.cache_file),
+        the modules that did not change since the last load are not introspected again
+        and the modules without plugin classes are not imported.
+
+        If config.plugins.load_workers is greater than 1 the plugin modules are imported concurrently,
+        the endpoints are always registered after the imports in the same order (package, module, class).
+        A plugin that fails to import or to register is reported in self.plugin_errors
+        and the other plugins are loaded.
         """
         if verbose:
             self.logger.warning('-----------------------')
             self.logger.warning('------ Loading Plugins:')
-        discovered_plugins = {
-            name: importlib.import_module(name)
-            for finder, name, ispkg
-            in pkgutil.iter_modules()
-            if name.startswith(self.plugin_prefix + '_')
-        }
-        for discovered_plugin in discovered_plugins:
-            for path in glob.glob(
-                    str(discovered_plugins[discovered_plugin].__path__[0]) + "/endpoints/*.py"):
+        start = time.time()
+        self.plugin_cache.load()
+        modules = []
+        for discovered_plugin in sorted(self.discover_plugins()):
+            try:
+                package = importlib.import_module(discovered_plugin)
+            except Exception as e:
+                self._plugin_error(discovered_plugin, None, None, e)
+                continue
+            version = self.plugin_cache.package_version(discovered_plugin, package)
+            for path in sorted(glob.glob(str(package.__path__[0]) + "/endpoints/*.py")):
                 mname = path.split(os.path.sep)[-1].replace('.py', '')
+                entry = self.plugin_cache.lookup(discovered_plugin, version, path)
+                if entry is not None and len(entry["classes"]) == 0:
+                    continue
+                modules.append({'package': discovered_plugin, 'version': version,
+                                'mod_name': mname, 'path': path, 'entry': entry})
+
+        workers = self.config.plugins.load_workers
+        if workers > 1 and len(modules) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                imported = list(executor.map(lambda module: self._import_module(module, verbose), modules))
+        else:
+            imported = [self._import_module(module, verbose) for module in modules]
+
+        # all the endpoints are declared after the imports, the conflicts are checked once for all the plugins
+        # endpoints of modules imported by other loads in this process are not taken into account
+        files = {module_data['path'] for module_data, (spec, module) in zip(modules, imported) if module is not None}
+        self.endpoints = {package_name: [register for register in registers if register['file'] in files]
+                          for package_name, registers in HunabkuPluginBase.get_global_endpoints().items()}
+        self.route_index.build(self.endpoints)
+        conflicts = self.route_index.conflicts()
+        if len(conflicts) > 0:
+            for conflict in conflicts:
+                self.logger.error(self.route_index.message(conflict))
+            self.logger.error(
+                f'------ERROR: {len(conflicts)} endpoint conflicts found, server can not start until they are fixed')
+            sys.exit(1)
+
+        for module_data, (spec, module) in zip(modules, imported):
+            if module is None:
+                continue
+            discovered_plugin = module_data['package']
+            mname = module_data['mod_name']
+            path = module_data['path']
+            entry = module_data['entry']
+            if entry is not None and all(hasattr(module, cname) for cname in entry["classes"]):
+                plugin_classes = [(cname, getattr(module, cname)) for cname in entry["classes"]]
+            else:
+                plugin_classes = self._plugin_classes(module)
+                self.plugin_cache.store(discovered_plugin, module_data['version'], path,
+                                        [cname for cname, plugin_class in plugin_classes])
+            for cname, plugin_class in plugin_classes:
+                if verbose:
+                    self.logger.warning(
+                        f'------ Registering plugin class: {mname}.{cname}')
+
+                current_config = {}
+                if discovered_plugin in self.config.keys():
+                    if mname in self.config[discovered_plugin].keys():
+                        if cname in self.config[discovered_plugin][mname].keys():
+                            current_config = self.config[discovered_plugin][mname][cname]
+                try:
+                    defaults = plugin_class.config.freeze()
+                    plugin_class.config.update(current_config)
+                    instance = plugin_class(self)
+                    instance.config.update(current_config)
+                    instance.register_endpoints()
+                except Exception as e:
+                    self._plugin_error(discovered_plugin, f"{mname}.{cname}", path, e)
+                    continue
+                plugin = {}
+                plugin['package'] = discovered_plugin
+                plugin['mod_name'] = mname
+                plugin['class'] = plugin_class
+                plugin['class_name'] = cname
+                plugin['name'] = f"{discovered_plugin}.{mname}.{cname}"
+                plugin['path'] = path
+                plugin['spec'] = spec
+                plugin['instance'] = instance
+                plugin['defaults'] = defaults
+                self.plugins.append(plugin)
                 if verbose:
                     self.logger.warning(
-                        f'------ Loading plugin module from package {discovered_plugin} and module {mname}.py :')
-                spec = importlib.util.spec_from_file_location(mname, path)
-                module = spec.loader.load_module()
-                for cname, plugin_class in inspect.getmembers(module):
-                    if inspect.isclass(plugin_class) and issubclass(plugin_class, HunabkuPluginBase) and plugin_class is not HunabkuPluginBase: # noqa  E501
-                        if verbose:
-                            self.logger.warning(
-                                f'------ Registering plugin class: {mname}.{cname}')
-
-                        current_config = {}
-                        if discovered_plugin in self.config.keys():
-                            if mname in self.config[discovered_plugin].keys():
-                                if cname in self.config[discovered_plugin][mname].keys():
-                                    current_config = self.config[discovered_plugin][mname][cname]
-                        plugin_class.config.update(current_config)
-                        instance = plugin_class(self)
-                        instance.config.update(current_config)
-                        instance.register_endpoints()
-                        plugin = {}
-                        plugin['package'] = discovered_plugin
-                        plugin['mod_name'] = mname
-                        plugin['class'] = plugin_class
-                        plugin['class_name'] = cname
-                        plugin['name'] = f"{discovered_plugin}.{mname}.{cname}"
-                        plugin['path'] = path
-                        plugin['spec'] = spec
-                        plugin['instance'] = instance
-                        self.plugins.append(plugin)
-                        if verbose:
-                            self.logger.warning(
-                                f'------ Registered plugin class: {mname}.{cname}  DONE')
-
-    def check_apidoc_syntax(self, plugin_file):
+                        f'------ Registered plugin class: {mname}.{cname}  DONE')
+        self.plugin_cache.save()
+        self.apidoc_errors = self.parse_apidoc()
+        if len(self.apidoc_errors) > 0:
+            # the endpoints are served, the blocks with errors are not in the docs
+            self.logger.error(f'------ERROR: {len(self.apidoc_errors)} errors parsing the apidoc docstrings of the plugins')
+            for error in self.apidoc_errors:
+                self.logger.error('             ' + error)
+        self.openapi.build(self.endpoints)
+        if self.profiler is not None:
+            paths = {register['path'] for registers in self.endpoints.values() for register in registers}
+            for route in sorted(self.profiler.routes - paths):
+                self.logger.warning(f'------ WARNING: profiling route {route} is not registered by any plugin')
+        # the plugins read the config at request time from read only snapshots (see Config.freeze)
+        self.frozen_config = self.config.freeze()
+        for plugin in self.plugins:
+            plugin['instance'].global_config = self.frozen_config
+            plugin['instance'].config = plugin['instance'].config.freeze()
+        if verbose:
+            self.logger.warning(
+                f'------ Plugins loaded in {time.time() - start:.3f} seconds '
+                f'(plugin cache hits {self.plugin_cache.hits}, misses {self.plugin_cache.misses})')
+
+    def _import_module(self, module_data, verbose=True):
+        """
+        Imports a plugin module, returns (spec, module) or (spec, None) if the import fails.
+        """
+        package_name = module_data['package']
+        mname = module_data['mod_name']
+        path = module_data['path']
+        if verbose:
+            self.logger.warning(
+                f'------ Loading plugin module from package {package_name} and module {mname}.py :')
+        spec = importlib.util.spec_from_file_location(f"{package_name}.endpoints.{mname}", path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception as e:
+            del sys.modules[spec.name]
+            # the endpoints declared before the error are not going to be registered
+            HunabkuPluginBase.remove_global_endpoints(package_name, path)
+            self._plugin_error(package_name, mname, path, e)
+            return spec, None
+        return spec, module
+
+    def _plugin_error(self, package_name, name, path, error):
+        """
+        Reports a plugin that can not be loaded, the error is saved in self.plugin_errors.
+        """
+        self.plugin_errors.append({'package': package_name, 'name': name, 'path': path, 'error': error})
+        self.logger.error(
+            f'------ERROR: loading plugin package {package_name} module {name} file {path}')
+        self.logger.error(''.join(traceback.format_exception(type(error), error, error.__traceback__)))
+
+    def _plugin_classes(self, module):
+        """
+        Returns the list of (class name, class) with the subclasses of HunabkuPluginBase in the module.
+        """
+        plugin_classes = []
+        for cname, plugin_class in inspect.getmembers(module):
+            if inspect.isclass(plugin_class) and issubclass(plugin_class, HunabkuPluginBase) and plugin_class is not HunabkuPluginBase: # noqa  E501
+                plugin_classes.append((cname, plugin_class))
+        return plugin_classes
+
+    def parse_apidoc(self):
+        """
+        Parses in process the apidoc blocks in the docstrings of the endpoints of the loaded plugins,
+        the result has the structure of the apidoc api_data.json file and it is served
+        from memory in /apidoc/api_data.json
+
+        Returns:
+        ___________
+        list: error messages for the blocks with wrong syntax
+        """
+        files = {plugin['path'] for plugin in self.plugins}
+        self.apidoc_data, errors = self.apidoc_parser.parse_endpoints(
+            HunabkuPluginBase.get_global_endpoints(), files)
+        self.apidoc_data_json = json.dumps(self.apidoc_data).encode()
+        return errors
+
+    def check_apidoc_syntax(self, plugin_files=None):
         """
         Allows to check in the syntaxis in the docstring comment is right
-        for apidoc  files generation.
-        The the syntax is wrong, the Hunabku server can not start.
+        for apidoc  files generation. The docstrings are parsed in process, without the apidoc binary.
 
         Parameters:
         ___________
-        plugin_file: str
-            path to the plugin file to check (python file)
-        """
-        args = ['apidoc', '-c', self.apidoc_config_dir + os.path.sep + "apidoc.json", '-i',
-                str(pathlib.Path(plugin_file).parent.absolute()),
-                '--dry-run',
-                '-f',
-                plugin_file]
-        process = subprocess.run(args,
-                                 stdout=subprocess.PIPE)
-        if process.returncode != 0:
-            self.logger.error(
-                '------ERROR: parsing docstring for apidocs in plugin ' + plugin_file)
+        plugin_files: str or list
+            path or list of paths to the plugin files to check (python files), all the loaded plugins by default
+
+        Returns:
+        ___________
+        bool: True if the syntax is right
+        """
+        if isinstance(plugin_files, str):
+            plugin_files = [plugin_files]
+        if plugin_files is None:
+            plugin_files = [plugin['path'] for plugin in self.plugins]
+        if len(plugin_files) == 0:
+            return True
+        data, errors = self.apidoc_parser.parse_endpoints(
+            HunabkuPluginBase.get_global_endpoints(), set(plugin_files))
+        if len(errors) > 0:
             self.logger.error(
-                '             server can not start until apidocs syntax is fixed')
-            self.logger.error(process)
-            sys.exit(1)
+                '------ERROR: parsing docstring for apidocs in plugins ' + ', '.join(dict.fromkeys(plugin_files)))
+            for error in errors:
+                self.logger.error('             ' + error)
+            return False
+        return True
+
+    def apidoc_data_endpoint(self):
+        """
+        Returns the apidoc data (api_data.json) parsed from the docstrings of the endpoints
+        """
+        return self.app.response_class(response=self.apidoc_data_json,
+                                       status=200,
+                                       mimetype='application/json')
+
+    def openapi_endpoint(self):
+        """
+        Returns the OpenAPI document of the loaded endpoints, it is generated when the plugins are loaded.
+        """
+        return self.openapi.response(self.app, request)
+
+    def jobs_endpoint(self, job_id):
+        """
+        Returns the status of a background job and its result when it is done,
+        the apikey is required (header config.apikeys.header or apikey parameter).
+        """
+        if not self.valid_request_apikey():
+            return self.error_response(
+                401, 'The HTTP 401 Unauthorized invalid authentication apikey for the target resource.')
+        job = self.jobs.get(job_id)
+        if job is None:
+            return self.error_response(404, f'The job {job_id} does not exist or its result expired.')
+        return self.app.response_class(response=self.serializer.dumpb(job), status=200, mimetype='application/json')
+
+    def valid_request_apikey(self, scope=None):
+        """
+        Checks the apikey of the request for the endpoints of the server (header config.apikeys.header or parameter)
+
+        Parameters:
+        ____________
+        scope:str
+            if given, the apikey is valid only if it has this scope.
+        """
+        return self.apikeys.validate(request.headers.get(self.config.apikeys.header, request.args.get('apikey')), scope)
 
-    def generate_doc(self, timeout=1, maxtries=5):
+    def reload_config(self, config: Config = None) -> list:
+        """
+        Reloads the config without restarting the server, the config file (--config) is executed again
+        and compared with the running config. Only the changed options are applied: the plugins
+        with changes get their new config and on_config_change is called, the other plugins are not touched.
+        The server options that are used only at startup (host, port, workers, db ...) require a restart,
+        a warning is logged and the running value is kept.
+        Returns the list of the applied options (dotted paths).
+
+        Parameters:
+        ____________
+        config:Config
+            new config, by default the config file is loaded
+        """
+        with self.reload_lock:
+            if config is None:
+                if not self.config_file:
+                    self.logger.warning('------ WARNING: there is not config file to reload')
+                    return []
+                try:
+                    config = ConfigGenerator.load_config(self.config_file)
+                except Exception as e:
+                    self.logger.error(f'------ERROR: loading config file {self.config_file}: {e}, '
+                                      'the running config is kept')
+                    return []
+            new_config = self.default_config.thaw()
+            new_config.update(config)
+            changes = self.config.freeze().diff(new_config.freeze())
+            applied = []
+            changed_plugins = {}
+            for path in changes:
+                plugin = next((plugin for plugin in self.plugins if path.startswith(plugin['name'] + '.')), None)
+                if plugin is not None:
+                    changed_plugins[plugin['name']] = plugin
+                    applied.append(path)
+                elif self.apply_config(path, self._config_value(new_config, path)):
+                    applied.append(path)
+                else:
+                    self.logger.warning(f'------ WARNING: config option {path} changed, restart the server to apply it')
+            for plugin in changed_plugins.values():
+                self._reload_plugin_config(plugin, new_config)
+            if len(applied) > 0:
+                self.ratelimiter.clear()
+                self.compressor.clear()
+                self.frozen_config = self.config.freeze()
+                for plugin in self.plugins:
+                    plugin['instance'].global_config = self.frozen_config
+            self.logger.warning(f'------ Config reloaded, {len(applied)} options changed')
+            return applied
+
+    @staticmethod
+    def _config_value(config, path):
+        for key in path.split('.'):
+            if not isinstance(config, Config) or key not in config.keys():
+                return None
+            config = config[key]
+        return config
+
+    def _set_config_value(self, path, value):
+        config = self.config
+        keys = path.split('.')
+        for key in keys[:-1]:
+            if not isinstance(config.get(key), Config):
+                config[key] = Config()
+            config = config[key]
+        config[keys[-1]] = value
+
+    def apply_config(self, path: str, value) -> bool:
+        """
+        Applies the new value of a server option, returns False if the option requires a restart.
+        """
+        if value is None or isinstance(value, Config):
+            return False
+        section, _, name = path.partition('.')
+        if path == 'info_level':
+            self.set_info_level(value)
+        elif path == 'apikey':
+            self.apikeys.apikey = value
+            self.apikeys.reload()
+        elif path == 'apikeys.file':
+            self.apikeys.filename = value
+            self.apikeys.reload()
+        elif path == 'apikeys.header':
+            # the header is read from self.config in every request, the openapi document is built again
+            self.openapi.apikey_header = value
+            self.openapi.fingerprint = None
+            self.openapi.build(self.endpoints)
+        elif path == 'apikeys.reload_interval':
+            self.apikeys.reload_interval = value
+        elif path == 'server.reload_interval':
+            if self.config_watcher is None:
+                return False
+            self.config_watcher.interval = value
+        elif path == 'server.async_timeout':
+            self.loop.timeout = value if value else None
+        elif section == 'profiling' and name in ('threshold', 'sample_rate', 'routes'):
+            if self.profiler is None:
+                return False
+            setattr(self.profiler, name, set(value) if name == 'routes' else value)
+        elif section == 'pagination' and name in ('default_page_size', 'max_page_size'):
+            setattr(self.paginator, name, value)
+        elif not (section == 'ratelimit' and name in ('enabled', 'rate', 'period', 'burst')) and \
+                section != 'compression' and \
+                path not in ('cache.enabled', 'jobs.result_ttl', 'profiling.scope', 'metrics.scope'):
+            # ratelimit, compression, cache, jobs, profiles and metrics read these options from self.config in every request
+            return False
+        self._set_config_value(path, value)
+        return True
+
+    def _reload_plugin_config(self, plugin, config):
+        current_config = self._config_value(config, plugin['name'])
+        plugin_config = plugin['defaults'].thaw()
+        if isinstance(current_config, Config):
+            plugin_config.update(current_config)
+        self._set_config_value(plugin['name'], current_config if isinstance(current_config, Config) else Config())
+        plugin_config = plugin_config.freeze()
+        instance = plugin['instance']
+        changes = instance.config.diff(plugin_config)
+        if len(changes) == 0:
+            return
+        old_config = instance.config
+        instance.config = plugin_config
+        try:
+            instance.on_config_change(changes, old_config)
+        except Exception as e:
+            self.logger.error(f'------ERROR: on_config_change of plugin {plugin["name"]}: {e}')
+
+    def error_response(self, status, msg):
+        return self.app.response_class(response=self.serializer.dumpb({'msg': msg}), status=status,
+                                       mimetype='application/json')
+
+    def profiles_endpoint(self, name=None):
+        """
+        Returns the list of the saved profiles or the profile name (folded stacks),
+        an apikey with the scope config.profiling.scope is required.
+        """
+        if not self.valid_request_apikey(self.config.profiling.scope):
+            return self.error_response(
+                401, 'The HTTP 401 Unauthorized invalid authentication apikey for the target resource.')
+        if name is None:
+            return self.app.response_class(response=self.serializer.dumpb(self.profiler.profiles()), status=200,
+                                           mimetype='application/json')
+        filename = self.profiler.path(name)
+        if filename is None:
+            return self.error_response(404, f'The profile {name} does not exist.')
+        with open(filename, 'rb') as f:
+            return self.app.response_class(response=f.read(), status=200, mimetype='text/plain')
+
+    def metrics_endpoint(self):
+        """
+        Returns the metrics of the endpoints and the MongoDB pool in the Prometheus text format,
+        an apikey with the scope config.metrics.scope is required.
+        """
+        if not self.valid_request_apikey(self.config.metrics.scope):
+            return self.error_response(
+                401, 'The HTTP 401 Unauthorized invalid authentication apikey for the target resource.')
+        gauges = {}
+        stats = self.db.stats()
+        if stats["connected"]:
+            for name in ("connections_open", "connections_in_use", "checkouts_failed", "max_pool_size"):
+                gauges[f"hunabku_db_{name}"] = stats.get(name, 0)
+        return self.app.response_class(response=self.metrics.render(gauges), status=200,
+                                       mimetype='text/plain; version=0.0.4')
+
+    def _doc_hashes(self):
+        """
+        Returns the sha256 of the apidoc config and every plugin file.
+        """
+        hashes = {}
+        paths = [self.apidoc_config_dir + os.path.sep + "apidoc.json"]
+        paths += [plugin['path'] for plugin in self.plugins]
+        for path in dict.fromkeys(paths):
+            with open(path, 'rb') as f:
+                hashes[path] = hashlib.sha256(f.read()).hexdigest()
+        return hashes
+
+    def generate_doc(self, timeout=1, maxtries=None, background=False):
         """
         This method allows to generated apidocs documentation parsing plugin files.
+        Only the plugins that changed since the last build are checked (see check_apidoc_syntax),
+        if nothing changed the last docs are kept. The docs are built in a temporary folder
+        and they replace the current docs only if the build finish, then the last good docs
+        are served while the new ones are built.
 
         Parameters:
         ___________
         timeout: int
             timeout in seconds to wait for the process to finish
         maxtries: int
-            max number of tries to wait for the process to finish
+            max number of tries to wait for the process to finish,
+            by default config.apidoc.build_timeout/timeout
+        background: bool
+            if True, an error in the docstrings is logged and the last docs are kept,
+            otherwise the server can not start until apidocs syntax is fixed.
+
+        Returns:
+        ___________
+        bool: True if the docs are up to date
         """
         self.logger.warning('-----------------------')
         self.logger.warning('------ Creating documentation')
+        if maxtries is None:
+            maxtries = max(1, int(self.config.apidoc.build_timeout / timeout))
+
+        hashes = self._doc_hashes()
+        hashes_file = self.apidoc_dir + os.path.sep + 'doc_hashes.json'
+        old_hashes = {}
+        if os.path.exists(hashes_file):
+            with open(hashes_file) as json_file:
+                old_hashes = json.load(json_file)
+        if hashes == old_hashes and os.path.exists(self.apidoc_output_dir + os.path.sep + 'index.html'):
+            self.logger.warning('------ Apidocs are up to date')
+            self.update_static()
+            return True
 
-        rmtree(self.apidoc_static_dir, ignore_errors=True)
+        changed = [plugin['path'] for plugin in self.plugins if hashes[plugin['path']] != old_hashes.get(plugin['path'])]
+        if not self.check_apidoc_syntax(list(dict.fromkeys(changed))):
+            if background:
+                self.logger.error('------ERROR: apidocs were not updated, serving the last docs')
+                return False
+            self.logger.error(
+                '             server can not start until apidocs syntax is fixed')
+            sys.exit(1)
+
+        if shutil.which('apidoc') is None:
+            self.logger.warning(
+                '------ WARNING: apidoc binary not found, the html docs are not generated, '
+                f'the api data is served at http://{self.config.host}:{self.config.port}/apidoc/api_data.json')
+            return True
+
+        output_dir = self.apidoc_output_dir + '.new'
+        rmtree(output_dir, ignore_errors=True)
         args = ['apidoc', '-c',
                 self.apidoc_config_dir + os.path.sep + "apidoc.json"]
-
-        for plugin in self.plugins:
-            self.check_apidoc_syntax(plugin['path'])
+        for path in dict.fromkeys(plugin['path'] for plugin in self.plugins):
             args.append('-i')
-            args.append(str(pathlib.Path(plugin['path']).parent.absolute()))
+            args.append(str(pathlib.Path(path).parent.absolute()))
             args.append('-f')
-            args.append(plugin['path'])
+            args.append(path)
         args.append('-o')
-        args.append(self.apidoc_output_dir)
+        args.append(output_dir)
         process = subprocess.Popen(args,
                                    stdout=subprocess.PIPE,
                                    stderr=subprocess.STDOUT)
@@ -278,13 +783,118 @@ class Hunabku:
             counter = counter + 1
             if counter == maxtries:
                 process.kill()
+                process.wait()
                 break
+        if process.returncode != 0:
+            self.logger.error('------ERROR: building apidocs, serving the last docs')
+            self.logger.error(process.stdout.read().decode(errors='replace'))
+            rmtree(output_dir, ignore_errors=True)
+            return False
+
+        # replacing the docs, the old docs are served until this point
+        old_dir = self.apidoc_output_dir + '.old'
+        rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(self.apidoc_output_dir):
+            os.rename(self.apidoc_output_dir, old_dir)
+        os.rename(output_dir, self.apidoc_output_dir)
+        rmtree(old_dir, ignore_errors=True)
+        with open(hashes_file, 'w') as json_file:
+            json.dump(hashes, json_file)
+        self.update_static(rebuild=True)
         self.logger.warning(
             '------ Apidocs at http://{}:{}/apidoc/index.html'.format(self.config.host, self.config.port))
+        return True
+
+    def update_static(self, rebuild=False):
+        """
+        Loads the static files of the apidoc site in memory, the files are fingerprinted and compressed
+        (see hunabku.StaticFiles) if rebuild is True or if they were not built before.
+        """
+        if self.static is None:
+            return
+        try:
+            if rebuild or not self.static.load():
+                self.static.build()
+        except OSError as e:
+            self.logger.error(f'------ERROR: caching the static files of the docs: {e}')
+
+    def static_endpoint(self, filename):
+        """
+        Serves the files of the apidoc site from memory, the files that are not cached are read from the disk.
+        """
+        if self.static is not None:
+            response = self.static.response(self.app, request, filename)
+            if response is not None:
+                return response
+        return self.app.send_static_file(filename)
+
+    def generate_doc_async(self):
+        """
+        Generates the documentation in a background thread (see generate_doc),
+        the server can accept requests while the docs are built.
+        """
+        self.doc_thread = threading.Thread(target=self.generate_doc, kwargs={'background': True},
+                                           name='hunabku-apidoc', daemon=True)
+        self.doc_thread.start()
+        return self.doc_thread
+
+    def watch_config(self, callback):
+        """
+        Starts the watch of the config file if config.server.reload_interval is set,
+        callback is called when the file changes.
+        """
+        if self.config_file and self.config.server.reload_interval:
+            self.config_watcher = ConfigWatcher(self.config_file, callback,
+                                                self.config.server.reload_interval, self.logger)
+            self.config_watcher.start()
+        return self.config_watcher
 
     def start(self):
         """
-        Method to start server
+        Method to start server, the server mode is taken from config.server.mode
+        If config.apidoc.background is True the documentation is generated
+        in background after the server starts.
         """
-        self.app.run(host=self.config.host, port=self.config.port,
-                     debug=True, use_reloader=self.config.use_reloader)
+        if self.config.server.mode == "dev":
+            # with the reloader, the server runs in a child process with WERKZEUG_RUN_MAIN
+            if not self.config.use_reloader or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+                if self.config.apidoc.background:
+                    self.generate_doc_async()
+                # the config file is reloaded in the serving process, the reloader does not restart it
+                self.watch_config(self.reload_config)
+                if hasattr(signal, "SIGHUP"):
+                    signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(
+                        target=self.reload_config, name="hunabku-reload", daemon=True).start())
+            self.app.run(host=self.config.host, port=self.config.port,
+                         debug=True, use_reloader=self.config.use_reloader)
+        else:
+            self.serve(self.config.server.mode)
+
+    def serve(self, mode=None):
+        """
+        Method to start the server in production mode (without debugger and reloader).
+
+        Parameters:
+        ___________
+        mode: str
+            threaded or prefork, by default config.server.mode,
+            prefork is used if the config mode is dev.
+        """
+        if mode is None:
+            mode = self.config.server.mode
+        if mode == "dev":
+            mode = "prefork"
+        server = Server(self.app, self.config.host, self.config.port,
+                        workers=self.config.server.workers,
+                        backlog=self.config.server.backlog,
+                        keepalive=self.config.server.keepalive,
+                        logger=self.logger)
+        server.on_reload = self.reload_config
+
+        def ready():
+            if self.config.apidoc.background:
+                self.generate_doc_async()
+            # only the master watches the file, server.reload sends SIGHUP to the workers
+            self.watch_config(server.reload)
+        server.on_ready = ready
+        server.serve(mode)
@@ -4,27 +4,50 @@ from flask import (
 )
 from functools import wraps
 from hunabku.Config import Config
+from hunabku.Params import ParamsSchema
+from hunabku.Streaming import StreamWriter
+from urllib.parse import urlencode
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import is_resource_modified
+import hashlib
 import inspect
+import math
 import os
 import sys
-import json
+import threading
+import time
 
 
 class Globals:
     endpoints = {}
     verbose = True
+    # plugin modules can be imported from several threads (config.plugins.load_workers)
+    lock = threading.Lock()
 
 
 def set_verbose(status):
     Globals.verbose = status
 
 
-def endpoint(path, methods):
+def endpoint(path, methods, cache=None, params=None):
     """
     Specialized decorator to use in the methods of the class that inherit from  HunabkuPluginBase
     this decorator allows to register the path and methods [GET,POST,DELETE,PUT]
     in the flask app.
 
+    The GET responses can be cached for cache seconds (see hunabku.ResponseCache),
+    the plugin can remove the cached responses after a write with self.invalidate_cache(path_prefix).
+
+    The method can be async (async def), it runs in the event loop of the worker (see hunabku.EventLoop)
+    and it can await several calls concurrently.
+
+    The parameters of the request can be declared in params (see hunabku.Params), the values are converted,
+    checked and passed to the method as keyword arguments, a 400 response with the errors is returned
+    if they are not valid. The parameters are added to the docs (api_data.json and openapi.json).
+
+    The latency, status and size of the responses are recorded in the server metrics (see hunabku.Metrics)
+    and the slow requests can be profiled (see hunabku.Profiler).
+
     example:
     class Hello(HunabkuPluginBase):
     def __init__(self,hunabku):
@@ -42,6 +65,18 @@ def endpoint(path, methods):
         else:
             return self.send_apikey_error()
 
+    @endpoint('/hello/stats',methods=['GET'],cache=300)
+    def stats(self):
+        ...
+
+    @endpoint('/hello/all',methods=['GET'])
+    async def all(self):
+        works, authors = await asyncio.gather(get_works(), get_authors())
+        ...
+
+    @endpoint('/hello/works',methods=['GET'],params={"max": {"type": int, "default": 10, "min": 1, "max": 100}})
+    def works(self, max):
+        ...
     """
     def wrapper(func):
         current_frame = inspect.currentframe()
@@ -51,20 +86,75 @@ def endpoint(path, methods):
         package_name = caller_frame.filename.split(
             "endpoints")[0].split(os.sep)[-2]
         class_name, func_name = func.__qualname__.split('.')
+        schema = None
+        if params is not None:
+            # the schema is compiled once, an error here is an error of the plugin module
+            schema = ParamsSchema(params)
+            conflicts = ParamsSchema.path_variables(path) & set(schema.params)
+            if conflicts:
+                raise ValueError(f"the params {sorted(conflicts)} of {func.__qualname__} are variables of the path {path}")
 
         if Globals.verbose:
             print(
                 f'------ Adding endpoint {path} with HTTP(S) methods {str(methods)}'
                 f' from class = {class_name} class method = {func_name}')
-        if package_name not in Globals.endpoints:
-            Globals.endpoints[package_name] = []
-        Globals.endpoints[package_name].append(
-            {'path': path, 'methods': methods, 'func_name': func_name, 'class_name': class_name, 'file': filename})
+        with Globals.lock:
+            if package_name not in Globals.endpoints:
+                Globals.endpoints[package_name] = []
+            Globals.endpoints[package_name].append(
+                {'path': path, 'methods': methods, 'func_name': func_name, 'class_name': class_name, 'file': filename,
+                 'doc': func.__doc__, 'cache': cache, 'params': schema.fields() if schema is not None else None})
 
-        @wraps(func)
-        def _impl(self, *method_args, **method_kwargs):
+        if inspect.iscoroutinefunction(func):
+            coroutine_func = func
+
+            @wraps(coroutine_func)
+            def func(self, *method_args, **method_kwargs):
+                return self.hunabku.loop.run(coroutine_func(self, *method_args, **method_kwargs))
+
+        def _view(self, *method_args, **method_kwargs):
+            limited = self.hunabku.ratelimiter.check(self, path)
+            if limited is not None:
+                return limited
+            if schema is not None:
+                values, errors = schema.validate(self.request.values)
+                if errors:
+                    return self.params_error(errors)
+                method_kwargs = dict(method_kwargs, **values)
+            if cache and self.hunabku.cache.cacheable(self):
+                key = self.hunabku.cache.key(self)
+                response = self.hunabku.cache.get(self, key)
+                if response is None:
+                    response = self.hunabku.cache.set(self, key, func(self, *method_args, **method_kwargs), cache)
+                return response
             response = func(self, *method_args, **method_kwargs)
             return response
+
+        @wraps(func)
+        def _impl(self, *method_args, **method_kwargs):
+            metrics = self.hunabku.metrics
+            profiler = self.hunabku.profiler
+            if metrics is None and profiler is None:
+                return _view(self, *method_args, **method_kwargs)
+            start = time.perf_counter()
+            profile = profiler.start(path) if profiler is not None else None
+            status = 500
+            size = 0
+            try:
+                response = self.app.make_response(_view(self, *method_args, **method_kwargs))
+                # the streamed responses are measured until the response is created, their size is not known
+                status = response.status_code
+                size = response.content_length or 0
+                return response
+            except HTTPException as e:
+                status = e.code
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                if metrics is not None:
+                    metrics.record(path, self.request.method, status, seconds, size)
+                if profile is not None:
+                    profiler.stop(profile, self.request.method, status, seconds)
         # WARNING: this is required to avoid overwrite methods in the class
         _impl.__name__ = func.__qualname__
         return _impl
@@ -77,7 +167,7 @@ class HunabkuPluginBase(object):
     def __init__(self, hunabku):
         """
         Base class to handle the plugins.
-        Allows to have access to the MondoDB object, custom json methods
+        Allows to have access to the MongoDB client shared by the plugins (self.db), custom json methods
         with our encoders, utility functions to check apikeys and send default messages
         in case of error.
 
@@ -88,9 +178,26 @@ class HunabkuPluginBase(object):
         self.global_config = hunabku.config
         self.app = hunabku.app
         self.request = request
-        self.json = json
+        self.json = hunabku.serializer
         self.logger = hunabku.logger
         self.hunabku = hunabku
+        # MongoDB client shared by all the plugins (see hunabku.Database)
+        self.db = hunabku.db
+
+    def on_config_change(self, changes: list, old_config):
+        """
+        Called when the config of the plugin changes after a reload of the config file
+        (see Hunabku.reload_config), self.config already has the new values. The plugins that
+        keep state built from the config (clients, caches) can override it to update that state.
+
+        Parameters:
+        ____________
+        changes:list
+            dotted paths of the changed options, relative to the plugin config
+        old_config:FrozenConfig
+            the previous config of the plugin
+        """
+        pass
 
     def apikey_error(self):
         """
@@ -104,6 +211,155 @@ class HunabkuPluginBase(object):
         )
         return response
 
+    def json_response(self, obj, status=200, headers=None):
+        """
+        Returns the json response for obj, the body is serialized once to bytes with the server serializer
+        (see hunabku.Serializer) that supports datetimes, ObjectId, numpy and pandas values.
+
+        Parameters:
+        ____________
+        obj:object
+            data to send
+        status:int
+            HTTP status
+        headers:dict
+            extra headers for the response
+        """
+        return self.app.response_class(response=self.json.dumpb(obj), status=status, headers=headers,
+                                       mimetype='application/json')
+
+    def stream_response(self, iterable, format="json", fields=None, status=200, chunk_size=65536):
+        """
+        Returns a chunked response that reads the iterable (generator, MongoDB cursor ...) lazily,
+        the items are not loaded in memory and the iterable is closed if the client disconnects.
+
+        Parameters:
+        ____________
+        iterable:iterable
+            items to send, dictionaries for csv
+        format:str
+            json (a list), ndjson (one json per line) or csv
+        fields:list
+            columns for csv, the keys of the first item by default
+        status:int
+            HTTP status
+        chunk_size:int
+            bytes buffered before a chunk is sent
+        """
+        if format not in StreamWriter.mimetypes:
+            raise ValueError(f"unknown stream format {format}, the options are json, ndjson or csv")
+        writer = StreamWriter(self.json, chunk_size)
+        return self.app.response_class(response=writer.stream(iterable, format, fields), status=status,
+                                       mimetype=StreamWriter.mimetypes[format])
+
+    def paginate(self, collection, query=None, key="_id", direction=1, projection=None):
+        """
+        Returns the documents of the page requested with the parameters cursor and page_size
+        and the token of the next page (None in the last page), ValueError is raised if
+        the parameters are not valid (see hunabku.Pagination).
+
+        Parameters:
+        ____________
+        collection:Collection
+            pymongo collection, ex: self.db["colav"]["works"]
+        query:dict
+            MongoDB filter
+        key:str
+            indexed key to sort the documents (_id is used to break the ties)
+        direction:int
+            1 ascending, -1 descending
+        projection:dict
+            MongoDB projection
+        """
+        paginator = self.hunabku.paginator
+        page_size = paginator.page_size(self.request.args.get('page_size'))
+        return paginator.page(collection, query, key, direction, self.request.args.get('cursor'), page_size,
+                              projection)
+
+    def paginated_response(self, collection, query=None, key="_id", direction=1, projection=None):
+        """
+        Returns the json response {"data": [...], "next": token} for the page requested with the
+        parameters cursor and page_size, the url of the next page is in the header Link (rel="next").
+        A bad request error is returned if the cursor or the page_size are not valid.
+        The parameters are the same of paginate.
+        """
+        try:
+            documents, next_token = self.paginate(collection, query, key, direction, projection)
+        except ValueError:
+            return self.badrequest_error()
+        headers = {}
+        if next_token is not None:
+            args = [(name, value) for name, value in self.request.args.items(multi=True)
+                    if name not in ('cursor', 'apikey')]
+            url = self.request.base_url + "?" + urlencode(args + [('cursor', next_token)])
+            headers['Link'] = f'<{url}>; rel="next"'
+        return self.json_response({'data': documents, 'next': next_token}, headers=headers)
+
+    def submit_job(self, function, *args, **kwargs):
+        """
+        Runs function(*args, **kwargs) in the background job pool (see hunabku.Jobs)
+        and returns the job id, the client polls the status and the result in /jobs/<id>.
+        The function does not have access to the request, pass the values that it needs.
+        """
+        return self.hunabku.jobs.submit(function, *args, **kwargs)
+
+    def job_response(self, job_id):
+        """
+        Returns the 202 Accepted response for a job, with the url of the status in the header Location.
+        """
+        url = f"/jobs/{job_id}"
+        return self.json_response({'id': job_id, 'status': 'pending', 'url': url}, status=202,
+                                  headers={'Location': url})
+
+    def ratelimit_error(self, retry_after):
+        """
+        return default too many requests error, with the seconds to wait in the header Retry-After
+        """
+        response = self.app.response_class(
+            response=self.json.dumps(
+                {'msg': 'The HTTP 429 Too Many Requests, rate limit exceeded for the apikey in this endpoint.',
+                 'retry_after': math.ceil(retry_after)}),
+            status=429,
+            mimetype='application/json'
+        )
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response
+
+    def conditional_response(self, data, etag=None, last_modified=None, status=200, mimetype='application/json'):
+        """
+        Returns a response that supports the conditional requests (If-None-Match and If-Modified-Since),
+        if the client already has the data a 304 response without body is returned.
+
+        Parameters:
+        ____________
+        data:object
+            data to serialize with json (str and bytes are sent as they are),
+            it can be a function that returns the data, it is only called if the client does not have the data.
+        etag:str
+            version of the data (ex: update time or counter), if it is not given the ETag is the sha256 of the body,
+            with a version the data is not serialized (or computed) for clients that already have it.
+        last_modified:datetime
+            modification time of the data for If-Modified-Since
+        """
+        response = self.app.response_class(status=status, mimetype=mimetype)
+        if etag is not None:
+            response.set_etag(str(etag))
+        if last_modified is not None:
+            response.last_modified = last_modified
+        # only GET and HEAD get a 304 (as in make_conditional), the other methods always get the body
+        if status == 200 and self.request.method in ("GET", "HEAD") and (etag is not None or last_modified is not None) \
+                and not is_resource_modified(self.request.environ, etag=response.get_etag()[0],
+                                             last_modified=response.last_modified):
+            return response.make_conditional(self.request)
+        if callable(data):
+            data = data()
+        if not isinstance(data, (str, bytes)):
+            data = self.json.dumpb(data)
+        response.set_data(data)
+        if etag is None:
+            response.set_etag(hashlib.sha256(response.get_data()).hexdigest())
+        return response.make_conditional(self.request)
+
     def badrequest_error(self):
         """
         return defualt bad request error
@@ -115,15 +371,44 @@ class HunabkuPluginBase(object):
                                            mimetype='application/json')
         return response
 
-    def valid_apikey(self):
-        if self.request.method == 'POST':
-            apikey = self.request.form.get('apikey')
-        else:
+    def params_error(self, errors):
+        """
+        return bad request error with the errors of the parameters (see hunabku.Params)
+        """
+        data = {"error": "Bad Request",
+                "message": "Invalid parameters passed. Please fix your request with valid parameters.",
+                "details": errors}
+        return self.app.response_class(response=self.json.dumps(data), status=400, mimetype='application/json')
+
+    def get_apikey(self):
+        """
+        Returns the apikey of the request, from the header config.apikeys.header,
+        the query string or the form (POST), the body is only read if the key is not found before.
+        """
+        apikey = self.request.headers.get(self.global_config.apikeys.header)
+        if apikey is None:
             apikey = self.request.args.get('apikey')
-        if self.global_config["apikey"] == apikey:
-            return True
-        else:
-            return False
+        if apikey is None and self.request.method == 'POST':
+            apikey = self.request.form.get('apikey')
+        return apikey
+
+    def valid_apikey(self, scope=None):
+        """
+        Checks the apikey of the request in the apikeys store of the server.
+
+        Parameters:
+        ____________
+        scope:str
+            if given, the apikey is valid only if it has this scope.
+        """
+        return self.hunabku.apikeys.validate(self.get_apikey(), scope)
+
+    def invalidate_cache(self, prefix: str = ""):
+        """
+        Removes the cached responses of the paths that start with prefix (all by default),
+        call it after the writes that change the data of cached endpoints.
+        """
+        self.hunabku.cache.invalidate(prefix)
 
     def register_endpoints(self):
         """
@@ -131,15 +416,23 @@ class HunabkuPluginBase(object):
         """
         filename = inspect.getfile(self.__class__)
         class_name = type(self).__name__
+        package_name = self._get_package_name()
         if self.has_valid_endpoints():
-            for endpoint_data in Globals.endpoints[self._get_package_name()]:
+            registered = set()
+            for endpoint_data in Globals.endpoints[package_name]:
                 if endpoint_data['file'] == filename and endpoint_data['class_name'] == class_name:
                     path = endpoint_data['path']
                     func_name = endpoint_data['func_name']
                     methods = endpoint_data['methods']
+                    # the same module imported twice registers the endpoint twice
+                    if (path, func_name) in registered:
+                        continue
+                    registered.add((path, func_name))
                     func = getattr(self, func_name)
+                    # the package is part of the flask endpoint name,
+                    # plugins in different packages can have the same class and method names
                     self.app.add_url_rule(
-                        path, view_func=func, methods=methods)
+                        path, endpoint=f"{package_name}.{func.__name__}", view_func=func, methods=methods)
         else:
             sys.exit(1)
 
@@ -147,6 +440,7 @@ class HunabkuPluginBase(object):
         """
         Method to check is the parameters passed to the endpoint are valid,
         if unkown parameter is passed, a bad request should be returned.
+        The endpoints with params in @endpoint are checked before the method is called.
         """
         if self.request.method == 'POST':
             args = self.request.form
@@ -166,43 +460,31 @@ class HunabkuPluginBase(object):
         """
         return Globals.endpoints
 
+    @classmethod
+    def remove_global_endpoints(cls, package_name, filename):
+        """
+        Method to remove from the global dictionary the endpoints declared in a file
+        """
+        with Globals.lock:
+            if package_name in Globals.endpoints:
+                Globals.endpoints[package_name] = [
+                    register for register in Globals.endpoints[package_name] if register['file'] != filename]
+
     def has_valid_endpoints(self):
         """
-        This method checks before to load the plugin if any paths in the endpoint is repeated.
+        This method checks before to load the plugin if any paths in the endpoint is repeated
+        (for the same HTTP method) in this package or in other packages.
         this platform does not allows overwrite endpoint paths.
+        The check uses the route index of the server, built once for all the plugins.
         """
-        package_name = self._get_package_name()
-        class_name = type(self).__name__
-        plugins = list(Globals.endpoints.keys())
-        endpoints = []
-        for register in Globals.endpoints[package_name]:
-            endpoints.append(register)
-        # checking if there are endpoints repeated in the same package
-        for register in Globals.endpoints[package_name]:
-            for endpoint in endpoints:
-                if endpoint != register:
-                    if endpoint["path"] == register["path"]:
-                        print(
-                            f"ERROR: can't not load plugin, package {package_name} "
-                            f"class {class_name} class_method {endpoint['func_name']} file {endpoint['file']} "
-                            f"because the path {endpoint['path']} is already loaded in plugin: "
-                            f"package {package_name} class {register['class_name']} "
-                            f"class_method {register['func_name']} file {register['file']}")
-                        return False
-        plugins.remove(package_name)
-        # checking if there are endpoints repeated in other packages
-        for endpoint in endpoints:
-            for plugin in plugins:
-                for register in Globals.endpoints[plugin]:
-                    if endpoint["path"] == register['path']:
-                        print(
-                            f"ERROR: can't not load plugin, package {package_name} "
-                            f"class {class_name} class_method {endpoint['func_name']} file {endpoint['file']} "
-                            f"because the path {endpoint['path']} is already loaded in plugin: "
-                            f"package {plugin} class {register['class_name']} "
-                            f"class_method {register['func_name']} file {register['file']}")
-                        return False
-        return True
+        route_index = self.hunabku.route_index
+        if not route_index.built:
+            route_index.build(Globals.endpoints)
+        conflicts = route_index.plugin_conflicts(
+            self._get_package_name(), type(self).__name__, inspect.getfile(self.__class__))
+        for conflict in conflicts:
+            print(route_index.message(conflict))
+        return len(conflicts) == 0
 
     def _get_package_name(self):
         filename = inspect.getfile(self.__class__)
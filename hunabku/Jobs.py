@@ -0,0 +1,195 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from hunabku.Database import Database
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+
+
+class JobStore:
+    """
+    Base class for the stores of the jobs, a job is a dictionary with the keys
+    id, status (pending, running, done or failed), submitted, started, finished, result and error.
+    """
+
+    def get(self, job_id: str):
+        """
+        Returns the job or None if it is not found or its result expired.
+        """
+        raise NotImplementedError
+
+    def set(self, job: dict, ttl: float = None):
+        """
+        Saves the job, the finished jobs are removed after ttl seconds.
+        """
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """
+    Jobs in the memory of the process, at most max_jobs jobs are saved (the oldest are removed).
+    In prefork mode every worker has its own jobs, a request to /jobs/<id> can be handled by
+    another worker, use a shared store (mongodb) with more than one worker.
+    """
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, job_id):
+        with self.lock:
+            item = self.jobs.get(job_id)
+            if item is None:
+                return None
+            expire, job = item
+            if expire is not None and expire < time.monotonic():
+                del self.jobs[job_id]
+                return None
+            return dict(job)
+
+    def set(self, job, ttl=None):
+        with self.lock:
+            expire = time.monotonic() + ttl if ttl is not None else None
+            self.jobs[job["id"]] = (expire, dict(job))
+            while len(self.jobs) > self.max_jobs:
+                self.jobs.popitem(last=False)
+
+
+class MongoJobStore(JobStore):
+    """
+    Jobs saved in a MongoDB collection with a TTL index, shared by all the workers.
+    The results should be values that can be saved in MongoDB.
+    """
+
+    def __init__(self, database, db: str = "hunabku", collection: str = "jobs"):
+        """
+        Parameters:
+        ____________
+        database:Database
+            shared MongoDB client (see hunabku.Database)
+        db:str
+            database name
+        collection:str
+            collection name
+        """
+        self.database = database
+        self.db = db
+        self.collection_name = collection
+
+    @property
+    def collection(self):
+        return self.database.ttl_collection(self.db, self.collection_name)
+
+    def get(self, job_id):
+        job = self.collection.find_one({"_id": job_id}, {"_id": 0, "expire": 0})
+        return job
+
+    def set(self, job, ttl=None):
+        document = dict(job, _id=job["id"])
+        if ttl is not None:
+            document["expire"] = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        self.collection.replace_one({"_id": job["id"]}, document, upsert=True)
+
+
+class JobQueue:
+    """
+    Queue of background jobs for the long tasks of the plugins (self.submit_job in the plugins),
+    the jobs run in a pool of threads or processes and the clients poll the status and the result
+    in /jobs/<id>. The results are saved result_ttl seconds after the end of the job.
+
+    In the process pool the function and the arguments should be picklable (ex: module functions),
+    joblib (loky) is used for the pool if it is installed.
+    """
+
+    def __init__(self, config, database=None, logger=None):
+        """
+        Parameters:
+        ____________
+        config:Config
+            jobs config (config.jobs)
+        database:Database
+            shared MongoDB client of the server for the mongodb store
+        """
+        self.config = config
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.store = self.make_store(config, database)
+        self.lock = threading.Lock()
+        self.pid = None
+        self._executor = None
+
+    @staticmethod
+    def make_store(config, database=None) -> JobStore:
+        """
+        Returns the store for the name in config.store (memory, mongodb or module:Class),
+        the mongodb store uses the shared client (database) if config.mongodb_url is empty.
+        """
+        return Database.make_backend(config, database, lambda: MemoryJobStore(config.max_jobs), MongoJobStore,
+                                     config.store)
+
+    @property
+    def executor(self):
+        """
+        Returns the pool of the current process, it is created the first time a job is submitted.
+        """
+        pid = os.getpid()
+        if self._executor is None or self.pid != pid:
+            with self.lock:
+                if self._executor is None or self.pid != pid:
+                    if self.config.pool == "process":
+                        try:
+                            from joblib.externals.loky import get_reusable_executor
+                            self._executor = get_reusable_executor(max_workers=self.config.workers)
+                        except ImportError:
+                            self._executor = ProcessPoolExecutor(max_workers=self.config.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.config.workers,
+                                                            thread_name_prefix="hunabku-job")
+                    self.pid = pid
+        return self._executor
+
+    @staticmethod
+    def now():
+        return datetime.now(timezone.utc).isoformat()
+
+    def _run(self, job, function, args, kwargs):
+        # the job dictionary is shared with _done, the start time is kept in the result
+        job.update(status="running", started=self.now())
+        self.store.set(job)
+        return function(*args, **kwargs)
+
+    def _done(self, job, future):
+        job = dict(job, finished=self.now())
+        try:
+            job["result"] = future.result()
+            job["status"] = "done"
+        except BaseException as e:
+            job["status"] = "failed"
+            job["error"] = f"{type(e).__name__}: {e}"
+            trace = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+            self.logger.error(f'------ERROR: job {job["id"]} failed\n{trace}')
+        self.store.set(job, self.config.result_ttl)
+
+    def submit(self, function, *args, **kwargs) -> str:
+        """
+        Runs function(*args, **kwargs) in the pool and returns the id of the job.
+        """
+        job = {"id": uuid.uuid4().hex, "status": "pending", "submitted": self.now(), "started": None,
+               "finished": None, "result": None, "error": None}
+        self.store.set(job)
+        if self.config.pool == "process":
+            future = self.executor.submit(function, *args, **kwargs)
+        else:
+            future = self.executor.submit(self._run, job, function, args, kwargs)
+        future.add_done_callback(lambda future: self._done(job, future))
+        return job["id"]
+
+    def get(self, job_id: str):
+        """
+        Returns the job (status and result) or None if it does not exist or it expired.
+        """
+        return self.store.get(job_id)
@@ -0,0 +1,201 @@
+from bisect import bisect_left
+import glob
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+
+class Metrics:
+    """
+    Latency histograms of the endpoints recorded by the decorator @endpoint, for every
+    registered route, HTTP method and status it saves the number of requests, the total time,
+    the total size of the responses and the number of requests in every latency bucket.
+    The percentiles (p50, p95, p99) are estimated from the buckets.
+
+    The metrics are in the memory of the process, in prefork mode set a directory (config.metrics.dir)
+    and every worker saves its metrics there every flush_interval seconds, /metrics returns the sum
+    of all the workers. The files have the id of the run (created in the master before the fork),
+    the files of the previous runs are removed, then the directory should not be shared by two servers.
+    """
+    default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    quantiles = (0.5, 0.95, 0.99)
+
+    def __init__(self, buckets: list = None, directory: str = "", flush_interval: float = 5, logger=None):
+        """
+        Parameters:
+        ____________
+        buckets:list
+            upper bounds in seconds of the latency buckets
+        directory:str
+            directory shared by the workers to save the metrics, empty to keep them only in memory
+        flush_interval:float
+            seconds between the saves of the metrics in the directory
+        """
+        self.buckets = tuple(sorted(buckets if buckets else self.default_buckets))
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.data = {}
+        self.lock = threading.Lock()
+        self.flushed = time.monotonic()
+        self.pid = os.getpid()
+        self.run = secrets.token_hex(4)
+        if self.directory:
+            # the workers of a previous run are not counted
+            for filename in glob.glob(os.path.join(self.directory, "metrics_*.json")):
+                try:
+                    os.remove(filename)
+                except OSError:
+                    pass
+
+    def filename(self, pid: int = None) -> str:
+        return os.path.join(self.directory, f"metrics_{self.run}_{pid if pid is not None else os.getpid()}.json")
+
+    def record(self, route: str, method: str, status: int, seconds: float, size: int):
+        """
+        Records a request.
+        """
+        key = f"{route}\t{method}\t{status}"
+        with self.lock:
+            if self.pid != os.getpid():
+                # forked worker, the metrics of the master are not counted again
+                self.data = {}
+                self.pid = os.getpid()
+            entry = self.data.get(key)
+            if entry is None:
+                entry = self.data[key] = [0, 0.0, 0, [0] * (len(self.buckets) + 1)]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += size
+            entry[3][bisect_left(self.buckets, seconds)] += 1
+        if self.directory and time.monotonic() - self.flushed > self.flush_interval:
+            self.flush()
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {key: [entry[0], entry[1], entry[2], list(entry[3])] for key, entry in self.data.items()}
+
+    def flush(self):
+        """
+        Saves the metrics of the process in the directory, the errors are logged
+        (the flush runs in the requests, a full disk should not fail them).
+        """
+        self.flushed = time.monotonic()
+        filename = self.filename()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(filename + ".tmp", "w") as f:
+                json.dump({"buckets": self.buckets, "data": self.snapshot()}, f)
+            os.replace(filename + ".tmp", filename)
+        except OSError as e:
+            self.logger.error(f'------ERROR: saving the metrics in {filename}: {e}')
+
+    def merged(self) -> dict:
+        """
+        Returns the metrics of this process plus the metrics saved by the other workers.
+        """
+        data = self.snapshot()
+        if not self.directory:
+            return data
+        own = self.filename()
+        for filename in glob.glob(os.path.join(self.directory, f"metrics_{self.run}_*.json")):
+            if filename == own:
+                continue
+            try:
+                with open(filename) as f:
+                    saved = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if tuple(saved.get("buckets", ())) != self.buckets:
+                continue
+            for key, entry in saved["data"].items():
+                if key not in data:
+                    data[key] = entry
+                    continue
+                total = data[key]
+                data[key] = [total[0] + entry[0], total[1] + entry[1], total[2] + entry[2],
+                             [a + b for a, b in zip(total[3], entry[3])]]
+        return data
+
+    def quantile(self, counts: list, q: float) -> float:
+        """
+        Returns the estimation of the quantile q for the counts of the buckets (linear interpolation in the bucket).
+        """
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if count > 0 and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    @staticmethod
+    def label(value) -> str:
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    def percentiles(self, data: dict = None) -> dict:
+        """
+        Returns the percentiles of the latency per (route, method) for all the statuses.
+        """
+        data = data if data is not None else self.merged()
+        endpoints = {}
+        for key, entry in data.items():
+            route, method, status = key.split("\t")
+            counts = endpoints.setdefault((route, method), [0] * (len(self.buckets) + 1))
+            for i, count in enumerate(entry[3]):
+                counts[i] += count
+        return {endpoint: {q: self.quantile(counts, q) for q in self.quantiles}
+                for endpoint, counts in endpoints.items()}
+
+    def render(self, gauges: dict = None) -> str:
+        """
+        Returns the metrics in the Prometheus text format.
+
+        Parameters:
+        ____________
+        gauges:dict
+            extra gauges, name -> value
+        """
+        data = self.merged()
+        lines = ["# HELP hunabku_requests_total Number of requests per endpoint and status.",
+                 "# TYPE hunabku_requests_total counter"]
+        for key, entry in sorted(data.items()):
+            route, method, status = map(self.label, key.split("\t"))
+            lines.append(f'hunabku_requests_total{{route="{route}",method="{method}",status="{status}"}} {entry[0]}')
+        lines += ["# HELP hunabku_request_duration_seconds Latency of the requests per endpoint and status.",
+                  "# TYPE hunabku_request_duration_seconds histogram"]
+        for key, entry in sorted(data.items()):
+            route, method, status = map(self.label, key.split("\t"))
+            labels = f'route="{route}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), entry[3]):
+                cumulative += count
+                lines.append(f'hunabku_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'hunabku_request_duration_seconds_sum{{{labels}}} {entry[1]}')
+            lines.append(f'hunabku_request_duration_seconds_count{{{labels}}} {entry[0]}')
+        lines += ["# HELP hunabku_response_size_bytes Size of the responses per endpoint and status.",
+                  "# TYPE hunabku_response_size_bytes summary"]
+        for key, entry in sorted(data.items()):
+            route, method, status = map(self.label, key.split("\t"))
+            labels = f'route="{route}",method="{method}",status="{status}"'
+            lines.append(f'hunabku_response_size_bytes_sum{{{labels}}} {entry[2]}')
+            lines.append(f'hunabku_response_size_bytes_count{{{labels}}} {entry[0]}')
+        lines += ["# HELP hunabku_request_latency_seconds Latency percentiles per endpoint (estimated from the buckets).",
+                  "# TYPE hunabku_request_latency_seconds gauge"]
+        for (route, method), values in sorted(self.percentiles(data).items()):
+            for q, value in values.items():
+                lines.append(f'hunabku_request_latency_seconds{{route="{self.label(route)}",method="{method}",'
+                             f'quantile="{q}"}} {value}')
+        for name, value in sorted((gauges or {}).items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,188 @@
+from hunabku.ApiDocParser import ApiDocParser
+import gzip
+import hashlib
+import json
+import re
+
+
+class OpenApi:
+    """
+    OpenAPI 3 document generated from the endpoints registered with @endpoint
+    (path, methods, class and function) and the parameters in the apidoc docstrings.
+
+    The document is serialized once, compressed with gzip and saved in memory with its ETag,
+    it is generated again only if the registered endpoints change.
+    """
+    variable = re.compile(r"<(?:(?P<converter>[a-zA-Z_][a-zA-Z0-9_]*)(?:\([^)]*\))?:)?(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)>")
+    converters = {"int": {"type": "integer"}, "float": {"type": "number"},
+                  "uuid": {"type": "string", "format": "uuid"}}
+    types = {"number": "number", "integer": "integer", "int": "integer", "float": "number", "boolean": "boolean",
+             "bool": "boolean", "object": "object", "array": "array"}
+
+    def __init__(self, title: str = "Hunabku", version: str = "0.0.0", server_url: str = None,
+                 apikey_header: str = "X-API-Key"):
+        """
+        Parameters:
+        ____________
+        title:str
+            title of the API
+        version:str
+            version of the API
+        server_url:str
+            url of the server
+        apikey_header:str
+            HTTP header with the apikey (config.apikeys.header)
+        """
+        self.title = title
+        self.version = version
+        self.server_url = server_url
+        self.apikey_header = apikey_header
+        self.parser = ApiDocParser()
+        self.fingerprint = None
+        self.spec = {}
+        self.body = b""
+        self.gzip_body = b""
+        self.etag = ""
+
+    def path(self, rule: str):
+        """
+        Returns the path with the OpenAPI syntax (/a/<int:id> -> /a/{id}) and the path parameters.
+        """
+        parameters = []
+        for match in self.variable.finditer(rule):
+            schema = self.converters.get(match.group("converter"), {"type": "string"})
+            parameters.append({"name": match.group("name"), "in": "path", "required": True, "schema": dict(schema)})
+        return self.variable.sub(lambda match: "{" + match.group("name") + "}", rule), parameters
+
+    def schema(self, field_type: str) -> dict:
+        """
+        Returns the json schema for an apidoc type ex: {Number}, {String[]}
+        """
+        if field_type.endswith("[]"):
+            return {"type": "array", "items": self.schema(field_type[:-2])}
+        return {"type": self.types.get(field_type.lower(), "string")}
+
+    def field_schema(self, field: dict) -> dict:
+        schema = self.schema(field["type"])
+        if "allowedValues" in field:
+            schema["enum"] = [value.strip("\"'") for value in field["allowedValues"]]
+        if "defaultValue" in field:
+            schema["default"] = field["defaultValue"]
+        if "size" in field:
+            # apidoc size: {Number{1-100}} or {String{2..5}}
+            match = re.match(r"^(-?[0-9.]*)(?:\.\.|-)(-?[0-9.]*)$", field["size"])
+            if match is not None:
+                keys = ("minLength", "maxLength") if schema["type"] == "string" else ("minimum", "maximum")
+                for key, value in zip(keys, match.groups()):
+                    if value != "":
+                        schema[key] = int(value) if schema["type"] in ("string", "integer") else float(value)
+        return schema
+
+    def description(self, text: str) -> str:
+        return re.sub(r"</?p>", "", text or "").strip()
+
+    def operation(self, package_name: str, register: dict, path_parameters: list, method: str) -> dict:
+        """
+        Returns the OpenAPI operation for one method of an endpoint.
+        """
+        blocks, errors = self.parser.parse(register.get('doc'))
+        if len(blocks) == 0 and register.get('params'):
+            blocks = [{}]
+        self.parser.add_fields(blocks, register.get('params'))
+        block = blocks[0] if len(blocks) > 0 else {}
+        operation = {
+            "operationId": f"{package_name}.{register['class_name']}.{register['func_name']}.{method}",
+            "tags": [block.get("group", package_name)],
+            "summary": block.get("title", register['func_name']),
+            "parameters": [dict(parameter) for parameter in path_parameters],
+            "responses": {"200": {"description": "Success"}},
+        }
+        if "description" in block:
+            operation["description"] = self.description(block["description"])
+        names = {parameter["name"] for parameter in path_parameters}
+        fields = [field for group in block.get("parameter", {}).get("fields", {}).values() for field in group]
+        fields += [field for group in block.get("query", {}).get("fields", {}).values() for field in group]
+        body = {}
+        for field in fields:
+            if field["field"] in names:
+                continue
+            if method in ("get", "head", "delete"):
+                operation["parameters"].append({"name": field["field"], "in": "query", "required": not field["optional"],
+                                                "description": self.description(field["description"]),
+                                                "schema": self.field_schema(field)})
+            else:
+                body[field["field"]] = field
+        if len(body) > 0:
+            operation["requestBody"] = {"content": {"application/x-www-form-urlencoded": {"schema": {
+                "type": "object",
+                "properties": {name: self.field_schema(field) for name, field in body.items()},
+                "required": [name for name, field in body.items() if not field["optional"]]}}}}
+        success = [field for group in block.get("success", {}).get("fields", {}).values() for field in group]
+        if len(success) > 0:
+            operation["responses"]["200"]["content"] = {"application/json": {"schema": {
+                "type": "object",
+                "properties": {field["field"]: dict(self.field_schema(field),
+                                                    description=self.description(field["description"]))
+                               for field in success}}}}
+        return operation
+
+    def build(self, endpoints: dict) -> dict:
+        """
+        Builds the OpenAPI document, if the endpoints did not change the last document is kept.
+
+        Parameters:
+        ____________
+        endpoints:dict
+            dictionary package name -> list of registers (see HunabkuPluginBase.get_global_endpoints)
+        """
+        fingerprint = hashlib.sha256(json.dumps(
+            [(package_name, [(register['path'], register['methods'], register['class_name'],
+                              register['func_name'], register['file'], register.get('doc'), register.get('params'))
+                             for register in registers])
+             for package_name, registers in sorted(endpoints.items())], default=str).encode()).hexdigest()
+        if fingerprint == self.fingerprint:
+            return self.spec
+        paths = {}
+        for package_name, registers in sorted(endpoints.items()):
+            for register in registers:
+                path, path_parameters = self.path(register['path'])
+                for method in register['methods']:
+                    method = method.lower()
+                    paths.setdefault(path, {})[method] = self.operation(package_name, register, path_parameters, method)
+        spec = {
+            "openapi": "3.0.3",
+            "info": {"title": self.title, "version": self.version},
+            "paths": paths,
+            "components": {"securitySchemes": {
+                "apikey": {"type": "apiKey", "in": "query", "name": "apikey"},
+                "apikey_header": {"type": "apiKey", "in": "header", "name": self.apikey_header}}},
+        }
+        if self.server_url is not None:
+            spec["servers"] = [{"url": self.server_url}]
+        self.spec = spec
+        self.body = json.dumps(spec).encode()
+        self.gzip_body = gzip.compress(self.body, 9)
+        self.etag = hashlib.sha256(self.body).hexdigest()
+        self.fingerprint = fingerprint
+        return spec
+
+    def response(self, app, request):
+        """
+        Returns the flask response with the document, 304 if the ETag did not change and gzip if the client accepts it.
+        The gzip body has its own ETag (etag-gz), the client gets 304 with the ETag of any of the two bodies.
+        """
+        gzip_etag = self.etag + "-gz"
+        if request.accept_encodings["gzip"] > 0:
+            response = app.response_class(response=self.gzip_body, status=200, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(gzip_etag)
+        else:
+            response = app.response_class(response=self.body, status=200, mimetype='application/json')
+            response.set_etag(self.etag)
+        if request.if_none_match.contains(self.etag) or request.if_none_match.contains(gzip_etag):
+            response.status_code = 304
+            response.set_data(b"")
+            response.headers.pop('Content-Length', None)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
@@ -0,0 +1,140 @@
+import base64
+import hashlib
+import hmac
+
+
+class Paginator:
+    """
+    Cursor based pagination for MongoDB collections, the pages are read with a range query
+    on an indexed key (key > last value of the previous page) instead of skip/limit,
+    so the time to read a page does not depend on the page number.
+
+    The position is sent to the client in an opaque token signed with a secret,
+    the clients can not build or change the tokens.
+    The key does not need to be unique, _id is used to break the ties (create an index on key and _id).
+    """
+
+    def __init__(self, secret: str, default_page_size: int = 100, max_page_size: int = 1000):
+        """
+        Parameters:
+        ____________
+        secret:str
+            secret to sign the tokens
+        default_page_size:int
+            page size if the client does not send one
+        max_page_size:int
+            max page size allowed
+        """
+        self.secret = secret.encode()
+        self.default_page_size = default_page_size
+        self.max_page_size = max_page_size
+
+    def signature(self, payload: bytes) -> str:
+        digest = hmac.new(self.secret, payload, hashlib.sha256).digest()[:16]
+        return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+    def encode(self, key: str, direction: int, values: list) -> str:
+        """
+        Returns the token for the position after values (value of the key and _id of the last document).
+        """
+        from bson import json_util
+        payload = json_util.dumps({"k": key, "d": direction, "v": values}).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=") + "." + self.signature(payload)
+
+    def decode(self, token: str, key: str, direction: int) -> list:
+        """
+        Returns the values saved in the token, ValueError is raised if the token is not valid
+        or it was created for other key or direction.
+        """
+        from bson import json_util
+        try:
+            encoded, signature = token.split(".")
+            payload = base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4))
+            valid = hmac.compare_digest(signature, self.signature(payload))
+        except (ValueError, TypeError):
+            raise ValueError("invalid cursor")
+        if not valid:
+            raise ValueError("invalid cursor signature")
+        data = json_util.loads(payload)
+        if data.get("k") != key or data.get("d") != direction or len(data.get("v", [])) != 2:
+            raise ValueError("the cursor was created for other query")
+        return data["v"]
+
+    def page_size(self, value) -> int:
+        """
+        Returns the page size for the value sent by the client, ValueError is raised if it is not valid.
+        """
+        if value is None or value == "":
+            return self.default_page_size
+        page_size = int(value)
+        if page_size < 1 or page_size > self.max_page_size:
+            raise ValueError(f"page_size should be between 1 and {self.max_page_size}")
+        return page_size
+
+    def filter(self, query: dict, key: str, direction: int, values: list = None) -> dict:
+        """
+        Returns the MongoDB filter for the documents after values.
+        """
+        query = dict(query or {})
+        if values is None:
+            return query
+        operator = "$gt" if direction == 1 else "$lt"
+        value, _id = values
+        if key == "_id":
+            position = {"_id": {operator: _id}}
+        else:
+            # $eq: a value that is a dictionary is compared as a value, it is never read as operators
+            position = {"$or": [{key: {operator: value}}, {key: {"$eq": value}, "_id": {operator: _id}}]}
+        if len(query) == 0:
+            return position
+        return {"$and": [query, position]}
+
+    def value(self, document: dict, key: str):
+        """
+        Returns the value of the key in the document, the key can be a path (ex: "year.published")
+        """
+        for name in key.split("."):
+            if not isinstance(document, dict):
+                return None
+            document = document.get(name)
+        return document
+
+    def sort(self, key: str, direction: int) -> list:
+        if key == "_id":
+            return [("_id", direction)]
+        return [(key, direction), ("_id", direction)]
+
+    def page(self, collection, query: dict = None, key: str = "_id", direction: int = 1, token: str = None,
+             page_size: int = None, projection: dict = None):
+        """
+        Returns the documents of the page and the token of the next page (None if it is the last page).
+
+        Parameters:
+        ____________
+        collection:Collection
+            pymongo collection
+        query:dict
+            MongoDB filter
+        key:str
+            indexed key to sort the documents
+        direction:int
+            1 ascending, -1 descending
+        token:str
+            token of the page (None for the first page)
+        page_size:int
+            number of documents in the page
+        projection:dict
+            MongoDB projection (key and _id are always returned)
+        """
+        page_size = page_size if page_size is not None else self.default_page_size
+        values = self.decode(token, key, direction) if token else None
+        if projection is not None and any(projection.values()):
+            projection = dict(projection, **{key: 1, "_id": 1})
+        cursor = collection.find(self.filter(query, key, direction, values), projection)
+        documents = list(cursor.sort(self.sort(key, direction)).limit(page_size + 1))
+        next_token = None
+        if len(documents) > page_size:
+            documents = documents[:page_size]
+            last = documents[-1]
+            next_token = self.encode(key, direction, [self.value(last, key), last["_id"]])
+        return documents, next_token
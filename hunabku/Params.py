@@ -0,0 +1,149 @@
+import re
+
+
+class ParamsSchema:
+    """
+    Schema of the parameters (query string or form) of an endpoint, @endpoint(path, methods, params={...}).
+    The schema is compiled once when the endpoint is registered, in every request the values are converted
+    to their types, the defaults are set and the limits are checked before the method is called, the method
+    gets the values as keyword arguments. The unknown parameters are errors (the apikey is always allowed).
+
+    Every parameter is a type (int, float, str, bool) or a dictionary with the options:
+        type: int, float, str or bool (str by default)
+        required: the request without the parameter is an error (False by default)
+        default: value if the parameter is not sent (None by default)
+        min, max: limits of the value (int, float) or of the length (str)
+        enum: list of the allowed values
+        list: the parameter has several values (?id=1&id=2 or ?id=1,2), the method gets a list
+        doc: description for the docs
+
+    example:
+    @endpoint('/works', methods=['GET'], params={"page": {"type": int, "default": 1, "min": 1},
+                                                 "sort": {"enum": ["year", "title"], "default": "year"},
+                                                 "id": {"type": str, "list": True}})
+    def works(self, page, sort, id):
+    """
+    options = {"type", "required", "default", "min", "max", "enum", "list", "doc"}
+    # apidoc names of the types
+    type_names = {int: "Integer", float: "Number", str: "String", bool: "Boolean"}
+    true_values = {"", "1", "true", "yes", "on"}
+    false_values = {"0", "false", "no", "off"}
+
+    def __init__(self, params: dict):
+        """
+        Parameters:
+        ____________
+        params:dict
+            parameter name -> type or dictionary of options
+        """
+        self.params = {}
+        for name, spec in params.items():
+            if not isinstance(spec, dict):
+                spec = {"type": spec}
+            unknown = set(spec) - self.options
+            if unknown:
+                raise ValueError(f"unknown options {sorted(unknown)} for the parameter {name}")
+            spec = dict(spec, type=spec.get("type", str))
+            if spec["type"] not in self.type_names:
+                raise ValueError(f"the type of the parameter {name} should be int, float, str or bool")
+            self.params[name] = spec
+        self.names = frozenset(self.params) | {"apikey"}
+        self.compiled = [self._compile(name, spec) for name, spec in self.params.items()]
+
+    def _convert_bool(self, value: str) -> bool:
+        value = value.lower()
+        if value in self.true_values:
+            return True
+        if value in self.false_values:
+            return False
+        raise ValueError(value)
+
+    def _compile(self, name, spec):
+        """
+        Returns the tuple (name, function that converts and checks a value, required, default, list).
+        """
+        kind = spec["type"]
+        convert = self._convert_bool if kind is bool else kind
+        type_name = self.type_names[kind].lower()
+        minimum = spec.get("min")
+        maximum = spec.get("max")
+        enum = frozenset(spec["enum"]) if spec.get("enum") is not None else None
+        measure = len if kind is str else (lambda value: value)
+        unit = " characters" if kind is str else ""
+
+        def check(raw):
+            try:
+                value = convert(raw)
+            except ValueError:
+                return None, f"should be {type_name}"
+            if minimum is not None and measure(value) < minimum:
+                return None, f"should be at least {minimum}{unit}"
+            if maximum is not None and measure(value) > maximum:
+                return None, f"should be at most {maximum}{unit}"
+            if enum is not None and value not in enum:
+                return None, f"should be one of {', '.join(map(str, spec['enum']))}"
+            return value, None
+        return name, check, bool(spec.get("required", False)), spec.get("default"), bool(spec.get("list", False))
+
+    def validate(self, args):
+        """
+        Returns the typed values of the parameters and the list of errors ({"param": name, "msg": message}).
+
+        Parameters:
+        ____________
+        args:MultiDict
+            parameters of the request (request.values)
+        """
+        values = {}
+        errors = [{"param": name, "msg": "unknown parameter"} for name in args if name not in self.names]
+        for name, check, required, default, is_list in self.compiled:
+            if is_list:
+                raw = [item for value in args.getlist(name) for item in value.split(",")]
+            else:
+                raw = args.get(name)
+            if raw is None or raw == []:
+                if required:
+                    errors.append({"param": name, "msg": "required parameter"})
+                else:
+                    values[name] = list(default) if is_list and default is not None else default
+                continue
+            if not is_list:
+                values[name], msg = check(raw)
+                if msg is not None:
+                    errors.append({"param": name, "msg": msg})
+                continue
+            values[name] = []
+            for item in raw:
+                value, msg = check(item)
+                if msg is not None:
+                    errors.append({"param": name, "msg": msg})
+                    break
+                values[name].append(value)
+        return values, errors
+
+    def fields(self) -> list:
+        """
+        Returns the parameters with the structure of the fields of apidoc (api_data.json),
+        they are added to the docs of the endpoint (see ApiDocParser.add_fields and OpenApi).
+        """
+        fields = []
+        for name, spec in self.params.items():
+            field_type = self.type_names[spec["type"]] + ("[]" if spec.get("list") else "")
+            field = {"group": "Parameter", "type": field_type, "optional": not spec.get("required", False),
+                     "field": name, "isArray": bool(spec.get("list")), "description": spec.get("doc", "")}
+            if spec.get("default") is not None:
+                field["defaultValue"] = str(spec["default"])
+            if spec.get("min") is not None or spec.get("max") is not None:
+                separator = ".." if spec["type"] is str else "-"
+                field["size"] = f"{spec.get('min', '')}{separator}{spec.get('max', '')}"
+            if spec.get("enum") is not None:
+                field["allowedValues"] = [str(value) for value in spec["enum"]]
+            fields.append(field)
+        return fields
+
+    @staticmethod
+    def path_variables(path: str) -> set:
+        """
+        Returns the names of the variables of a flask path (/a/<int:id> -> {"id"}).
+        """
+        return set(re.findall(r"<(?:[^<>:]+:)?([a-zA-Z_][a-zA-Z0-9_]*)>", path))
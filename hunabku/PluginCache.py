@@ -0,0 +1,111 @@
+from hunabku._version import get_version
+import importlib.metadata
+import json
+import os
+
+
+class PluginCache:
+    """
+    On-disk manifest of the plugins, for every module in the endpoints folder of a plugin package
+    it saves the plugin classes (subclasses of HunabkuPluginBase). The endpoints are not saved,
+    they are declared by @endpoint when the module is imported.
+
+    The entries are valid while the version of the package and the mtime and size of the module file
+    are the same, then the modules without plugin classes are not imported and the plugin classes
+    are taken from the module without introspection.
+    """
+
+    def __init__(self, filename: str, enabled: bool = True):
+        """
+        Parameters:
+        ____________
+        filename:str
+            json file to save the manifest
+        enabled:bool
+            if False the cache is not read or written
+        """
+        self.filename = filename
+        self.enabled = enabled
+        self.data = {"hunabku": get_version(), "packages": {}}
+        self.current = {"hunabku": get_version(), "packages": {}}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """
+        Reads the manifest from disk, the manifest is discarded if it was written by other Hunabku version.
+        """
+        self.current = {"hunabku": get_version(), "packages": {}}
+        self.hits = 0
+        self.misses = 0
+        if not self.enabled or not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename) as json_file:
+                data = json.load(json_file)
+        except (OSError, ValueError):
+            return
+        if data.get("hunabku") == get_version():
+            self.data = data
+
+    def clear(self):
+        """
+        Removes the manifest, the next load of plugins introspects all the modules.
+        """
+        self.data = {"hunabku": get_version(), "packages": {}}
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def package_version(self, package_name: str, module) -> str:
+        """
+        Returns the version of the plugin package, from the distribution metadata or the module __version__.
+        """
+        try:
+            return importlib.metadata.version(package_name)
+        except importlib.metadata.PackageNotFoundError:
+            return str(getattr(module, "__version__", "unknown"))
+
+    def lookup(self, package_name: str, version: str, path: str):
+        """
+        Returns the manifest entry for the module in path or None if the module changed.
+        """
+        if not self.enabled:
+            return None
+        package = self.data["packages"].get(package_name)
+        entry = None
+        if package is not None and package["version"] == version:
+            entry = package["files"].get(path)
+        if entry is not None:
+            stat = os.stat(path)
+            if entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                entry = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._set(package_name, version, path, entry)
+        return entry
+
+    def store(self, package_name: str, version: str, path: str, classes: list):
+        """
+        Saves the plugin classes found in the module in path.
+        """
+        stat = os.stat(path)
+        entry = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "classes": classes}
+        self._set(package_name, version, path, entry)
+
+    def _set(self, package_name, version, path, entry):
+        package = self.current["packages"].setdefault(package_name, {"version": version, "files": {}})
+        package["files"][path] = entry
+
+    def save(self):
+        """
+        Writes the manifest with the entries used in the last load, only if something changed.
+        """
+        if not self.enabled or self.current == self.data:
+            return
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w") as json_file:
+            json.dump(self.current, json_file)
+        os.replace(tmp_filename, self.filename)
+        self.data = self.current
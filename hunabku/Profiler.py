@@ -0,0 +1,164 @@
+from collections import Counter
+import glob
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+
+class Profiler:
+    """
+    Sampling profiler for the requests of the endpoints, a thread of the worker takes the stack
+    of the threads that are handling requests every interval seconds, the code of the endpoints
+    is not instrumented so the overhead is low.
+
+    The profile of a request is saved if its latency is above threshold or if the request was
+    selected in the random sample (sample_rate) of the routes (all the routes if the list is empty).
+    The profiles are saved in the folded stacks format (one line per stack with the number of samples)
+    supported by flamegraph.pl and speedscope, the oldest files are removed when there are more than
+    max_files files or max_bytes bytes in the directory.
+    """
+
+    def __init__(self, directory: str, threshold: float = 1.0, sample_rate: float = 0.0, routes: list = None,
+                 max_files: int = 100, max_bytes: int = 50 * 1024 * 1024, interval: float = 0.005, logger=None):
+        """
+        Parameters:
+        ____________
+        directory:str
+            directory for the profiles
+        threshold:float
+            the requests slower than threshold seconds are saved, 0 to disable
+        sample_rate:float
+            fraction of the requests of the routes that are saved (0 to 1)
+        routes:list
+            paths of the endpoints (as registered in @endpoint) for the random sample, empty for all
+        max_files:int
+            max number of profiles in the directory
+        max_bytes:int
+            max size of the profiles in the directory
+        interval:float
+            seconds between samples
+        """
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.routes = set(routes or [])
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.active = {}
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def _start_sampler(self):
+        pid = os.getpid()
+        if self.pid == pid:
+            return
+        with self.lock:
+            if self.pid != pid:
+                self.active = {}
+                threading.Thread(target=self._sample, name="hunabku-profiler", daemon=True).start()
+                self.pid = pid
+
+    def _sample(self):
+        while True:
+            time.sleep(self.interval)
+            # the stacks are updated with the lock, stop does not return while a sample is taken
+            with self.lock:
+                if len(self.active) == 0:
+                    continue
+                frames = sys._current_frames()
+                for record in self.active.values():
+                    frame = frames.get(record["thread"])
+                    if frame is None:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    record["stacks"][";".join(reversed(stack))] += 1
+                del frames
+
+    def start(self, route: str):
+        """
+        Starts the profile of a request in the current thread, it returns None if the request is not profiled.
+        """
+        sampled = self.sample_rate > 0 and (len(self.routes) == 0 or route in self.routes) \
+            and random.random() < self.sample_rate
+        if not sampled and self.threshold <= 0:
+            return None
+        self._start_sampler()
+        record = {"thread": threading.get_ident(), "route": route, "sampled": sampled, "stacks": Counter()}
+        with self.lock:
+            self.active[id(record)] = record
+        return record
+
+    def stop(self, record: dict, method: str, status: int, seconds: float):
+        """
+        Ends the profile of a request and saves it if it is slow or sampled.
+        """
+        with self.lock:
+            self.active.pop(id(record), None)
+        if record["sampled"] or (self.threshold > 0 and seconds >= self.threshold):
+            try:
+                self.save(record, method, status, seconds)
+            except OSError as e:
+                self.logger.error(f'------ERROR: saving profile of {record["route"]}: {e}')
+
+    def save(self, record: dict, method: str, status: int, seconds: float):
+        """
+        Saves the profile and removes the oldest profiles if the limits are exceeded.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        route = re.sub(r"[^a-zA-Z0-9]+", "_", record["route"]).strip("_") or "root"
+        reason = "sample" if record["sampled"] else "slow"
+        name = (f"{time.strftime('%Y%m%dT%H%M%S')}_{os.getpid()}_{route}_{int(seconds * 1000)}ms_{reason}"
+                f"_{random.getrandbits(24):06x}.folded")
+        lines = [f"# route={record['route']} method={method} status={status} seconds={seconds:.6f} "
+                 f"interval={self.interval} samples={sum(record['stacks'].values())}"]
+        lines += [f"{stack} {count}" for stack, count in record["stacks"].most_common()]
+        filename = os.path.join(self.directory, name)
+        with open(filename + ".tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(filename + ".tmp", filename)
+        self.rotate()
+        return name
+
+    def profiles(self) -> list:
+        """
+        Returns the list of the saved profiles (name, size and modification time), the newest first.
+        """
+        profiles = []
+        for filename in glob.glob(os.path.join(self.directory, "*.folded")):
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            profiles.append({"name": os.path.basename(filename), "size": stat.st_size, "mtime": stat.st_mtime})
+        profiles.sort(key=lambda profile: profile["mtime"], reverse=True)
+        return profiles
+
+    def rotate(self):
+        profiles = self.profiles()
+        total = sum(profile["size"] for profile in profiles)
+        while profiles and (len(profiles) > self.max_files or total > self.max_bytes):
+            profile = profiles.pop()
+            total -= profile["size"]
+            try:
+                os.remove(os.path.join(self.directory, profile["name"]))
+            except OSError:
+                pass
+
+    def path(self, name: str):
+        """
+        Returns the path of a profile or None if the name is not a saved profile.
+        """
+        if os.path.basename(name) != name or not name.endswith(".folded"):
+            return None
+        filename = os.path.join(self.directory, name)
+        return filename if os.path.isfile(filename) else None
@@ -0,0 +1,198 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from hunabku.Database import Database
+import math
+import threading
+import time
+
+
+class RateLimitBackend:
+    """
+    Base class for the rate limit backends, a backend counts the hits of a key
+    and returns if the request is allowed.
+    """
+
+    def hit(self, key: str, rate: float, period: float, burst: int):
+        """
+        Registers a request for the key.
+
+        Parameters:
+        ____________
+        key:str
+            apikey (or client address) and endpoint
+        rate:float
+            number of requests allowed in period
+        period:float
+            seconds
+        burst:int
+            number of requests allowed at once
+
+        Returns:
+        ___________
+        tuple: (allowed:bool, retry_after:float seconds to wait if not allowed)
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token bucket in the memory of the process, every key has a bucket of burst tokens
+    refilled at rate/period tokens per second. The number of buckets is bounded (LRU).
+    With several workers (prefork) every worker has its own buckets, use a shared backend
+    to apply the limits to the whole server.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def hit(self, key, rate, period, burst):
+        now = time.monotonic()
+        refill = rate / period
+        with self.lock:
+            tokens, last = self.buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - last) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        if allowed:
+            return True, 0
+        return False, (1 - tokens) / refill
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+    """
+    Sliding window counter saved in MongoDB, shared by all the workers and servers.
+    The counters of the current and previous windows are documents with a TTL index.
+    The window allows rate requests per period, the burst option is not used by this backend.
+    """
+
+    def __init__(self, database, db: str = "hunabku", collection: str = "ratelimit"):
+        """
+        Parameters:
+        ____________
+        database:Database
+            shared MongoDB client (see hunabku.Database)
+        db:str
+            database name
+        collection:str
+            collection name
+        """
+        self.database = database
+        self.db = db
+        self.collection_name = collection
+
+    @property
+    def collection(self):
+        return self.database.ttl_collection(self.db, self.collection_name)
+
+    def hit(self, key, rate, period, burst):
+        from pymongo import ReturnDocument
+        now = time.time()
+        window = int(now // period)
+        current = self.collection.find_one_and_update(
+            {"_id": f"{key}:{window}"},
+            {"$inc": {"count": 1},
+             "$setOnInsert": {"expire": datetime.now(timezone.utc) + timedelta(seconds=2 * period)}},
+            upsert=True, return_document=ReturnDocument.AFTER)
+        previous = self.collection.find_one({"_id": f"{key}:{window - 1}"}) or {"count": 0}
+        elapsed = now / period - window
+        count = previous["count"] * (1 - elapsed) + current["count"]
+        if count <= rate:
+            return True, 0
+        return False, period * (1 - elapsed)
+
+    def clear(self):
+        self.collection.delete_many({})
+
+
+class RateLimiter:
+    """
+    Per apikey and endpoint rate limiter used by the decorator @endpoint before the view function.
+    The limits are taken from config.ratelimit and they can be changed for every plugin class
+    with the same options in the plugin config, ex:
+
+    class Hello(HunabkuPluginBase):
+        config = Config()
+        config.ratelimit += Param(rate=10, doc="requests per period for this plugin")
+    """
+    options = ("enabled", "rate", "period", "burst")
+
+    def __init__(self, config, backend: RateLimitBackend = None, database=None):
+        """
+        Parameters:
+        ____________
+        config:Config
+            server config, the options are in config.ratelimit
+        backend:RateLimitBackend
+            backend for the counters, by default the one in config.ratelimit.backend
+        database:Database
+            shared MongoDB client of the server for the mongodb backend
+        """
+        self.config = config
+        self.backend = backend if backend is not None else self.make_backend(config.ratelimit, database)
+        self.limits = {}
+
+    @staticmethod
+    def make_backend(config, database=None) -> RateLimitBackend:
+        """
+        Returns the backend for the name in config.backend (memory, mongodb or module:Class),
+        the mongodb backend uses the shared client (database) if config.mongodb_url is empty.
+        """
+        return Database.make_backend(config, database, MemoryRateLimitBackend, MongoRateLimitBackend)
+
+    def limit(self, plugin, path):
+        """
+        Returns the (rate, period, burst) for the plugin endpoint or None if it is not limited,
+        the result is saved until clear is called.
+        """
+        key = (id(plugin), path)
+        if key in self.limits:
+            return self.limits[key]
+        options = {option: self.config.ratelimit.get(option) for option in self.options}
+        plugin_config = plugin.config.get("ratelimit")
+        if plugin_config is not None:
+            for option in self.options:
+                if plugin_config.get(option) is not None:
+                    options[option] = plugin_config.get(option)
+        limit = None
+        if options["enabled"]:
+            burst = options["burst"] if options["burst"] else math.ceil(options["rate"])
+            limit = (float(options["rate"]), float(options["period"]), int(burst))
+        self.limits[key] = limit
+        return limit
+
+    def clear(self):
+        """
+        Removes the limits saved for the plugins, call it if the config changes.
+        """
+        self.limits = {}
+
+    def check(self, plugin, path):
+        """
+        Returns None if the request is allowed or the 429 response if it is not.
+        """
+        limit = self.limit(plugin, path)
+        if limit is None:
+            return None
+        apikey = plugin.get_apikey()
+        # the unknown or revoked keys are limited by address, random keys do not get new buckets
+        if plugin.hunabku.apikeys.validate(apikey):
+            client = "key:" + plugin.hunabku.apikeys.hash(apikey)
+        else:
+            client = "ip:" + str(plugin.request.remote_addr)
+        allowed, retry_after = self.backend.hit(f"{client}:{path}", *limit)
+        if allowed:
+            return None
+        return plugin.ratelimit_error(retry_after)
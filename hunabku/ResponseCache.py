@@ -0,0 +1,199 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from hunabku.Database import Database
+from urllib.parse import urlencode
+import re
+import threading
+import time
+
+
+class ResponseCacheBackend:
+    """
+    Base class for the response cache backends, the entries are saved with a key
+    that starts with the path of the request (see ResponseCache.key).
+    """
+
+    def get(self, key: str):
+        """
+        Returns the entry (body, status, headers) of the key or None if it is not found or it expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, entry: tuple, ttl: float):
+        """
+        Saves the entry (body, status, headers) for ttl seconds.
+        """
+        raise NotImplementedError
+
+    def invalidate(self, prefix: str = ""):
+        """
+        Removes the entries with a key that starts with prefix, all the entries by default.
+        """
+        raise NotImplementedError
+
+
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    """
+    LRU cache in the memory of the process with at most max_entries entries.
+    With several workers (prefork) every worker has its own cache and the invalidations
+    only remove the entries of the worker that handles the request, use a shared backend
+    if the plugins invalidate the cache after writes.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            expire, entry = item
+            if expire < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, ttl):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, entry)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, prefix=""):
+        with self.lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+
+
+class MongoResponseCacheBackend(ResponseCacheBackend):
+    """
+    Cache saved in a MongoDB collection with a TTL index, shared by all the workers and servers.
+    """
+
+    def __init__(self, database, db: str = "hunabku", collection: str = "response_cache"):
+        """
+        Parameters:
+        ____________
+        database:Database
+            shared MongoDB client (see hunabku.Database)
+        db:str
+            database name
+        collection:str
+            collection name
+        """
+        self.database = database
+        self.db = db
+        self.collection_name = collection
+
+    @property
+    def collection(self):
+        return self.database.ttl_collection(self.db, self.collection_name)
+
+    def get(self, key):
+        document = self.collection.find_one({"_id": key, "expire": {"$gt": datetime.now(timezone.utc)}})
+        if document is None:
+            return None
+        return document["body"], document["status"], [tuple(header) for header in document["headers"]]
+
+    def set(self, key, entry, ttl):
+        body, status, headers = entry
+        self.collection.replace_one(
+            {"_id": key},
+            {"body": body, "status": status, "headers": [list(header) for header in headers],
+             "expire": datetime.now(timezone.utc) + timedelta(seconds=ttl)},
+            upsert=True)
+
+    def invalidate(self, prefix=""):
+        self.collection.delete_many({"_id": {"$regex": "^" + re.escape(prefix)}})
+
+
+class ResponseCache:
+    """
+    Cache of the responses of the endpoints declared with @endpoint(..., cache=ttl).
+    Only GET and HEAD requests with status 200 are saved, the key is the path of the request,
+    the query string (sorted and without the apikey) and the scopes of the apikey, so clients
+    with the same permissions share the entries and the apikey check of the endpoint is not skipped
+    for clients with different permissions.
+
+    The plugins can remove the entries after writes with self.invalidate_cache(prefix).
+    """
+    # headers that are not saved in the cache
+    skip_headers = {"content-length", "set-cookie", "x-cache"}
+
+    def __init__(self, config, backend: ResponseCacheBackend = None, database=None):
+        """
+        Parameters:
+        ____________
+        config:Config
+            server config, the options are in config.cache
+        backend:ResponseCacheBackend
+            backend for the entries, by default the one in config.cache.backend
+        database:Database
+            shared MongoDB client of the server for the mongodb backend
+        """
+        self.config = config
+        self.backend = backend if backend is not None else self.make_backend(config.cache, database)
+
+    @staticmethod
+    def make_backend(config, database=None) -> ResponseCacheBackend:
+        """
+        Returns the backend for the name in config.backend (memory, mongodb or module:Class),
+        the mongodb backend uses the shared client (database) if config.mongodb_url is empty.
+        """
+        return Database.make_backend(config, database, lambda: MemoryResponseCacheBackend(config.max_entries),
+                                     MongoResponseCacheBackend)
+
+    def scope(self, plugin) -> str:
+        record = plugin.hunabku.apikeys.lookup(plugin.get_apikey())
+        if record is None or record["revoked"]:
+            return "-"
+        return ",".join(sorted(record["scopes"]))
+
+    def key(self, plugin) -> str:
+        """
+        Returns the key of the current request.
+        """
+        request = plugin.request
+        # the values are encoded, a value with & or = can not be confused with other parameters
+        query = urlencode(sorted((name, value) for name, value in request.args.items(multi=True) if name != "apikey"))
+        return f"{request.path}?{query}#{self.scope(plugin)}"
+
+    def cacheable(self, plugin) -> bool:
+        return self.config.cache.enabled and plugin.request.method in ("GET", "HEAD")
+
+    def get(self, plugin, key):
+        """
+        Returns the cached response for the key or None.
+        """
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        body, status, headers = entry
+        response = plugin.app.response_class(response=body, status=status, headers=headers)
+        response.headers["X-Cache"] = "HIT"
+        # 304 if the client has the ETag (or Last-Modified) of the cached response
+        return response.make_conditional(plugin.request)
+
+    def set(self, plugin, key, response, ttl):
+        """
+        Saves the response if it is a complete 200 response, the response is returned.
+        """
+        response = plugin.app.make_response(response)
+        if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+            return response
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name.lower() not in self.skip_headers]
+        self.backend.set(key, (response.get_data(), response.status_code, headers), ttl)
+        response.headers["X-Cache"] = "MISS"
+        return response
+
+    def invalidate(self, prefix: str = ""):
+        """
+        Removes the entries for the paths that start with prefix, all the entries by default.
+        """
+        self.backend.invalidate(prefix)
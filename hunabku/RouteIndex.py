@@ -0,0 +1,104 @@
+import re
+
+
+class RouteIndex:
+    """
+    Index of the endpoints of all the plugins by normalised path and HTTP method.
+    The index is built once after the plugins are imported and it finds all the conflicting
+    endpoints in linear time.
+
+    The paths are normalised with the flask rule syntax in mind, the variables are replaced
+    by a placeholder (/a/<id> and /a/<int:name> are the same route) and the trailing slash
+    is removed (flask redirects /a to /a/).
+    """
+    variable = re.compile(r"<[^<>]+>")
+
+    def __init__(self):
+        self.index = {}
+        self._conflicts = []
+        self.built = False
+
+    @classmethod
+    def normalise(cls, path: str) -> str:
+        """
+        Returns the path with the variables replaced by <> and without trailing slash.
+        """
+        path = cls.variable.sub("<>", path)
+        path = re.sub("/+", "/", path)
+        if len(path) > 1:
+            path = path.rstrip("/")
+        return path
+
+    @staticmethod
+    def normalise_methods(methods) -> set:
+        """
+        Returns the HTTP methods in upper case, HEAD is added to GET as flask does.
+        """
+        methods = {method.upper() for method in methods}
+        if "GET" in methods:
+            methods.add("HEAD")
+        return methods
+
+    def build(self, endpoints: dict):
+        """
+        Builds the index from the global endpoints registered with the decorator @endpoint.
+        The same endpoint registered twice (same package, file, class and method) is not a conflict.
+
+        Parameters:
+        ____________
+        endpoints:dict
+            dictionary package name -> list of registers (see HunabkuPluginBase.get_global_endpoints)
+        """
+        self.index = {}
+        conflicts = {}
+        for package_name, registers in endpoints.items():
+            for register in registers:
+                owner = dict(register)
+                owner['package'] = package_name
+                owner_key = (package_name, register['file'], register['class_name'], register['func_name'])
+                path = self.normalise(register['path'])
+                for method in sorted(self.normalise_methods(register['methods'])):
+                    current = self.index.setdefault((path, method), (owner_key, owner))
+                    if current[0] == owner_key:
+                        continue
+                    conflict = conflicts.setdefault((current[0], owner_key, path),
+                                                    {'path': path, 'methods': [],
+                                                     'endpoint': owner, 'registered': current[1]})
+                    conflict['methods'].append(method)
+        self._conflicts = list(conflicts.values())
+        self.built = True
+        return self
+
+    def conflicts(self) -> list:
+        """
+        Returns the list of conflicts, every conflict is a dictionary with the normalised path,
+        the HTTP methods, the endpoint that can not be registered and the endpoint registered before.
+        """
+        return self._conflicts
+
+    def plugin_conflicts(self, package_name: str, class_name: str, filename: str) -> list:
+        """
+        Returns the conflicts where the plugin class is involved.
+        """
+        conflicts = []
+        for conflict in self._conflicts:
+            for register in (conflict['endpoint'], conflict['registered']):
+                if register['package'] == package_name and register['class_name'] == class_name \
+                        and register['file'] == filename:
+                    conflicts.append(conflict)
+                    break
+        return conflicts
+
+    @staticmethod
+    def message(conflict: dict) -> str:
+        """
+        Returns the error message for a conflict.
+        """
+        endpoint = conflict['endpoint']
+        register = conflict['registered']
+        return (f"ERROR: can't not load plugin, package {endpoint['package']} "
+                f"class {endpoint['class_name']} class_method {endpoint['func_name']} file {endpoint['file']} "
+                f"because the path {endpoint['path']} methods {','.join(conflict['methods'])} "
+                f"is already loaded in plugin: "
+                f"package {register['package']} class {register['class_name']} "
+                f"class_method {register['func_name']} file {register['file']} path {register['path']}")
@@ -0,0 +1,109 @@
+from datetime import date, datetime, time
+import decimal
+import importlib
+import json
+import uuid
+
+
+class Serializer:
+    """
+    JSON serializer used by the plugins (self.json), it has the same dumps/loads functions of the
+    json module but it uses orjson if it is installed and it encodes the values returned by MongoDB
+    and the data libraries: datetimes, bson ObjectId, numpy arrays and scalars, pandas DataFrames and Series.
+
+    Other types can be added with add_encoder, ex:
+    server.serializer.add_encoder(MyClass, lambda obj: obj.to_dict())
+    """
+
+    def __init__(self, backend: str = "auto"):
+        """
+        Parameters:
+        ____________
+        backend:str
+            auto (orjson if it is installed, json otherwise), orjson, json
+            or module:Class with the functions dumps(obj, default) -> bytes and loads(data)
+        """
+        self.encoders = {}
+        self.backend = None
+        self.options = None
+        self.name = "json"
+        if backend in ("auto", "orjson"):
+            try:
+                import orjson
+                self.backend = orjson
+                self.name = "orjson"
+                self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            except ImportError:
+                if backend == "orjson":
+                    raise
+        elif backend != "json":
+            module_name, _, class_name = backend.partition(":")
+            self.backend = getattr(importlib.import_module(module_name), class_name)()
+            self.name = backend
+
+    def __getattr__(self, name):
+        # other attributes of the json module (JSONDecodeError, JSONEncoder ...)
+        return getattr(json, name)
+
+    def add_encoder(self, cls, function):
+        """
+        Registers a function that returns a json serializable value for the objects of the class cls.
+        """
+        self.encoders[cls] = function
+
+    def default(self, obj):
+        """
+        Returns a json serializable value for the objects that are not supported by the backend.
+        """
+        for cls, function in self.encoders.items():
+            if isinstance(obj, cls):
+                return function(obj)
+        if isinstance(obj, (datetime, date, time)):
+            return obj.isoformat()
+        if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+            return str(obj)
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+        # the data libraries are not imported, the type is checked by module
+        module = type(obj).__module__.split(".")[0]
+        if module == "bson":
+            return str(obj)
+        if module == "pandas":
+            if hasattr(obj, "to_dict") and hasattr(obj, "columns"):
+                return obj.to_dict(orient="records")
+            if hasattr(obj, "tolist"):
+                return obj.tolist()
+            if hasattr(obj, "isoformat"):
+                return obj.isoformat()
+        if module == "numpy" and hasattr(obj, "tolist"):
+            return obj.tolist()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def dumpb(self, obj) -> bytes:
+        """
+        Returns the json of obj as bytes (utf-8), it is the fastest way to build a response.
+        """
+        if self.backend is not None:
+            try:
+                if self.options is None:
+                    return self.backend.dumps(obj, default=self.default)
+                return self.backend.dumps(obj, default=self.default, option=self.options)
+            except TypeError:
+                # ex: integers bigger than 64 bits for orjson
+                pass
+        return json.dumps(obj, default=self.default).encode()
+
+    def dumps(self, obj, **kwargs) -> str:
+        """
+        Returns the json of obj as str, the keyword arguments of json.dumps
+        are supported (the standard json module is used if they are given).
+        """
+        if len(kwargs) == 0:
+            return self.dumpb(obj).decode()
+        kwargs.setdefault("default", self.default)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, data, **kwargs):
+        if self.backend is not None and len(kwargs) == 0:
+            return self.backend.loads(data)
+        return json.loads(data, **kwargs)
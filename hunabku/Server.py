@@ -0,0 +1,201 @@
+from werkzeug.serving import make_server, WSGIRequestHandler
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+
+class Server:
+    """
+    Server class runs the flask app of a Hunabku instance outside of the werkzeug
+    development server (no debugger, no reloader).
+
+    The supported modes are:
+        * threaded: a single process that handles every connection in its own thread.
+        * prefork: a master process that owns the listening socket and forks N workers
+          that accept from it. The plugins are loaded once in the master before the fork,
+          so the startup cost is paid only once and every core can be used.
+    """
+
+    def __init__(self, app, host: str, port: int, workers: int = 1, backlog: int = 128,
+                 keepalive: int = 5, logger=None):
+        """
+        Initializes the server options.
+
+        Parameters:
+        ____________
+        app:Flask
+            flask (WSGI) application to serve
+        host:str
+            hostname or ip to bind
+        port:int
+            port to bind
+        workers:int
+            number of processes forked in prefork mode
+        backlog:int
+            size of the queue of pending connections in the listening socket
+        keepalive:int
+            seconds to keep idle HTTP/1.1 connections open, 0 disables keep-alive
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, int(workers))
+        self.backlog = int(backlog)
+        self.keepalive = int(keepalive)
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.socket = None
+        self.children = {}
+        self.running = False
+        # called in the master process when the server is accepting connections
+        self.on_ready = None
+        # called in every process (master and workers) to reload the config (SIGHUP or reload)
+        self.on_reload = None
+
+    def bind(self):
+        """
+        Creates the listening socket shared by all the workers.
+        """
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        sock.set_inheritable(True)
+        self.port = sock.getsockname()[1]
+        self.socket = sock
+        return sock
+
+    def request_handler(self):
+        """
+        Returns the werkzeug request handler class with the keep-alive options.
+        """
+        attrs = {}
+        if self.keepalive > 0:
+            attrs["protocol_version"] = "HTTP/1.1"
+            attrs["timeout"] = self.keepalive
+        else:
+            attrs["protocol_version"] = "HTTP/1.0"
+        return type("HunabkuRequestHandler", (WSGIRequestHandler,), attrs)
+
+    def make_server(self):
+        """
+        Creates the werkzeug server on top of the shared listening socket.
+        """
+        if self.socket is None:
+            self.bind()
+        return make_server(self.host, self.port, self.app, threaded=True,
+                           request_handler=self.request_handler(),
+                           fd=self.socket.fileno())
+
+    def serve_threaded(self):
+        """
+        Serves the app in a single multithreaded process.
+        """
+        server = self.make_server()
+        self.logger.warning(
+            f'------ Serving (threaded) on http://{self.host}:{self.port}')
+        self._handle_reload_signal()
+        if self.on_ready is not None:
+            self.on_ready()
+        server.serve_forever()
+
+    def serve_prefork(self):
+        """
+        Serves the app forking self.workers processes that share the listening socket.
+        Dead workers are restarted, SIGINT/SIGTERM in the master stops all the workers.
+        """
+        if not hasattr(os, "fork"):
+            self.logger.warning(
+                '------ WARNING: prefork mode is not supported in this platform, using threaded mode')
+            return self.serve_threaded()
+        if self.socket is None:
+            self.bind()
+        self.logger.warning(
+            f'------ Serving (prefork) on http://{self.host}:{self.port} with {self.workers} workers')
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        self._handle_reload_signal()
+        for worker_id in range(self.workers):
+            self._spawn(worker_id)
+        if self.on_ready is not None:
+            self.on_ready()
+        while self.running or self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            worker_id = self.children.pop(pid, None)
+            if worker_id is None:
+                continue
+            if self.running:
+                self.logger.warning(
+                    f'------ WARNING: worker {worker_id} (pid {pid}) exited with status {status}, restarting')
+                time.sleep(0.1)
+                self._spawn(worker_id)
+        self.socket.close()
+
+    def _spawn(self, worker_id):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            # the worker reloads only its own config, the master sends SIGHUP to every worker
+            self.children = {}
+            code = 0
+            try:
+                self.make_server().serve_forever()
+            except BaseException as e:
+                print(f"ERROR: worker {worker_id} failed: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = worker_id
+        return pid
+
+    def _stop(self, signum, frame):
+        self.running = False
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+
+    def _handle_reload_signal(self):
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, self._reload_signal)
+
+    def _reload_signal(self, signum, frame):
+        # the config is not loaded in the signal handler, it can interrupt a request
+        threading.Thread(target=self.reload, name="hunabku-reload", daemon=True).start()
+
+    def reload(self):
+        """
+        Reloads the config in this process (on_reload) and sends SIGHUP to the workers
+        so every worker reloads its own config, the workers are not restarted.
+        """
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                self.children.pop(pid, None)
+        if self.on_reload is not None:
+            self.on_reload()
+
+    def serve(self, mode: str):
+        """
+        Serves the app with the given mode (threaded or prefork).
+        """
+        if mode == "prefork":
+            self.serve_prefork()
+        elif mode == "threaded":
+            self.serve_threaded()
+        else:
+            print(f"ERROR: unknown server mode {mode}, the options are dev, threaded or prefork", file=sys.stderr)
+            sys.exit(1)
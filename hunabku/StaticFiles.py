@@ -0,0 +1,207 @@
+from werkzeug.http import is_resource_modified
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+
+
+class StaticFiles:
+    """
+    In memory cache of the static files of the apidoc site, the files are read once after the docs
+    are generated (see Hunabku.generate_doc) and they are served without reading the disk.
+
+    build() is called once when the docs change: the references of the html files to the other files
+    are fingerprinted (file?v=<hash>), the text files are compressed with gzip (and brotli if it is installed)
+    and the variants are saved next to the files (file.gz, file.br) with a manifest. The workers only
+    load the files and the variants (load), they do not compress anything.
+
+    The fingerprinted urls are served with an immutable Cache-Control, the other urls (ex: index.html)
+    are revalidated by the clients with the ETag.
+    """
+    manifest_name = ".hunabku_static.json"
+    compressible = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+    immutable = "public, max-age=31536000, immutable"
+    # reference of a html file to other file, with the fingerprint of a previous build if any
+    reference = re.compile(r'((?:src|href)=["\'])([^"\'?#:]+)(?:\?v=[0-9a-f]+)?(["\'])')
+
+    def __init__(self, directory: str, check_interval: float = 2, min_size: int = 256, logger=None):
+        """
+        Parameters:
+        ____________
+        directory:str
+            directory of the static files
+        check_interval:float
+            seconds between checks of the manifest, the files are loaded again if it changes (new docs)
+        min_size:int
+            files smaller than min_size bytes are not compressed
+        """
+        self.directory = directory
+        self.check_interval = check_interval
+        self.min_size = min_size
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.files = {}
+        self.mtime = None
+        self.checked = 0
+        self.lock = threading.Lock()
+        try:
+            import brotli
+            self.brotli = brotli
+        except ImportError:
+            self.brotli = None
+
+    @property
+    def manifest(self) -> str:
+        return os.path.join(self.directory, self.manifest_name)
+
+    def paths(self) -> list:
+        """
+        Returns the paths (relative to the directory, with /) of the static files.
+        """
+        paths = []
+        for root, dirs, files in os.walk(self.directory):
+            # temporary folders of the docs that are being built or replaced
+            dirs[:] = [name for name in dirs if not name.endswith((".new", ".old"))]
+            for name in files:
+                if name.startswith(".") or name.endswith((".gz", ".br")):
+                    continue
+                paths.append(os.path.relpath(os.path.join(root, name), self.directory).replace(os.sep, "/"))
+        return sorted(paths)
+
+    @staticmethod
+    def fingerprint(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()[:16]
+
+    def _fingerprint_references(self, path, data, fingerprints):
+        # the references are relative to the html file
+        base = os.path.dirname(path)
+
+        def replace(match):
+            target = os.path.normpath(os.path.join(base, match.group(2))).replace(os.sep, "/")
+            if target not in fingerprints:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}?v={fingerprints[target]}{match.group(3)}"
+        return self.reference.sub(replace, data.decode("utf-8", errors="surrogateescape")).encode(
+            "utf-8", errors="surrogateescape")
+
+    def build(self):
+        """
+        Fingerprints the references of the html files, saves the compressed variants of the files
+        and the manifest and loads the files in memory.
+        """
+        paths = self.paths()
+        contents = {}
+        for path in paths:
+            with open(os.path.join(self.directory, path), "rb") as f:
+                contents[path] = f.read()
+        fingerprints = {path: self.fingerprint(data) for path, data in contents.items() if not path.endswith(".html")}
+        manifest = {}
+        for path, data in contents.items():
+            filename = os.path.join(self.directory, path)
+            if path.endswith(".html"):
+                data = self._fingerprint_references(path, data, fingerprints)
+                if data != contents[path]:
+                    with open(filename, "wb") as f:
+                        f.write(data)
+            mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            variants = []
+            if len(data) >= self.min_size and mimetype.startswith(self.compressible):
+                encoded = {"gzip": gzip.compress(data, 9, mtime=0)}
+                if self.brotli is not None:
+                    encoded["br"] = self.brotli.compress(data, quality=11)
+                for encoding, variant in encoded.items():
+                    extension = ".gz" if encoding == "gzip" else ".br"
+                    if len(variant) < len(data):
+                        with open(filename + extension, "wb") as f:
+                            f.write(variant)
+                        variants.append(encoding)
+                    elif os.path.exists(filename + extension):
+                        os.remove(filename + extension)
+            stat = os.stat(filename)
+            manifest[path] = {"fingerprint": self.fingerprint(data), "mimetype": mimetype, "variants": variants,
+                              "size": stat.st_size, "mtime": stat.st_mtime_ns}
+        with open(self.manifest + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(self.manifest + ".tmp", self.manifest)
+        self.logger.warning(f'------ Static files: {len(manifest)} files fingerprinted and compressed')
+        return self.load()
+
+    def load(self) -> bool:
+        """
+        Loads the files of the manifest and their variants in memory,
+        returns False if there is not manifest or the files changed after the build.
+        """
+        try:
+            mtime = os.stat(self.manifest).st_mtime_ns
+            with open(self.manifest) as f:
+                manifest = json.load(f)
+            files = {}
+            for path, entry in manifest.items():
+                filename = os.path.join(self.directory, path)
+                stat = os.stat(filename)
+                if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime"]:
+                    return False
+                with open(filename, "rb") as f:
+                    data = {"identity": f.read()}
+                for encoding in entry["variants"]:
+                    with open(filename + (".gz" if encoding == "gzip" else ".br"), "rb") as f:
+                        data[encoding] = f.read()
+                files[path] = dict(entry, data=data)
+        except (OSError, ValueError, KeyError):
+            return False
+        with self.lock:
+            self.files = files
+            self.mtime = mtime
+            self.checked = time.monotonic()
+        return True
+
+    def refresh(self):
+        """
+        Loads the files again if the manifest changed (the docs were built by other process),
+        the manifest is checked every check_interval seconds.
+        """
+        now = time.monotonic()
+        if now - self.checked < self.check_interval:
+            return
+        self.checked = now
+        try:
+            mtime = os.stat(self.manifest).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self.mtime:
+            if not self.load():
+                with self.lock:
+                    self.files = {}
+                    self.mtime = mtime
+
+    def response(self, app, request, path: str):
+        """
+        Returns the response for the file path from memory or None if the file is not in the cache.
+        """
+        self.refresh()
+        entry = self.files.get(path)
+        if entry is None:
+            return None
+        encoding = request.accept_encodings.best_match(entry["variants"]) if entry["variants"] else None
+        encoding = encoding or "identity"
+        response = app.response_class(entry["data"][encoding], mimetype=entry["mimetype"])
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        if entry["variants"]:
+            response.vary.add("Accept-Encoding")
+        # every encoding has its own etag
+        etag = entry["fingerprint"] if encoding == "identity" else f"{entry['fingerprint']}-{encoding}"
+        response.set_etag(etag)
+        if request.args.get("v") == entry["fingerprint"]:
+            response.headers["Cache-Control"] = self.immutable
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        if not is_resource_modified(request.environ, etag=etag):
+            response.status_code = 304
+            response.set_data(b"")
+            response.headers.pop("Content-Length", None)
+        return response
@@ -0,0 +1,108 @@
+import csv
+import io
+
+
+class StreamWriter:
+    """
+    Encodes an iterable (generator, MongoDB cursor ...) as chunks of json, ndjson or csv,
+    the items are read one by one and the chunks have about chunk_size bytes,
+    so the memory used does not depend on the number of items.
+
+    If the client disconnects the server closes the generator, the iterable is closed too
+    (if it has a close method, ex: a MongoDB cursor) and no more items are read.
+    """
+    mimetypes = {"json": "application/json", "ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+    def __init__(self, serializer, chunk_size: int = 65536):
+        """
+        Parameters:
+        ____________
+        serializer:Serializer
+            serializer for the items (see hunabku.Serializer)
+        chunk_size:int
+            bytes buffered before a chunk is sent
+        """
+        self.serializer = serializer
+        self.chunk_size = chunk_size
+
+    def chunks(self, parts):
+        """
+        Joins the parts (bytes) in chunks of about chunk_size bytes.
+        """
+        buffer = []
+        size = 0
+        for part in parts:
+            buffer.append(part)
+            size += len(part)
+            if size >= self.chunk_size:
+                yield b"".join(buffer)
+                buffer = []
+                size = 0
+        if size > 0:
+            yield b"".join(buffer)
+
+    def json(self, iterable):
+        yield b"["
+        first = True
+        for item in iterable:
+            if first:
+                first = False
+                yield self.serializer.dumpb(item)
+            else:
+                yield b"," + self.serializer.dumpb(item)
+        yield b"]"
+
+    def ndjson(self, iterable):
+        for item in iterable:
+            yield self.serializer.dumpb(item) + b"\n"
+
+    def csv(self, iterable, fields=None):
+        buffer = io.StringIO()
+        writer = None
+        for item in iterable:
+            if writer is None:
+                fields = fields if fields is not None else list(item.keys())
+                writer = csv.writer(buffer)
+                writer.writerow(fields)
+            row = []
+            for field in fields:
+                value = item.get(field)
+                if isinstance(value, (dict, list)):
+                    value = self.serializer.dumps(value)
+                row.append("" if value is None else value)
+            writer.writerow(row)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if writer is None and fields is not None:
+            csv.writer(buffer).writerow(fields)
+            yield buffer.getvalue().encode()
+
+    def stream(self, iterable, format: str = "json", fields: list = None):
+        """
+        Returns the generator of chunks for the format (json, ndjson or csv).
+
+        Parameters:
+        ____________
+        iterable:iterable
+            items to send, dictionaries for csv
+        format:str
+            json (a list), ndjson (one json per line) or csv
+        fields:list
+            columns for csv, the keys of the first item by default
+        """
+        if format == "json":
+            parts = self.json(iterable)
+        elif format == "ndjson":
+            parts = self.ndjson(iterable)
+        elif format == "csv":
+            parts = self.csv(iterable, fields)
+        else:
+            raise ValueError(f"unknown stream format {format}, the options are json, ndjson or csv")
+        try:
+            yield from self.chunks(parts)
+        finally:
+            # called when the client disconnects (GeneratorExit) or at the end
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()
@@ -84,6 +84,13 @@ def main():
             'requests>=2.22.0',
             'hunabku'
         ],
+
+        # Hunabku finds the plugin with this entry-point
+        entry_points={
+            'hunabku.plugins': [
+                'hunabku_template = hunabku_template',
+            ],
+        },
     )
 
 
@@ -88,6 +88,13 @@ def main():
         extras_require={
             'scienti': [
                 'hunabku_scienti',
+            ],
+            'fast': [
+                'orjson',
+            ],
+            'compression': [
+                'brotli',
+                'zstandard',
             ]
         }
     )
@@ -0,0 +1,45 @@
+from hunabku.ApiDocParser import ApiDocParser
+
+import unittest
+
+
+class TestApiDocParser(unittest.TestCase):
+    """
+    Class to tests the in process parser for apidoc docstrings
+    """
+
+    def test__parse(self):
+        doc = """
+        @api {get} /hello/:id Hello
+        @apiName Hello
+        @apiGroup Template
+
+        @apiParam {Number} id Users unique ID.
+        @apiParam {String="a","b"} [kind=a] Kind of user.
+
+        @apiSuccess {String} firstname Firstname of the User.
+        """
+        blocks, errors = ApiDocParser().parse(doc, "Hello.py")
+        self.assertEqual(errors, [])
+        self.assertEqual(len(blocks), 1)
+        block = blocks[0]
+        self.assertEqual((block["type"], block["url"], block["name"], block["group"]),
+                         ("get", "/hello/:id", "Hello", "Template"))
+        params = block["parameter"]["fields"]["Parameter"]
+        self.assertEqual([param["field"] for param in params], ["id", "kind"])
+        self.assertTrue(params[1]["optional"])
+        self.assertEqual(params[1]["defaultValue"], "a")
+        self.assertEqual(block["success"]["fields"]["Success 200"][0]["field"], "firstname")
+
+    def test__errors(self):
+        blocks, errors = ApiDocParser().parse("@api get /hello\n@apiName\n", "Hello.py")
+        self.assertEqual(len(errors), 2)
+        blocks, errors = ApiDocParser().parse("@api {get} /hello\n@apiParam {Number}\n", "Hello.py")
+        self.assertEqual(len(errors), 1)
+
+    def test__without_api(self):
+        self.assertEqual(ApiDocParser().parse("docstring without apidoc"), ([], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+from hunabku.ApiKeys import ApiKeyStore
+from hunabku.Hunabku import Hunabku
+from hunabku.HunabkuBase import HunabkuPluginBase
+from hunabku.Config import ConfigGenerator
+
+import json
+import os
+import tempfile
+import unittest
+
+
+class TestApiKeys(unittest.TestCase):
+    """
+    Class to tests the apikeys store with scopes, revocation and the apikeys file
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.filename = os.path.join(self.directory.name, "apikeys.json")
+
+    def write(self, keys, mtime):
+        with open(self.filename, "w") as f:
+            json.dump({"keys": keys}, f)
+        # the store checks the modification time, it is set to be sure that it changes
+        os.utime(self.filename, ns=(mtime, mtime))
+
+    def test__scopes_and_revocation(self):
+        store = ApiKeyStore("admin")
+        store.add("reader", scopes=["scienti"], name="reader")
+        self.assertTrue(store.validate("admin", "anything"))
+        self.assertTrue(store.validate("reader"))
+        self.assertTrue(store.validate("reader", "scienti"))
+        self.assertFalse(store.validate("reader", "admin"))
+        self.assertFalse(store.validate("unknown"))
+        self.assertFalse(store.validate(None))
+        store.revoke("reader")
+        self.assertFalse(store.validate("reader"))
+        self.assertTrue(store.lookup("reader")["revoked"])
+        # only the hashes are saved
+        self.assertNotIn("reader", store.keys)
+        self.assertIn(ApiKeyStore.hash("reader"), store.keys)
+
+    def test__file(self):
+        self.write([{"name": "a", "key": "key-a", "scopes": ["scienti"]},
+                    {"name": "b", "hash": ApiKeyStore.hash("key-b")},
+                    {"name": "c", "key": "key-c", "revoked": True}], 1_000_000_000)
+        store = ApiKeyStore(filename=self.filename, reload_interval=0)
+        self.assertTrue(store.validate("key-a", "scienti"))
+        self.assertFalse(store.validate("key-a", "admin"))
+        self.assertTrue(store.validate("key-b", "admin"))
+        self.assertFalse(store.validate("key-c"))
+        self.assertEqual(store.lookup("key-b")["name"], "b")
+        # the file is reloaded when it changes
+        self.write([{"name": "b", "key": "key-b", "revoked": True}], 2_000_000_000)
+        self.assertFalse(store.validate("key-a"))
+        self.assertFalse(store.validate("key-b"))
+        # a broken file keeps the keys loaded before
+        with open(self.filename, "w") as f:
+            f.write("{broken")
+        os.utime(self.filename, ns=(3_000_000_000, 3_000_000_000))
+        with self.assertLogs(store.logger, "ERROR"):
+            store.maybe_reload()
+        self.assertIsNotNone(store.lookup("key-b"))
+
+    def test__get_apikey(self):
+        server = Hunabku(ConfigGenerator().config)
+        plugin = HunabkuPluginBase(server)
+        # the header is checked before the query string and the form
+        with server.app.test_request_context("/?apikey=query", method="POST", data={"apikey": "form"},
+                                             headers={"X-API-Key": "header"}):
+            self.assertEqual(plugin.get_apikey(), "header")
+        with server.app.test_request_context("/?apikey=query", method="POST", data={"apikey": "form"}):
+            self.assertEqual(plugin.get_apikey(), "query")
+        with server.app.test_request_context("/", method="POST", data={"apikey": "form"}):
+            self.assertEqual(plugin.get_apikey(), "form")
+        with server.app.test_request_context("/", headers={"X-API-Key": "colavudea"}):
+            self.assertTrue(plugin.valid_apikey())
+
+
+if __name__ == '__main__':
+    unittest.main()
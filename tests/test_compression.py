@@ -0,0 +1,90 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.HunabkuBase import HunabkuPluginBase
+from hunabku.Config import Config, ConfigGenerator, Param
+import gzip
+import json
+import zlib
+
+import unittest
+
+
+class Plugin(HunabkuPluginBase):
+    config = Config()
+    config.compression += Param(level=1, doc="gzip level of the plugin")
+    config.compression += Param(min_size=10, doc="min size of the plugin")
+
+    def data(self):
+        return self.json_response([{"id": i, "name": f"item {i}"} for i in range(100)])
+
+    def small(self):
+        return self.json_response({"id": 1, "name": "small"})
+
+    def versioned(self):
+        return self.conditional_response(lambda: [{"id": i} for i in range(100)], etag="v1")
+
+    def stream(self):
+        return self.stream_response(({"id": i} for i in range(1000)), format="ndjson", chunk_size=100)
+
+
+class TestCompression(unittest.TestCase):
+    """
+    Class to tests the compression of the responses negotiated with Accept-Encoding
+    """
+
+    def setUp(self):
+        self.server = Hunabku(ConfigGenerator().config)
+        self.plugin = Plugin(self.server)
+        for name in ("data", "small", "stream", "versioned"):
+            self.server.app.add_url_rule(f"/{name}", f"test.{name}", getattr(self.plugin, name))
+        self.server.app.add_url_rule("/server", "test.server", lambda: self.plugin.json_response({"text": "x" * 2000}))
+        self.client = self.server.app.test_client()
+
+    def test__negotiation(self):
+        response = self.client.get("/data", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertEqual(len(json.loads(gzip.decompress(response.data))), 100)
+        response = self.client.get("/data")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(len(response.json), 100)
+        response = self.client.get("/data", headers={"Accept-Encoding": "gzip;q=0, identity"})
+        self.assertNotIn("Content-Encoding", response.headers)
+        for encoding in self.server.compressor.encodings:
+            response = self.client.get("/data", headers={"Accept-Encoding": f"{encoding}, gzip;q=0.5"})
+            self.assertEqual(response.headers["Content-Encoding"], encoding)
+
+    def test__min_size(self):
+        # the plugin sets min_size=10, the server default is 1024
+        response = self.client.get("/small", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.server.config.compression.min_size = 10 ** 6
+        self.server.compressor.clear()
+        try:
+            response = self.client.get("/server", headers={"Accept-Encoding": "gzip"})
+            self.assertNotIn("Content-Encoding", response.headers)
+        finally:
+            self.server.config.compression.min_size = 1024
+            self.server.compressor.clear()
+
+    def test__etag(self):
+        response = self.client.get("/versioned", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["ETag"], 'W/"v1"')
+        response = self.client.get("/versioned", headers={"Accept-Encoding": "gzip", "If-None-Match": 'W/"v1"'})
+        self.assertEqual(response.status_code, 304)
+
+    def test__stream(self):
+        response = self.client.get("/stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Length", response.headers)
+        chunks = list(response.response)
+        self.assertGreater(len(chunks), 2)
+        # every chunk is flushed, the first chunk can be decompressed before the end of the stream
+        decompressor = zlib.decompressobj(31)
+        self.assertTrue(decompressor.decompress(chunks[0]).startswith(b'{"id":0}'))
+        lines = zlib.decompress(b"".join(chunks), 31).splitlines()
+        self.assertEqual(len(lines), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
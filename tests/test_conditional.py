@@ -0,0 +1,51 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+from hunabku.HunabkuBase import HunabkuPluginBase
+
+import unittest
+
+
+class TestConditional(unittest.TestCase):
+    """
+    Class to tests the conditional responses (ETag/304) of the plugins
+    """
+
+    def setUp(self):
+        self.server = Hunabku(ConfigGenerator.config)
+        self.plugin = HunabkuPluginBase(self.server)
+
+    def test__etag_from_body(self):
+        with self.server.app.test_request_context('/'):
+            response = self.plugin.conditional_response({'hello': 'world'})
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        with self.server.app.test_request_context('/', headers={'If-None-Match': etag}) as context:
+            response = self.plugin.conditional_response({'hello': 'world'})
+            # the body is not sent with the 304 response
+            self.assertEqual(list(response.get_app_iter(context.request.environ)), [])
+        self.assertEqual(response.status_code, 304)
+
+    def test__version_token(self):
+        calls = []
+
+        def data():
+            calls.append(1)
+            return {'hello': 'world'}
+        with self.server.app.test_request_context('/', headers={'If-None-Match': '"v1"'}):
+            response = self.plugin.conditional_response(data, etag='v1')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(calls, [])
+        with self.server.app.test_request_context('/', headers={'If-None-Match': '"v0"'}):
+            response = self.plugin.conditional_response(data, etag='v1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, [1])
+
+    def test__not_get(self):
+        with self.server.app.test_request_context('/', method='POST', headers={'If-None-Match': '"v1"'}):
+            response = self.plugin.conditional_response({'hello': 'world'}, etag='v1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {'hello': 'world'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+from hunabku.Config import Config, ConfigGenerator, FrozenConfig, Param
+
+import unittest
+
+
+class TestConfig(unittest.TestCase):
+    """
+    Class to tests the read only snapshots of the config (Config.freeze)
+    """
+
+    def test__freeze(self):
+        config = Config()
+        config.plugin += Param(rate=10, doc="rate of the plugin")
+        config.plugin += Param(routes=["/a"], doc="routes of the plugin")
+        frozen = config.freeze()
+        self.assertIsInstance(frozen.plugin, FrozenConfig)
+        self.assertEqual(frozen.plugin.rate, 10)
+        self.assertEqual(frozen.lookup("plugin.rate"), 10)
+        self.assertEqual(frozen.plugin.routes, ("/a",))
+        self.assertEqual(frozen.plugin.get("missing"), None)
+        self.assertEqual(frozen.missing.keys(), [])
+        self.assertNotIn("missing", frozen)
+        self.assertEqual(frozen.dict(), config.dict())
+        with self.assertRaises(TypeError):
+            frozen.plugin.rate = 20
+        with self.assertRaises(TypeError):
+            frozen["plugin"] = None
+        # the snapshot does not change with the config
+        config.plugin.rate = 20
+        self.assertEqual(frozen.plugin.rate, 10)
+        self.assertEqual(frozen.plugin.thaw().rate, 10)
+
+    def test__diff(self):
+        config = Config()
+        config.a.b = 1
+        config.a.c = [1]
+        old = config.freeze()
+        config.a.b = 2
+        config.a.d.e = 3
+        config.f = 4
+        self.assertEqual(old.diff(config.freeze()), ["a.b", "a.d.e", "f"])
+        self.assertEqual(config.freeze().diff(old), ["a.b", "a.d.e", "f"])
+        self.assertEqual(old.diff(old), [])
+
+    def test__default_config(self):
+        config = ConfigGenerator().config
+        frozen = config.freeze()
+        self.assertEqual(frozen.apikeys.header, config.apikeys.header)
+        self.assertEqual(frozen.lookup("server.mode"), config.server.mode)
+        self.assertEqual(frozen.keys(), config.keys())
+
+
+if __name__ == '__main__':
+    unittest.main()
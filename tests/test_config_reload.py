@@ -0,0 +1,72 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.HunabkuBase import HunabkuPluginBase
+from hunabku.Config import Config, ConfigGenerator, Param
+from hunabku.ConfigWatcher import ConfigWatcher
+import os
+import tempfile
+
+import unittest
+
+
+class Plugin(HunabkuPluginBase):
+    config = Config()
+    config += Param(size=10, doc="size of the plugin")
+
+    def __init__(self, hunabku):
+        super().__init__(hunabku)
+        self.changes = []
+
+    def on_config_change(self, changes, old_config):
+        self.changes.append((changes, old_config.size, self.config.size))
+
+
+class TestConfigReload(unittest.TestCase):
+    """
+    Class to tests the reload of the config without restarting the server
+    """
+
+    def setUp(self):
+        self.server = Hunabku(ConfigGenerator().config)
+        for name in ("hunabku_a.A.Plugin", "hunabku_b.B.Plugin"):
+            instance = Plugin(self.server)
+            instance.config = Plugin.config.freeze()
+            self.server.plugins.append({'name': name, 'instance': instance, 'defaults': Plugin.config.freeze()})
+
+    def tearDown(self):
+        self.server.reload_config(Config())
+
+    def test__reload_config(self):
+        a, b = [plugin['instance'] for plugin in self.server.plugins]
+        b_config = b.config
+        config = Config()
+        config.ratelimit.rate = 5
+        config.port = 1
+        config.hunabku_a.A.Plugin.size = 20
+        applied = self.server.reload_config(config)
+        self.assertEqual(applied, ["hunabku_a.A.Plugin.size", "ratelimit.rate"])
+        self.assertEqual(self.server.config.ratelimit.rate, 5)
+        # the port is used only at startup
+        self.assertNotEqual(self.server.config.port, 1)
+        self.assertEqual(a.changes, [(["size"], 10, 20)])
+        self.assertEqual(a.global_config.ratelimit.rate, 5)
+        self.assertEqual(b.changes, [])
+        self.assertIs(b.config, b_config)
+        # without changes nothing is applied
+        self.assertEqual(self.server.reload_config(config), [])
+
+    def test__watcher(self):
+        calls = []
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "config.py")
+            with open(filename, "w") as f:
+                f.write("from hunabku.Config import Config\nconfig = Config()\n")
+            watcher = ConfigWatcher(filename, lambda: calls.append(1))
+            self.assertFalse(watcher.check())
+            os.utime(filename, ns=(0, 0))
+            self.assertTrue(watcher.check())
+            self.assertEqual(calls, [1])
+            self.assertIsInstance(ConfigGenerator.load_config(filename), Config)
+
+
+if __name__ == '__main__':
+    unittest.main()
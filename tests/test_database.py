@@ -0,0 +1,58 @@
+from hunabku.Config import ConfigGenerator
+from hunabku.Database import Database
+from hunabku.Jobs import JobQueue, MemoryJobStore, MongoJobStore
+from hunabku.RateLimit import RateLimiter, MemoryRateLimitBackend, MongoRateLimitBackend
+from hunabku.ResponseCache import ResponseCache, MongoResponseCacheBackend
+
+import os
+import unittest
+
+
+class TestDatabase(unittest.TestCase):
+    """
+    Class to tests the options and the fork safety of the shared MongoDB client
+    (the client connects lazily, a MongoDB server is not required)
+    """
+
+    def test__client_per_process(self):
+        database = Database("mongodb://localhost:27017/", "test", max_pool_size=5, connect_timeout=1)
+        client = database.client
+        self.assertIs(database.client, client)
+        self.assertEqual(client.options.pool_options.max_pool_size, 5)
+        self.assertTrue(database.stats()["connected"])
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write, b"1" if database.client is not client else b"0")
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(os.read(read, 1), b"1")
+        database.close()
+        self.assertFalse(database.stats()["connected"])
+
+    def test__make_backend(self):
+        config = ConfigGenerator().config.freeze().thaw()
+        database = Database("mongodb://localhost:27017/")
+        self.assertIsInstance(RateLimiter.make_backend(config.ratelimit, database), MemoryRateLimitBackend)
+        self.assertEqual(ResponseCache.make_backend(config.cache, database).max_entries, config.cache.max_entries)
+        self.assertIsInstance(JobQueue.make_store(config.jobs, database), MemoryJobStore)
+        # the mongodb backends use the shared client, or their own client if they have an url
+        config.cache.backend = "mongodb"
+        self.assertIs(ResponseCache.make_backend(config.cache, database).database, database)
+        config.ratelimit.backend = "mongodb"
+        config.ratelimit.mongodb_url = "mongodb://other:27017/"
+        backend = RateLimiter.make_backend(config.ratelimit, database)
+        self.assertIsInstance(backend, MongoRateLimitBackend)
+        self.assertEqual(backend.database.url, "mongodb://other:27017/")
+        config.jobs.store = "hunabku.Jobs:MemoryJobStore"
+        self.assertIsInstance(JobQueue.make_store(config.jobs, database), MemoryJobStore)
+        config.jobs.store = "mongodb"
+        self.assertIsInstance(JobQueue.make_store(config.jobs, database), MongoJobStore)
+        config.jobs.store = "redis"
+        with self.assertRaises(ValueError):
+            JobQueue.make_store(config.jobs, database)
+        self.assertIsInstance(ResponseCache.make_backend(config.cache, database), MongoResponseCacheBackend)
+
+
+if __name__ == '__main__':
+    unittest.main()
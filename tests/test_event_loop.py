@@ -0,0 +1,40 @@
+from hunabku.EventLoop import EventLoop
+
+import asyncio
+import contextvars
+import unittest
+
+value = contextvars.ContextVar("value", default=None)
+
+
+class TestEventLoop(unittest.TestCase):
+    """
+    Class to tests the event loop of the async endpoints
+    """
+
+    def setUp(self):
+        self.loop = EventLoop(timeout=1)
+
+    def tearDown(self):
+        self.loop.stop()
+
+    def test__run_with_context(self):
+        async def fanout():
+            results = await asyncio.gather(*[asyncio.sleep(0.01, result=i) for i in range(3)])
+            return results, value.get()
+        value.set("request")
+        self.assertEqual(self.loop.run(fanout()), ([0, 1, 2], "request"))
+        self.assertIs(self.loop.get_loop(), self.loop.get_loop())
+
+    def test__errors(self):
+        async def fail():
+            raise KeyError("boom")
+        with self.assertRaises(KeyError):
+            self.loop.run(fail())
+        self.loop.timeout = 0.05
+        with self.assertRaises(TimeoutError):
+            self.loop.run(asyncio.sleep(10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.HunabkuBase import HunabkuPluginBase
+from hunabku.Config import ConfigGenerator
+
+from shutil import rmtree
+import os
+import sys
+import tempfile
+import unittest
+
+# stub of the apidoc binary, the behaviour is set with the environment variable APIDOC_STUB
+apidoc_stub = """#!{python}
+import os
+import sys
+import time
+
+mode = os.environ.get("APIDOC_STUB", "ok")
+with open(os.environ["APIDOC_STUB_CALLS"], "a") as f:
+    f.write(mode + "\\n")
+if mode == "fail":
+    print("apidoc error")
+    sys.exit(1)
+if mode == "slow":
+    time.sleep(10)
+output = sys.argv[sys.argv.index("-o") + 1]
+os.makedirs(output, exist_ok=True)
+with open(os.path.join(output, "index.html"), "w") as f:
+    f.write("<html>" + mode + "</html>")
+"""
+
+plugin_module = """from hunabku.HunabkuBase import HunabkuPluginBase, endpoint
+
+
+class Docs(HunabkuPluginBase):
+    @endpoint('/test_doc/docs', methods=['GET'])
+    def docs(self):
+        \"\"\"
+        {doc}
+        \"\"\"
+        return self.json_response({{}})
+"""
+
+
+class TestGenerateDoc(unittest.TestCase):
+    """
+    Class to tests the builds of the apidocs with a stub of the apidoc binary
+    """
+    package = "hunabku_test_doc"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        bin_dir = os.path.join(self.directory, "bin")
+        os.makedirs(bin_dir)
+        with open(os.path.join(bin_dir, "apidoc"), "w") as f:
+            f.write(apidoc_stub.format(python=sys.executable))
+        os.chmod(os.path.join(bin_dir, "apidoc"), 0o755)
+        self.calls = os.path.join(self.directory, "calls")
+        self.environ = dict(os.environ)
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ["PATH"]
+        os.environ["APIDOC_STUB_CALLS"] = self.calls
+        os.environ["APIDOC_STUB"] = "ok"
+        self.endpoints = os.path.join(self.directory, self.package, "endpoints")
+        os.makedirs(self.endpoints)
+        open(os.path.join(self.directory, self.package, "__init__.py"), "w").close()
+        self.write_plugin("@api {get} /test_doc/docs Docs")
+        sys.path.insert(0, self.directory)
+        # Hunabku updates the config of the class, the defaults are restored for the other tests
+        self.addCleanup(Hunabku.config.update, Hunabku.config.freeze().thaw())
+        config = ConfigGenerator().config.freeze().thaw()
+        config.apidoc.apidoc_dir = os.path.join(self.directory, "hunabku_website")
+        config.plugins.cache = False
+        self.server = self.load(config)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        sys.path.remove(self.directory)
+        self.unload()
+        rmtree(self.directory, ignore_errors=True)
+
+    def unload(self):
+        for name in [name for name in sys.modules if name.startswith(self.package)]:
+            del sys.modules[name]
+        for registers in HunabkuPluginBase.get_global_endpoints().values():
+            registers[:] = [register for register in registers if not register['file'].startswith(self.directory)]
+
+    def load(self, config):
+        server = Hunabku(config)
+        server.discover_plugins = lambda: [self.package]
+        server.apidoc_setup()
+        server.load_plugins(verbose=False)
+        return server
+
+    def write_plugin(self, doc):
+        with open(os.path.join(self.endpoints, "docs.py"), "w") as f:
+            f.write(plugin_module.format(doc=doc))
+
+    def builds(self):
+        if not os.path.exists(self.calls):
+            return []
+        with open(self.calls) as f:
+            return f.read().split()
+
+    def index(self):
+        with open(os.path.join(self.server.apidoc_output_dir, "index.html")) as f:
+            return f.read()
+
+    def test__unchanged_plugins(self):
+        self.assertTrue(self.server.generate_doc())
+        self.assertEqual(self.builds(), ["ok"])
+        # the hashes of the plugins did not change, apidoc is not called again
+        self.assertTrue(self.server.generate_doc())
+        self.assertEqual(self.builds(), ["ok"])
+        # a changed plugin is built again
+        self.write_plugin("@api {get} /test_doc/docs Docs changed")
+        self.unload()
+        self.server = self.load(self.server.config)
+        self.assertTrue(self.server.generate_doc())
+        self.assertEqual(self.builds(), ["ok", "ok"])
+
+    def test__failed_build(self):
+        self.assertTrue(self.server.generate_doc())
+        self.write_plugin("@api {get} /test_doc/docs Docs changed")
+        self.unload()
+        self.server = self.load(self.server.config)
+        os.environ["APIDOC_STUB"] = "fail"
+        self.assertFalse(self.server.generate_doc())
+        # the last docs are kept and the temporary folder is removed
+        self.assertEqual(self.index(), "<html>ok</html>")
+        self.assertFalse(os.path.exists(self.server.apidoc_output_dir + ".new"))
+        os.environ["APIDOC_STUB"] = "slow"
+        self.assertFalse(self.server.generate_doc(timeout=0.1, maxtries=2))
+        self.assertEqual(self.index(), "<html>ok</html>")
+        self.assertEqual(self.builds(), ["ok", "fail", "slow"])
+
+    def test__background_syntax_error(self):
+        self.assertTrue(self.server.generate_doc())
+        self.write_plugin("@api get /test_doc/docs")
+        self.unload()
+        self.server = self.load(self.server.config)
+        # in background the server keeps running with the last docs
+        self.assertFalse(self.server.generate_doc(background=True))
+        self.assertEqual(self.builds(), ["ok"])
+        self.assertEqual(self.index(), "<html>ok</html>")
+        with self.assertRaises(SystemExit):
+            self.server.generate_doc()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,8 @@ import sys
 import os
 import time
 import signal
+import importlib.metadata
+import tempfile
 from shutil import rmtree
 import subprocess
 from command import run, CommandException
@@ -61,12 +63,41 @@ class TestHunabku(unittest.TestCase):
 
         del self.server
         self.server = Hunabku(self.config)
+        # the generated plugin is registered in the entry-point group hunabku.plugins
+        self.config.plugins.discovery = "entry_points"
+        self.assertIn("hunabku_test", self.server.discover_plugins())
+        self.config.plugins.discovery = "auto"
         self.server.apidoc_setup()
         self.server.load_plugins()
         self.server.generate_doc()
 
         print(res.output.decode())
 
+    def test__discovery(self):
+        directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(directory, "hunabku_scanned"))
+        open(os.path.join(directory, "hunabku_scanned", "__init__.py"), "w").close()
+        sys.path.insert(0, directory)
+        try:
+            self.config.plugins.discovery = "auto"
+            # without entry-points the packages are scanned
+            self.server._entry_points = lambda group: []
+            with self.assertLogs(self.server.logger, "WARNING") as logs:
+                self.assertIn("hunabku_scanned", self.server.discover_plugins())
+            self.assertIn("no entry-points found", logs.output[0])
+            # with entry-points the packages without entry-point are reported
+            entry_point = importlib.metadata.EntryPoint("ep", "hunabku_ep", self.server.plugin_entry_point_group)
+            self.server._entry_points = lambda group: [entry_point]
+            with self.assertLogs(self.server.logger, "WARNING") as logs:
+                self.assertEqual(self.server.discover_plugins(), ["hunabku_ep"])
+            self.assertTrue(any("package hunabku_scanned is not loaded" in line for line in logs.output))
+            self.config.plugins.discovery = "scan"
+            self.assertIn("hunabku_scanned", self.server.discover_plugins())
+        finally:
+            self.config.plugins.discovery = "auto"
+            sys.path.remove(directory)
+            rmtree(directory, ignore_errors=True)
+
     def test__duplicated_endpoint(self):
         print('############################ running duplicate endpoint tests ############################')
         res = run(['hunabku_server', '--generate_plugin', 'test'])
@@ -142,6 +173,8 @@ class TestHunabku(unittest.TestCase):
         rmtree("HunabKu_apidoc", ignore_errors=True)
         if os.path.exists("config.py"):
             os.remove("config.py")
+        if os.path.exists(".hunabku_plugins_cache.json"):
+            os.remove(".hunabku_plugins_cache.json")
 
         res = run(['pip', 'uninstall', '-y', 'hunabku_test'])
         print(res.output.decode())
@@ -0,0 +1,54 @@
+from hunabku.Config import Config, Param
+from hunabku.Jobs import JobQueue, MemoryJobStore
+
+import time
+import unittest
+
+
+def square(x):
+    if x < 0:
+        raise ValueError("negative")
+    return x * x
+
+
+class TestJobs(unittest.TestCase):
+    """
+    Class to tests the background jobs in the thread pool and the memory store
+    """
+
+    def setUp(self):
+        config = Config()
+        for name, value in [("pool", "thread"), ("workers", 2), ("result_ttl", 60), ("max_jobs", 10),
+                            ("store", "memory")]:
+            config += Param(**{name: value})
+        self.jobs = JobQueue(config)
+
+    def wait(self, job_id):
+        for _ in range(100):
+            job = self.jobs.get(job_id)
+            if job["status"] in ("done", "failed"):
+                return job
+            time.sleep(0.01)
+        self.fail("the job did not finish")
+
+    def test__result_and_error(self):
+        job = self.wait(self.jobs.submit(square, 3))
+        self.assertEqual((job["status"], job["result"]), ("done", 9))
+        self.assertIsNotNone(job["started"])
+        job = self.wait(self.jobs.submit(square, -1))
+        self.assertEqual(job["status"], "failed")
+        self.assertIn("negative", job["error"])
+        self.assertIsNone(self.jobs.get("unknown"))
+
+    def test__bounded_store(self):
+        store = MemoryJobStore(max_jobs=2)
+        for job_id in ("a", "b", "c"):
+            store.set({"id": job_id})
+        self.assertIsNone(store.get("a"))
+        store.set({"id": "d"}, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(store.get("d"))
+
+
+if __name__ == '__main__':
+    unittest.main()
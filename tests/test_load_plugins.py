@@ -0,0 +1,110 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.HunabkuBase import HunabkuPluginBase
+from hunabku.Config import ConfigGenerator
+
+from shutil import rmtree
+import os
+import sys
+import tempfile
+import unittest
+
+module_template = """from hunabku.HunabkuBase import HunabkuPluginBase, endpoint
+
+
+class {name}(HunabkuPluginBase):
+    @endpoint('/test_load/{path}', methods=['GET'])
+    def {path}(self):
+        return self.json_response({{"plugin": "{name}"}})
+"""
+
+broken_module = """from hunabku.HunabkuBase import HunabkuPluginBase, endpoint
+
+
+class Broken(HunabkuPluginBase):
+    @endpoint('/test_load/broken', methods=['GET'])
+    def broken(self):
+        return self.json_response({})
+
+
+raise RuntimeError("broken plugin module")
+"""
+
+
+class TestLoadPlugins(unittest.TestCase):
+    """
+    Class to tests the load of the plugin modules with several workers and the plugins that fail to load
+    """
+    package = "hunabku_test_load"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        endpoints = os.path.join(self.directory, self.package, "endpoints")
+        os.makedirs(endpoints)
+        open(os.path.join(self.directory, self.package, "__init__.py"), "w").close()
+        for name in ("Alpha", "Beta", "Gamma", "Delta", "Epsilon"):
+            with open(os.path.join(endpoints, f"{name.lower()}.py"), "w") as f:
+                f.write(module_template.format(name=name, path=name.lower()))
+        sys.path.insert(0, self.directory)
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        for name in [name for name in sys.modules if name.startswith(self.package)]:
+            del sys.modules[name]
+        for registers in HunabkuPluginBase.get_global_endpoints().values():
+            registers[:] = [register for register in registers if not register['file'].startswith(self.directory)]
+        rmtree(self.directory, ignore_errors=True)
+
+    def load(self, workers):
+        # Hunabku updates the config of the class, the defaults are restored for the other tests
+        self.addCleanup(Hunabku.config.update, Hunabku.config.freeze().thaw())
+        config = ConfigGenerator().config.freeze().thaw()
+        config.plugins.load_workers = workers
+        config.plugins.cache = False
+        server = Hunabku(config)
+        server.discover_plugins = lambda: [self.package]
+        server.load_plugins(verbose=False)
+        return server
+
+    def rules(self, server):
+        return [(rule.rule, rule.endpoint) for rule in server.app.url_map.iter_rules()
+                if rule.rule.startswith("/test_load/")]
+
+    def test__workers_order(self):
+        sequential = self.load(1)
+        concurrent = self.load(4)
+        self.assertEqual([plugin['name'] for plugin in sequential.plugins],
+                         [plugin['name'] for plugin in concurrent.plugins])
+        self.assertEqual([plugin['class_name'] for plugin in concurrent.plugins],
+                         ["Alpha", "Beta", "Delta", "Epsilon", "Gamma"])
+        self.assertEqual(self.rules(sequential), self.rules(concurrent))
+        self.assertEqual(concurrent.app.test_client().get("/test_load/gamma").json, {"plugin": "Gamma"})
+
+    def test__broken_module(self):
+        with open(os.path.join(self.directory, self.package, "endpoints", "broken.py"), "w") as f:
+            f.write(broken_module)
+        server = self.load(4)
+        self.assertEqual([(error['package'], error['name']) for error in server.plugin_errors],
+                         [(self.package, "broken")])
+        self.assertIsInstance(server.plugin_errors[0]['error'], RuntimeError)
+        # the endpoints declared before the error are removed, the other plugins are loaded
+        paths = [register['path'] for register in server.endpoints[self.package]]
+        self.assertNotIn("/test_load/broken", paths)
+        self.assertEqual(len(server.plugins), 5)
+        client = server.app.test_client()
+        self.assertEqual(client.get("/test_load/broken").status_code, 404)
+        self.assertEqual(client.get("/test_load/alpha").status_code, 200)
+
+    def test__apidoc_errors(self):
+        with open(os.path.join(self.directory, self.package, "endpoints", "alpha.py"), "w") as f:
+            f.write(module_template.format(name="Alpha", path="alpha").replace(
+                "def alpha(self):", 'def alpha(self):\n        """\n        @api get /test_load/alpha\n        """'))
+        with self.assertLogs(level="ERROR") as logs:
+            server = self.load(1)
+        self.assertEqual(len(server.apidoc_errors), 1)
+        self.assertTrue(any(server.apidoc_errors[0] in line for line in logs.output))
+        # the endpoint is served without docs
+        self.assertEqual(server.app.test_client().get("/test_load/alpha").status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+from hunabku.Metrics import Metrics
+
+from shutil import rmtree
+import os
+import tempfile
+import unittest
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Class to tests the latency histograms and the Prometheus output of the metrics
+    """
+
+    def test__percentiles(self):
+        metrics = Metrics(buckets=[0.1, 0.2, 0.4])
+        for seconds in [0.05] * 50 + [0.15] * 45 + [0.3] * 5:
+            metrics.record("/a", "GET", 200, seconds, 10)
+        percentiles = metrics.percentiles()[("/a", "GET")]
+        self.assertAlmostEqual(percentiles[0.5], 0.1 + 0.1 * 0 / 45)
+        self.assertAlmostEqual(percentiles[0.95], 0.2)
+        self.assertAlmostEqual(percentiles[0.99], 0.2 + 0.2 * 4 / 5)
+        text = metrics.render({"hunabku_db_connections_open": 2})
+        self.assertIn('hunabku_request_duration_seconds_bucket{route="/a",method="GET",status="200",le="+Inf"} 100', text)
+        self.assertIn('hunabku_response_size_bytes_sum{route="/a",method="GET",status="200"} 1000', text)
+        self.assertIn("hunabku_db_connections_open 2", text)
+
+    def test__workers_directory(self):
+        directory = tempfile.mkdtemp()
+        try:
+            # the files of a previous run are removed
+            previous = Metrics(directory=directory)
+            previous.record("/a", "GET", 200, 0.01, 1)
+            previous.flush()
+            metrics = Metrics(directory=directory)
+            self.assertEqual(os.listdir(directory), [])
+            metrics.record("/a", "GET", 200, 0.01, 1)
+            metrics.flush()
+            # the file of this process is saved as the file of another worker of the same run
+            os.rename(metrics.filename(), metrics.filename(1))
+            self.assertEqual(metrics.merged()["/a\tGET\t200"][0], 2)
+            # files of other runs are not added
+            previous.flush()
+            self.assertEqual(metrics.merged()["/a\tGET\t200"][0], 2)
+        finally:
+            rmtree(directory, ignore_errors=True)
+
+    def test__flush_error(self):
+        directory = tempfile.mkdtemp()
+        try:
+            # the directory can not be created, the error is logged and the request is not affected
+            with open(os.path.join(directory, "file"), "w"):
+                pass
+            metrics = Metrics(directory=os.path.join(directory, "file", "metrics"), flush_interval=0)
+            with self.assertLogs(metrics.logger, "ERROR"):
+                metrics.record("/a", "GET", 200, 0.01, 1)
+            self.assertEqual(metrics.snapshot()["/a\tGET\t200"][0], 1)
+        finally:
+            rmtree(directory, ignore_errors=True)
+
+    def test__endpoint_scope(self):
+        server = Hunabku(ConfigGenerator().config)
+        server.apikeys.add("scraper", scopes=["metrics"])
+        server.apikeys.add("reader", scopes=["scienti"])
+        client = server.app.test_client()
+        self.assertEqual(client.get("/metrics").status_code, 401)
+        self.assertEqual(client.get("/metrics?apikey=reader").status_code, 401)
+        response = client.get("/metrics?apikey=scraper")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"hunabku_requests_total", response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
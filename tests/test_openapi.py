@@ -0,0 +1,72 @@
+from hunabku.OpenApi import OpenApi
+from flask import Flask
+
+import gzip
+import json
+import unittest
+
+
+class TestOpenApi(unittest.TestCase):
+    """
+    Class to tests the OpenAPI document built from the registered endpoints
+    """
+
+    def setUp(self):
+        doc = """
+        @api {get} /test_openapi/works/:id Work
+        @apiName Work
+        @apiGroup Works
+        @apiParam {String} id id of the work
+        @apiParam {Number{1-100}} [max=10] max number of results
+        """
+        self.endpoints = {"tests": [{'path': '/test_openapi/works/<int:id>', 'methods': ['GET'], 'func_name': 'work',
+                                     'class_name': 'Works', 'file': 'works.py', 'doc': doc, 'cache': None,
+                                     'params': None}]}
+        self.openapi = OpenApi("Test", "1.0", apikey_header="X-Key")
+        self.app = Flask(__name__)
+
+    def test__path(self):
+        path, parameters = self.openapi.path("/a/<int:id>/<name>/<float(signed=True):value>")
+        self.assertEqual(path, "/a/{id}/{name}/{value}")
+        self.assertEqual([(parameter["name"], parameter["schema"]["type"]) for parameter in parameters],
+                         [("id", "integer"), ("name", "string"), ("value", "number")])
+
+    def test__build(self):
+        spec = self.openapi.build(self.endpoints)
+        operation = spec["paths"]["/test_openapi/works/{id}"]["get"]
+        self.assertEqual(operation["tags"], ["Works"])
+        # the path variable is not repeated as a query parameter
+        self.assertEqual([(parameter["name"], parameter["in"]) for parameter in operation["parameters"]],
+                         [("id", "path"), ("max", "query")])
+        self.assertEqual(operation["parameters"][1]["schema"], {"type": "number", "default": "10",
+                                                                "minimum": 1.0, "maximum": 100.0})
+        self.assertEqual(spec["components"]["securitySchemes"]["apikey_header"],
+                         {"type": "apiKey", "in": "header", "name": "X-Key"})
+        # the document is not built again if the endpoints did not change
+        self.assertIs(self.openapi.build(self.endpoints), spec)
+
+    def test__response(self):
+        self.openapi.build(self.endpoints)
+        with self.app.test_request_context("/openapi.json") as context:
+            response = self.openapi.response(self.app, context.request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.get_data()), self.openapi.spec)
+        etag = response.get_etag()[0]
+        with self.app.test_request_context("/openapi.json", headers={"Accept-Encoding": "gzip"}) as context:
+            response = self.openapi.response(self.app, context.request)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(response.get_data())), self.openapi.spec)
+        # the bodies have different etags
+        gzip_etag = response.get_etag()[0]
+        self.assertNotEqual(etag, gzip_etag)
+        for value in (etag, gzip_etag):
+            with self.app.test_request_context("/openapi.json", headers={"Accept-Encoding": "gzip",
+                                                                         "If-None-Match": f'"{value}"'}) as context:
+                response = self.openapi.response(self.app, context.request)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.get_etag()[0], gzip_etag)
+            self.assertEqual(response.get_data(), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+from hunabku.Pagination import Paginator
+from bson import ObjectId
+
+import unittest
+
+
+class TestPagination(unittest.TestCase):
+    """
+    Class to tests the cursor tokens and the range queries of the pagination
+    """
+
+    def setUp(self):
+        self.paginator = Paginator("secret", default_page_size=10, max_page_size=100)
+
+    def test__token(self):
+        _id = ObjectId()
+        token = self.paginator.encode("year", 1, [2020, _id])
+        self.assertEqual(self.paginator.decode(token, "year", 1), [2020, _id])
+        with self.assertRaises(ValueError):
+            self.paginator.decode(token, "year", -1)
+        with self.assertRaises(ValueError):
+            Paginator("other").decode(token, "year", 1)
+        with self.assertRaises(ValueError):
+            self.paginator.decode("x" + token, "year", 1)
+        with self.assertRaises(ValueError):
+            self.paginator.decode("ñ.ñ", "year", 1)
+
+    def test__page_size(self):
+        self.assertEqual(self.paginator.page_size(None), 10)
+        self.assertEqual(self.paginator.page_size("50"), 50)
+        for value in ("0", "101", "abc"):
+            with self.assertRaises(ValueError):
+                self.paginator.page_size(value)
+
+    def test__filter(self):
+        self.assertEqual(self.paginator.filter({"a": 1}, "_id", 1), {"a": 1})
+        self.assertEqual(self.paginator.filter({}, "_id", -1, [None, 5]), {"_id": {"$lt": 5}})
+        self.assertEqual(self.paginator.filter({"a": 1}, "year", 1, [2020, 5]),
+                         {"$and": [{"a": 1}, {"$or": [{"year": {"$gt": 2020}}, {"year": {"$eq": 2020}, "_id": {"$gt": 5}}]}]})
+        # the values of the cursor are not operators
+        position = self.paginator.filter({}, "year", 1, [{"$ne": None}, 5])
+        self.assertEqual(position["$or"][1]["year"], {"$eq": {"$ne": None}})
+
+    def test__server_secret(self):
+        # Hunabku updates the config of the class, the defaults are restored for the other tests
+        self.addCleanup(Hunabku.config.update, Hunabku.config.freeze().thaw())
+        config = ConfigGenerator().config.freeze().thaw()
+        first = Hunabku(config).paginator
+        second = Hunabku(config).paginator
+        # without config.pagination.secret every server run has a random secret, not derived from the apikey
+        self.assertNotEqual(first.secret, second.secret)
+        self.assertEqual(len(first.secret), 64)
+        config.pagination.secret = "configured"
+        self.assertEqual(Hunabku(config).paginator.secret, b"configured")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.HunabkuBase import HunabkuPluginBase, endpoint
+from hunabku.Config import ConfigGenerator
+from hunabku.Params import ParamsSchema
+from werkzeug.datastructures import MultiDict
+
+import unittest
+
+
+class Works(HunabkuPluginBase):
+    @endpoint('/test_params/works/<int:year>', methods=['GET'],
+              params={"max": {"type": int, "default": 10, "min": 1, "max": 100, "doc": "max number of works"},
+                      "sort": {"enum": ["year", "title"], "default": "year"},
+                      "full": bool,
+                      "id": {"type": str, "list": True, "required": True}})
+    def works(self, year, max, sort, full, id):
+        return self.json_response({"year": year, "max": max, "sort": sort, "full": full, "id": id})
+
+
+class TestParams(unittest.TestCase):
+    """
+    Class to tests the compiled schemas of the parameters of the endpoints
+    """
+
+    def test__validate(self):
+        schema = ParamsSchema({"max": {"type": int, "default": 10, "min": 1, "max": 100},
+                               "name": {"type": str, "max": 3}, "score": float})
+        self.assertEqual(schema.validate(MultiDict({"max": "5", "apikey": "x"})),
+                         ({"max": 5, "name": None, "score": None}, []))
+        values, errors = schema.validate(MultiDict({"max": "500", "name": "long", "score": "a", "other": "1"}))
+        self.assertEqual(errors, [{"param": "other", "msg": "unknown parameter"},
+                                  {"param": "max", "msg": "should be at most 100"},
+                                  {"param": "name", "msg": "should be at most 3 characters"},
+                                  {"param": "score", "msg": "should be number"}])
+        with self.assertRaises(ValueError):
+            ParamsSchema({"max": {"type": int, "maximum": 100}})
+
+    def test__endpoint(self):
+        server = Hunabku(ConfigGenerator().config)
+        Works(server).register_endpoints()
+        client = server.app.test_client()
+        response = client.get("/test_params/works/2020?id=a,b&id=c&full")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"year": 2020, "max": 10, "sort": "year", "full": True, "id": ["a", "b", "c"]})
+        response = client.get("/test_params/works/2020?max=0&sort=author")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["details"], [{"param": "max", "msg": "should be at least 1"},
+                                                    {"param": "sort", "msg": "should be one of year, title"},
+                                                    {"param": "id", "msg": "required parameter"}])
+        # the parameters are in the docs
+        register = next(register for register in HunabkuPluginBase.get_global_endpoints()["tests"]
+                        if register['path'] == '/test_params/works/<int:year>')
+        spec = server.openapi.build({"tests": [register]})
+        parameters = {parameter["name"]: parameter for parameter in
+                      spec["paths"]["/test_params/works/{year}"]["get"]["parameters"]}
+        self.assertEqual(parameters["max"]["schema"], {"type": "integer", "default": "10", "minimum": 1, "maximum": 100})
+        self.assertEqual(parameters["sort"]["schema"]["enum"], ["year", "title"])
+        self.assertTrue(parameters["id"]["required"])
+        self.assertEqual(parameters["id"]["schema"], {"type": "array", "items": {"type": "string"}})
+        # the endpoint has not apidoc docstring, the api_data.json has only the documented endpoints
+        self.assertEqual(server.apidoc_parser.parse_endpoints({"tests": [register]}), ([], []))
+        blocks = server.apidoc_parser.add_fields([{}], register['params'])
+        self.assertEqual([field["field"] for field in blocks[0]["parameter"]["fields"]["Parameter"]],
+                         ["max", "sort", "full", "id"])
+
+    def test__path_conflict(self):
+        def works(self, id):
+            pass
+        works.__qualname__ = "Works.works"
+        with self.assertRaisesRegex(ValueError, "variables of the path"):
+            endpoint('/test_params/<id>', methods=['GET'], params={"id": int})(works)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+from hunabku.PluginCache import PluginCache
+
+from shutil import rmtree
+import json
+import os
+import tempfile
+import unittest
+
+
+class TestPluginCache(unittest.TestCase):
+    """
+    Class to tests the invalidation of the entries of the plugins manifest
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "plugins.json")
+        self.module = os.path.join(self.directory, "module.py")
+        self.write("class A: pass\n", 1_000_000_000)
+        cache = PluginCache(self.filename)
+        cache.load()
+        self.assertIsNone(cache.lookup("hunabku_a", "1.0", self.module))
+        cache.store("hunabku_a", "1.0", self.module, ["A"])
+        cache.save()
+
+    def tearDown(self):
+        rmtree(self.directory, ignore_errors=True)
+
+    def write(self, text, mtime):
+        with open(self.module, "w") as f:
+            f.write(text)
+        os.utime(self.module, ns=(mtime, mtime))
+
+    def lookup(self, version="1.0"):
+        cache = PluginCache(self.filename)
+        cache.load()
+        return cache.lookup("hunabku_a", version, self.module)
+
+    def test__hit(self):
+        self.assertEqual(self.lookup()["classes"], ["A"])
+
+    def test__mtime(self):
+        self.write("class A: pass\n", 2_000_000_000)
+        self.assertIsNone(self.lookup())
+
+    def test__size(self):
+        # same mtime, the file was changed and the mtime restored
+        self.write("class B: pass\n\n", 1_000_000_000)
+        self.assertIsNone(self.lookup())
+
+    def test__version(self):
+        self.assertIsNone(self.lookup("2.0"))
+
+    def test__hunabku_version(self):
+        with open(self.filename) as f:
+            data = json.load(f)
+        data["hunabku"] = "0.0.0-other"
+        with open(self.filename, "w") as f:
+            json.dump(data, f)
+        self.assertIsNone(self.lookup())
+
+    def test__disabled(self):
+        cache = PluginCache(self.filename, enabled=False)
+        cache.load()
+        self.assertIsNone(cache.lookup("hunabku_a", "1.0", self.module))
+
+
+if __name__ == '__main__':
+    unittest.main()
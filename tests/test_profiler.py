@@ -0,0 +1,63 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+from hunabku.Profiler import Profiler
+
+from shutil import rmtree
+import tempfile
+import time
+import unittest
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiler(unittest.TestCase):
+    """
+    Class to tests the profiles of the slow requests and the rotation of the profiles directory
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.directory, ignore_errors=True)
+
+    def test__slow_requests(self):
+        profiler = Profiler(self.directory, threshold=0.05, max_files=2, interval=0.001)
+        for seconds in (0.001, 0.06, 0.07, 0.08):
+            start = time.perf_counter()
+            record = profiler.start("/slow")
+            busy(seconds)
+            profiler.stop(record, "GET", 200, time.perf_counter() - start)
+        profiles = profiler.profiles()
+        self.assertEqual(len(profiles), 2)
+        with open(profiler.path(profiles[0]["name"])) as f:
+            self.assertIn("busy (test_profiler.py", f.read())
+        self.assertIsNone(profiler.path("../" + profiles[0]["name"]))
+
+    def test__disabled(self):
+        profiler = Profiler(self.directory, threshold=0, sample_rate=1.0, routes=["/a"])
+        self.assertIsNone(profiler.start("/b"))
+        self.assertTrue(profiler.start("/a")["sampled"])
+
+    def test__profiles_scope(self):
+        # Hunabku updates the config of the class, the defaults are restored for the other tests
+        self.addCleanup(Hunabku.config.update, Hunabku.config.freeze().thaw())
+        config = ConfigGenerator().config.freeze().thaw()
+        config.profiling.enabled = True
+        config.profiling.dir = self.directory
+        server = Hunabku(config)
+        server.apikeys.add("reader", scopes=["scienti"])
+        server.apikeys.add("operator", scopes=["admin"])
+        client = server.app.test_client()
+        self.assertEqual(client.get("/profiles").status_code, 401)
+        self.assertEqual(client.get("/profiles", headers={"X-API-Key": "reader"}).status_code, 401)
+        self.assertEqual(client.get("/profiles", headers={"X-API-Key": "operator"}).status_code, 200)
+        self.assertEqual(client.get("/profiles?apikey=colavudea").status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.HunabkuBase import HunabkuPluginBase, endpoint
+from hunabku.Config import Config, ConfigGenerator, Param
+from hunabku.RateLimit import MemoryRateLimitBackend
+
+import unittest
+
+
+class Limited(HunabkuPluginBase):
+    config = Config()
+    config.ratelimit += Param(enabled=True, doc="the plugin is limited, the server is not")
+    config.ratelimit += Param(rate=2, doc="requests per period of the plugin")
+    calls = 0
+
+    @endpoint('/test_ratelimit/limited', methods=['GET'])
+    def limited(self):
+        Limited.calls += 1
+        return self.json_response({"calls": Limited.calls})
+
+
+class Unlimited(HunabkuPluginBase):
+    @endpoint('/test_ratelimit/unlimited', methods=['GET'])
+    def unlimited(self):
+        return self.json_response({})
+
+
+class TestRateLimit(unittest.TestCase):
+    """
+    Class to tests the token bucket of the memory rate limit backend
+    """
+
+    def test__burst_and_retry_after(self):
+        backend = MemoryRateLimitBackend()
+        results = [backend.hit("key:/a", 2, 60, 2) for i in range(3)]
+        self.assertEqual([allowed for allowed, retry_after in results], [True, True, False])
+        self.assertGreater(results[-1][1], 0)
+        self.assertLessEqual(results[-1][1], 30)
+        # other keys have their own bucket
+        self.assertTrue(backend.hit("key:/b", 2, 60, 2)[0])
+
+    def test__max_keys(self):
+        backend = MemoryRateLimitBackend(max_keys=2)
+        for key in ("a", "b", "c"):
+            backend.hit(key, 1, 60, 1)
+        self.assertEqual(list(backend.buckets), ["b", "c"])
+
+
+class TestRateLimiter(unittest.TestCase):
+    """
+    Class to tests the rate limits of @endpoint with the options of the plugins
+    """
+
+    def setUp(self):
+        self.server = Hunabku(ConfigGenerator().config)
+        Limited(self.server).register_endpoints()
+        Unlimited(self.server).register_endpoints()
+        self.server.apikeys.add("client")
+        self.client = self.server.app.test_client()
+        Limited.calls = 0
+
+    def test__plugin_limit(self):
+        for i in range(2):
+            self.assertEqual(self.client.get("/test_ratelimit/limited").status_code, 200)
+        response = self.client.get("/test_ratelimit/limited")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers["Retry-After"]), 0)
+        # the view is not called for the limited requests
+        self.assertEqual(Limited.calls, 2)
+        # the server config has not limits
+        for i in range(5):
+            self.assertEqual(self.client.get("/test_ratelimit/unlimited").status_code, 200)
+
+    def test__keys(self):
+        for i in range(2):
+            self.client.get("/test_ratelimit/limited")
+        # a valid apikey has its own bucket
+        self.assertEqual(self.client.get("/test_ratelimit/limited?apikey=client").status_code, 200)
+        self.assertEqual(self.client.get("/test_ratelimit/limited", headers={"X-API-Key": "client"}).status_code, 200)
+        self.assertEqual(self.client.get("/test_ratelimit/limited?apikey=client").status_code, 429)
+        # unknown keys share the bucket of the address
+        self.assertEqual(self.client.get("/test_ratelimit/limited?apikey=random1").status_code, 429)
+        self.assertEqual(self.client.get("/test_ratelimit/limited?apikey=random2").status_code, 429)
+        self.assertEqual(Limited.calls, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
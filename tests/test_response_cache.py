@@ -0,0 +1,104 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.HunabkuBase import HunabkuPluginBase, endpoint
+from hunabku.Config import ConfigGenerator
+from hunabku.ResponseCache import MemoryResponseCacheBackend
+
+import time
+import unittest
+
+
+class Counter(HunabkuPluginBase):
+    calls = 0
+
+    @endpoint('/test_cache/count', methods=['GET'], cache=60)
+    def count(self):
+        Counter.calls += 1
+        return self.json_response({"calls": Counter.calls, "args": self.request.args.to_dict(flat=False)})
+
+    @endpoint('/test_cache/missing', methods=['GET'], cache=60)
+    def missing(self):
+        Counter.calls += 1
+        return self.json_response({"calls": Counter.calls}, status=404)
+
+
+class TestResponseCache(unittest.TestCase):
+    """
+    Class to tests the memory backend of the response cache
+    """
+
+    def test__lru_and_ttl(self):
+        backend = MemoryResponseCacheBackend(max_entries=2)
+        backend.set("/a?#*", (b"a", 200, []), 60)
+        backend.set("/b?#*", (b"b", 200, []), 60)
+        self.assertEqual(backend.get("/a?#*"), (b"a", 200, []))
+        backend.set("/c?#*", (b"c", 200, []), 60)
+        # /b is the least recently used entry
+        self.assertIsNone(backend.get("/b?#*"))
+        backend.set("/d?#*", (b"d", 200, []), 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(backend.get("/d?#*"))
+
+    def test__invalidate(self):
+        backend = MemoryResponseCacheBackend()
+        for key in ("/a/1?#*", "/a/2?x=1#*", "/b?#*"):
+            backend.set(key, (b"", 200, []), 60)
+        backend.invalidate("/a/")
+        self.assertEqual(list(backend.entries), ["/b?#*"])
+        backend.invalidate()
+        self.assertEqual(len(backend.entries), 0)
+
+
+class TestResponseCacheEndpoint(unittest.TestCase):
+    """
+    Class to tests the cache of the responses of @endpoint(..., cache=ttl)
+    """
+
+    def setUp(self):
+        self.server = Hunabku(ConfigGenerator().config)
+        self.plugin = Counter(self.server)
+        self.plugin.register_endpoints()
+        self.server.apikeys.add("reader", scopes=["read"])
+        self.client = self.server.app.test_client()
+        Counter.calls = 0
+
+    def test__key(self):
+        with self.server.app.test_request_context("/test_cache/count?b=2&a=x%26c%3D1&apikey=reader"):
+            self.assertEqual(self.server.cache.key(self.plugin), "/test_cache/count?a=x%26c%3D1&b=2#read")
+        # a value with & or = is not the same request as two parameters
+        with self.server.app.test_request_context("/test_cache/count?a=x&c=1&b=2"):
+            self.assertEqual(self.server.cache.key(self.plugin), "/test_cache/count?a=x&b=2&c=1#-")
+
+    def test__hit_and_miss(self):
+        response = self.client.get("/test_cache/count?b=2&a=1")
+        self.assertEqual(response.headers["X-Cache"], "MISS")
+        # the order of the parameters and the apikey parameter are not part of the key
+        response = self.client.get("/test_cache/count?a=1&b=2")
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+        self.assertEqual(response.json["calls"], 1)
+        self.assertEqual(self.client.get("/test_cache/count?a=x%26b%3D2").headers["X-Cache"], "MISS")
+        self.assertEqual(Counter.calls, 2)
+
+    def test__scope(self):
+        # the responses are cached for the scopes of the apikey, other clients do not get them
+        self.assertEqual(self.client.get("/test_cache/count?apikey=reader").headers["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/test_cache/count", headers={"X-API-Key": "reader"}).headers["X-Cache"], "HIT")
+        self.assertEqual(self.client.get("/test_cache/count").headers["X-Cache"], "MISS")
+        self.assertEqual(self.client.get("/test_cache/count?apikey=colavudea").headers["X-Cache"], "MISS")
+        self.assertEqual(Counter.calls, 3)
+
+    def test__not_cached(self):
+        for i in range(2):
+            response = self.client.get("/test_cache/missing")
+            self.assertEqual(response.status_code, 404)
+            self.assertNotIn("X-Cache", response.headers)
+        self.assertEqual(Counter.calls, 2)
+        # the config of ConfigGenerator is shared by the tests
+        self.addCleanup(setattr, self.server.config.cache, "enabled", True)
+        self.server.config.cache.enabled = False
+        self.client.get("/test_cache/count")
+        self.assertNotIn("X-Cache", self.client.get("/test_cache/count").headers)
+        self.assertEqual(Counter.calls, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
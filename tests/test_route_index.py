@@ -0,0 +1,39 @@
+from hunabku.RouteIndex import RouteIndex
+
+import unittest
+
+
+class TestRouteIndex(unittest.TestCase):
+    """
+    Class to tests the detection of endpoints conflicts
+    """
+
+    def register(self, path, methods, func_name, class_name="Hello", file="/plugin/endpoints/Hello.py"):
+        return {'path': path, 'methods': methods, 'func_name': func_name, 'class_name': class_name, 'file': file}
+
+    def test__normalise(self):
+        self.assertEqual(RouteIndex.normalise("/a/<id>"), RouteIndex.normalise("/a/<int:name>"))
+        self.assertEqual(RouteIndex.normalise("/a/"), "/a")
+        self.assertEqual(RouteIndex.normalise("/"), "/")
+
+    def test__conflicts_by_method(self):
+        endpoints = {
+            'hunabku_a': [self.register('/a/<id>', ['GET'], 'get'),
+                          self.register('/a/<name>', ['POST'], 'post')],
+            'hunabku_b': [self.register('/a/<int:key>', ['get'], 'get', file="/b/endpoints/Hello.py"),
+                          self.register('/b', ['GET'], 'b', file="/b/endpoints/Hello.py")],
+        }
+        conflicts = RouteIndex().build(endpoints).conflicts()
+        self.assertEqual(len(conflicts), 1)
+        self.assertEqual(conflicts[0]['path'], '/a/<>')
+        self.assertEqual(sorted(conflicts[0]['methods']), ['GET', 'HEAD'])
+        self.assertEqual(conflicts[0]['endpoint']['package'], 'hunabku_b')
+        self.assertEqual(conflicts[0]['registered']['package'], 'hunabku_a')
+
+    def test__same_endpoint_twice(self):
+        endpoints = {'hunabku_a': [self.register('/a', ['GET'], 'get'), self.register('/a', ['GET'], 'get')]}
+        self.assertEqual(RouteIndex().build(endpoints).conflicts(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+from hunabku.Serializer import Serializer
+from datetime import datetime
+import decimal
+
+import unittest
+
+
+class TestSerializer(unittest.TestCase):
+    """
+    Class to tests the json serializer of the plugins with the available backends
+    """
+
+    def test__encoders(self):
+        class Point:
+            def __init__(self, x):
+                self.x = x
+        data = {'date': datetime(2024, 1, 2, 3, 4, 5), 'value': decimal.Decimal('1.5'), 'point': Point(1)}
+        for backend in ("json", "auto"):
+            serializer = Serializer(backend)
+            serializer.add_encoder(Point, lambda point: {'x': point.x})
+            self.assertEqual(serializer.loads(serializer.dumpb(data)),
+                             {'date': '2024-01-02T03:04:05', 'value': '1.5', 'point': {'x': 1}})
+            self.assertIsInstance(serializer.dumps(data), str)
+            with self.assertRaises(TypeError):
+                serializer.dumps({'x': object()})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import unittest
+
+import requests
+
+# app served by the test process, it prints the port and serves with the mode in argv[1]
+server_script = """
+import os
+import sys
+from flask import Flask
+from hunabku.Server import Server
+
+app = Flask("test_server")
+
+
+@app.route("/pid")
+def pid():
+    return str(os.getpid())
+
+
+server = Server(app, "127.0.0.1", 0, workers=int(sys.argv[2]))
+server.bind()
+print(server.port, flush=True)
+server.serve(sys.argv[1])
+"""
+
+
+class TestServer(unittest.TestCase):
+    """
+    Class to tests the threaded and prefork modes of the server in a subprocess
+    """
+
+    def start(self, mode, workers=1):
+        process = subprocess.Popen([sys.executable, "-c", server_script, mode, str(workers)],
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.addCleanup(self.stop, process)
+        port = int(process.stdout.readline())
+        self.url = f"http://127.0.0.1:{port}/pid"
+        return process
+
+    def stop(self, process):
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+    def get_pid(self):
+        # the workers are forked after the port is printed, the first requests can wait in the backlog
+        for i in range(50):
+            try:
+                return int(requests.get(self.url, timeout=5).text)
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        self.fail("the server did not answer")
+
+    def test__threaded(self):
+        process = self.start("threaded")
+        self.assertEqual(self.get_pid(), process.pid)
+        # keep-alive (HTTP/1.1), the requests use the same connection
+        with requests.Session() as session:
+            responses = [session.get(self.url, timeout=5) for i in range(3)]
+        self.assertEqual([response.raw.version for response in responses], [11, 11, 11])
+        self.assertEqual({int(response.text) for response in responses}, {process.pid})
+
+    def test__prefork(self):
+        process = self.start("prefork", workers=1)
+        worker = self.get_pid()
+        # the requests are served by the forked worker, not by the master
+        self.assertNotEqual(worker, process.pid)
+        # a dead worker is restarted by the master
+        os.kill(worker, signal.SIGKILL)
+        for i in range(50):
+            pid = self.get_pid()
+            if pid != worker:
+                break
+            time.sleep(0.1)
+        self.assertNotIn(pid, (worker, process.pid))
+        # SIGTERM stops the master and the workers
+        process.send_signal(signal.SIGTERM)
+        self.assertEqual(process.wait(timeout=10), 0)
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
+
+    def test__unknown_mode(self):
+        process = subprocess.Popen([sys.executable, "-c", server_script, "other", "1"],
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.addCleanup(self.stop, process)
+        self.assertEqual(process.wait(timeout=10), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
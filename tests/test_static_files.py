@@ -0,0 +1,72 @@
+from hunabku.Hunabku import Hunabku
+from hunabku.Config import ConfigGenerator
+import gzip
+import os
+import tempfile
+
+import unittest
+
+
+class TestStaticFiles(unittest.TestCase):
+    """
+    Class to tests the fingerprinted and compressed static files of the apidoc site served from memory
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config = ConfigGenerator().config
+        self.apidoc_dir = self.config.apidoc.apidoc_dir
+        self.config.apidoc.apidoc_dir = self.directory.name
+        self.server = Hunabku(self.config)
+        output = self.server.apidoc_output_dir
+        os.makedirs(output + "/assets")
+        with open(output + "/index.html", "w") as f:
+            f.write('<html><script src="assets/main.js"></script><link href="assets/missing.css"></html>')
+        with open(output + "/assets/main.js", "w") as f:
+            f.write("function apidoc() { return 1; }\n" * 100)
+        self.client = self.server.app.test_client()
+
+    def tearDown(self):
+        self.config.apidoc.apidoc_dir = self.apidoc_dir
+        self.directory.cleanup()
+
+    def test__build_and_serve(self):
+        self.server.update_static()
+        output = self.server.apidoc_output_dir
+        self.assertTrue(os.path.exists(output + "/assets/main.js.gz"))
+        fingerprint = self.server.static.files["apidoc/assets/main.js"]["fingerprint"]
+        response = self.client.get("/apidoc/index.html")
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+        self.assertIn(f'src="assets/main.js?v={fingerprint}"'.encode(), response.data)
+        # the missing files are not fingerprinted
+        self.assertIn(b'href="assets/missing.css"', response.data)
+
+        response = self.client.get(f"/apidoc/assets/main.js?v={fingerprint}", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertEqual(response.headers["ETag"], f'"{fingerprint}-gzip"')
+        self.assertTrue(gzip.decompress(response.data).startswith(b"function apidoc()"))
+        response = self.client.get("/apidoc/assets/main.js", headers={"If-None-Match": f'"{fingerprint}"'})
+        self.assertEqual(response.status_code, 304)
+
+        # a second build does not fingerprint twice
+        self.server.update_static(rebuild=True)
+        self.assertEqual(self.client.get("/apidoc/index.html").data.count(b"?v="), 1)
+
+        # the files are served from memory
+        os.remove(output + "/assets/main.js")
+        self.assertEqual(self.client.get("/apidoc/assets/main.js").status_code, 200)
+
+    def test__reload(self):
+        self.server.update_static()
+        other = Hunabku(self.config)
+        self.assertTrue(other.static.load())
+        self.assertEqual(set(other.static.files), set(self.server.static.files))
+        # the files changed after the build, they are not served from the manifest
+        with open(self.server.apidoc_output_dir + "/index.html", "a") as f:
+            f.write("<!-- new -->")
+        self.assertFalse(other.static.load())
+
+
+if __name__ == '__main__':
+    unittest.main()
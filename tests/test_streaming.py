@@ -0,0 +1,50 @@
+from hunabku.Serializer import Serializer
+from hunabku.Streaming import StreamWriter
+
+import unittest
+
+
+class Cursor:
+    def __init__(self, n):
+        self.n = n
+        self.read = 0
+        self.closed = False
+
+    def __iter__(self):
+        for i in range(self.n):
+            self.read += 1
+            yield {'i': i, 'tags': ['a']}
+
+    def close(self):
+        self.closed = True
+
+
+class TestStreaming(unittest.TestCase):
+    """
+    Class to tests the chunks of the streamed responses
+    """
+
+    def setUp(self):
+        self.writer = StreamWriter(Serializer(), chunk_size=64)
+
+    def test__formats(self):
+        serializer = Serializer()
+        body = b"".join(self.writer.stream(Cursor(10), "json"))
+        self.assertEqual(serializer.loads(body), [{'i': i, 'tags': ['a']} for i in range(10)])
+        lines = b"".join(self.writer.stream(Cursor(2), "ndjson")).splitlines()
+        self.assertEqual([serializer.loads(line) for line in lines], [{'i': 0, 'tags': ['a']}, {'i': 1, 'tags': ['a']}])
+        body = b"".join(self.writer.stream(Cursor(1), "csv"))
+        self.assertEqual(body.decode().splitlines(), ['i,tags', '0,"[""a""]"'])
+        self.assertEqual(b"".join(self.writer.stream(Cursor(0), "json")), b"[]")
+
+    def test__close_on_disconnect(self):
+        cursor = Cursor(100000)
+        chunks = self.writer.stream(cursor, "ndjson")
+        next(chunks)
+        chunks.close()
+        self.assertTrue(cursor.closed)
+        self.assertLess(cursor.read, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()